@@ -1,22 +1,250 @@
-from fastapi import FastAPI, APIRouter, HTTPException
-from fastapi.responses import JSONResponse
+from fastapi import FastAPI, APIRouter, HTTPException, Request
+from fastapi.responses import JSONResponse, Response, StreamingResponse
 from dotenv import load_dotenv
 from starlette.middleware.cors import CORSMiddleware
+from starlette.datastructures import Headers, MutableHeaders
 from motor.motor_asyncio import AsyncIOMotorClient
+from pymongo import UpdateOne, UpdateMany, ReplaceOne, InsertOne, ReturnDocument
+from pymongo.errors import BulkWriteError
+from pymongo.results import DeleteResult
+from pymongo import monitoring
 import os
+import asyncio
+import importlib
 import logging
 from pathlib import Path
 from pydantic import BaseModel, Field
-from typing import List, Optional, Dict, Any
+from typing import List, Optional, Dict, Any, Callable, Awaitable, Tuple, AsyncIterator, Deque, get_args
+from dataclasses import dataclass
+from collections import OrderedDict, deque
 import uuid
-from datetime import datetime, timedelta
+from datetime import datetime, timedelta, timezone
+import base64
+import binascii
+import bisect
+import contextvars
+import cProfile
+import gzip
+import hashlib
+import hmac
 import json
+import pstats
 import random
+import re
+import secrets
+import threading
+import time
+import zlib
+import bson
 from bson import ObjectId
+from bson.codec_options import CodecOptions
+from bson.raw_bson import RawBSONDocument
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
 
 ROOT_DIR = Path(__file__).parent
 load_dotenv(ROOT_DIR / '.env')
 
+# Metrics: in-process counters and histograms, rendered in the Prometheus text exposition format at /metrics
+# for scrapers presenting METRICS_TOKEN as a bearer token; without a token configured /metrics is not served
+METRICS_TOKEN = os.environ.get('METRICS_TOKEN', '')
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+ROUND_TRIP_BUCKETS = (0, 1, 2, 3, 5, 8, 13, 21, 34)
+
+def format_metric_labels(names: Tuple[str, ...], values: Tuple[str, ...]) -> str:
+    """Label set in exposition syntax, values escaped"""
+    if not names:
+        return ""
+    pairs = []
+    for name, value in zip(names, values):
+        value = str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+        pairs.append(f'{name}="{value}"')
+    return "{" + ",".join(pairs) + "}"
+
+class Metric:
+    """One metric family; samples are keyed by their label values"""
+    kind = "untyped"
+
+    def __init__(self, name: str, documentation: str, labelnames: Tuple[str, ...] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = labelnames
+        self._values: Dict[Tuple[str, ...], Any] = {}
+        self._lock = threading.Lock()  # the Mongo listener records from Motor's executor threads
+        METRICS.append(self)
+
+    def samples(self) -> List[str]:
+        raise NotImplementedError
+
+    def render(self) -> str:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.kind}"]
+        lines.extend(self.samples())
+        return "\n".join(lines)
+
+class Counter(Metric):
+    kind = "counter"
+
+    def inc(self, *labels: str, amount: float = 1):
+        with self._lock:
+            self._values[labels] = self._values.get(labels, 0) + amount
+
+    def value(self, *labels: str) -> float:
+        return self._values.get(labels, 0)
+
+    def samples(self) -> List[str]:
+        with self._lock:
+            items = list(self._values.items())
+        return [f"{self.name}{format_metric_labels(self.labelnames, labels)} {value}" for labels, value in items]
+
+class Histogram(Metric):
+    kind = "histogram"
+
+    def __init__(self, name: str, documentation: str, labelnames: Tuple[str, ...] = (), buckets: Tuple[float, ...] = LATENCY_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(buckets)
+
+    def observe(self, value: float, *labels: str):
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            state = self._values.get(labels)
+            if state is None:
+                state = self._values[labels] = [[0] * (len(self.buckets) + 1), 0.0, 0]  # counts per bucket, sum, count
+            state[0][index] += 1
+            state[1] += value
+            state[2] += 1
+
+    def samples(self) -> List[str]:
+        with self._lock:
+            items = [(labels, (list(state[0]), state[1], state[2])) for labels, state in self._values.items()]
+        lines = []
+        names = self.labelnames + ("le",)
+        for labels, (counts, total, count) in items:
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets + (float("inf"),), counts):
+                cumulative += bucket_count
+                le = "+Inf" if bound == float("inf") else repr(float(bound))
+                lines.append(f"{self.name}_bucket{format_metric_labels(names, labels + (le,))} {cumulative}")
+            lines.append(f"{self.name}_sum{format_metric_labels(self.labelnames, labels)} {total}")
+            lines.append(f"{self.name}_count{format_metric_labels(self.labelnames, labels)} {count}")
+        return lines
+
+class CallbackMetric(Metric):
+    """Counter or gauge whose samples are read from existing state at scrape time"""
+    def __init__(self, name: str, documentation: str, kind: str, labelnames: Tuple[str, ...], collect: Callable[[], Dict[Tuple[str, ...], float]]):
+        super().__init__(name, documentation, labelnames)
+        self.kind = kind
+        self.collect = collect
+
+    def samples(self) -> List[str]:
+        return [f"{self.name}{format_metric_labels(self.labelnames, labels)} {value}" for labels, value in self.collect().items()]
+
+METRICS: List[Metric] = []
+http_requests_total = Counter("http_requests_total", "HTTP requests by route template and status", ("method", "route", "status"))
+http_request_errors_total = Counter("http_request_errors_total", "HTTP requests that failed with a 5xx status or an unhandled exception", ("method", "route"))
+http_request_duration_seconds = Histogram("http_request_duration_seconds", "HTTP request latency by route template", ("method", "route"))
+mongo_commands_total = Counter("mongo_commands_total", "MongoDB commands sent, by command name", ("command",))
+mongo_route_commands_total = Counter("mongo_route_commands_total", "MongoDB commands sent while handling each route", ("route", "command"))
+mongo_command_duration_seconds = Histogram("mongo_command_duration_seconds", "MongoDB command round-trip time", ("command",))
+mongo_slow_commands_total = Counter("mongo_slow_commands_total", "MongoDB commands slower than MONGO_SLOW_COMMAND_MS", ("command",))
+mongo_round_trips_per_request = Histogram("mongo_round_trips_per_request", "MongoDB commands sent while handling one request", ("route",), buckets=ROUND_TRIP_BUCKETS)
+problem_generation_seconds = Histogram("problem_generation_seconds", "Time spent in one problem generator call", ("subject", "problem_type"))
+cache_requests_total = Counter("cache_requests_total", "Cache lookups by cache and result (hit or miss)", ("cache", "result"))
+
+def render_metrics() -> str:
+    """All metric families in the text exposition format"""
+    return "\n".join(metric.render() for metric in METRICS) + "\n"
+
+class RequestStats:
+    """Per-request tallies, shared with Motor's executor threads through the copied context"""
+    __slots__ = ("scope", "commands", "mongo_seconds")
+
+    def __init__(self, scope):
+        self.scope = scope
+        self.commands: List[str] = []  # command names in the order they were sent
+        self.mongo_seconds = 0.0
+
+    @property
+    def route(self) -> str:
+        """Route template once the router has matched one"""
+        return getattr(self.scope.get("route"), "path", None) or "unmatched"
+
+_request_stats: contextvars.ContextVar[Optional[RequestStats]] = contextvars.ContextVar("request_stats", default=None)
+
+# Mongo command monitoring
+MONGO_SLOW_COMMAND_MS = float(os.environ.get('MONGO_SLOW_COMMAND_MS', '100'))
+# Where each command keeps its filter (update and delete carry a list of statements, aggregate a pipeline)
+COMMAND_FILTER_FIELDS = {
+    "find": "filter", "count": "query", "distinct": "query", "findAndModify": "query",
+    "update": "updates", "delete": "deletes", "aggregate": "pipeline"
+}
+
+def query_shape(value: Any) -> Any:
+    """A filter with its values replaced by "?": field names and operators only, safe to log and groups similar queries"""
+    if isinstance(value, dict):
+        return {key: query_shape(item) for key, item in value.items()}
+    if isinstance(value, (list, tuple)) and any(isinstance(item, dict) for item in value):
+        return [query_shape(item) for item in value]
+    return "?"
+
+def command_filter_shape(command_name: str, command: Dict[str, Any]) -> Any:
+    """Shape of the filter a command ran with (None for commands without one)"""
+    field = COMMAND_FILTER_FIELDS.get(command_name)
+    if field is None:
+        return None
+    value = command.get(field)
+    if command_name in ("update", "delete") and isinstance(value, list):
+        return [query_shape(statement.get("q")) for statement in value[:5]]
+    return query_shape(value)
+
+class MongoCommandMonitor(monitoring.CommandListener):
+    """Attribute every MongoDB command and its duration to the request that issued it; log slow ones with their filter shape"""
+    def __init__(self):
+        self._pending: Dict[Tuple[Any, int], Dict[str, Any]] = {}  # started commands, kept only until they finish
+
+    def started(self, event):
+        mongo_commands_total.inc(event.command_name)
+        stats = _request_stats.get()
+        if stats is not None:
+            stats.commands.append(event.command_name)
+        self._pending[(event.connection_id, event.request_id)] = event.command
+
+    def succeeded(self, event):
+        self._finish(event)
+
+    def failed(self, event):
+        self._finish(event)
+
+    def _finish(self, event):
+        command = self._pending.pop((event.connection_id, event.request_id), None)
+        seconds = event.duration_micros / 1_000_000
+        mongo_command_duration_seconds.observe(seconds, event.command_name)
+        stats = _request_stats.get()
+        if stats is not None:
+            stats.mongo_seconds += seconds
+        if seconds * 1000 < MONGO_SLOW_COMMAND_MS:
+            return
+        mongo_slow_commands_total.inc(event.command_name)
+        collection = command.get(event.command_name) if command else None
+        shape = command_filter_shape(event.command_name, command) if command else None
+        route = stats.route if stats is not None else "background"
+        logging.warning(
+            f"🐢 Slow MongoDB command {event.command_name} on {collection if isinstance(collection, str) else '?'}: "
+            f"{seconds * 1000:.1f} ms ({route}), filter {dumps_json(shape).decode('utf-8')}"
+        )
+
 # MongoDB connection
 mongo_url = os.environ.get('MONGO_URL')
 
@@ -37,7 +265,7 @@ else:
     print(f"🔗 Connecting to MongoDB: {mongo_url[:50]}...")
 
 try:
-    client = AsyncIOMotorClient(mongo_url)
+    client = AsyncIOMotorClient(mongo_url, event_listeners=[MongoCommandMonitor()])
     # Extract database name from connection string or use default
     db_name = os.environ.get('DB_NAME', 'weekly_star_tracker')
     db = client[db_name]
@@ -47,8 +275,255 @@ except Exception as e:
     print(f"❌ MongoDB connection error: {e}")
     raise
 
+# Sync sequence: every write to a synced collection is stamped with a monotonic sync_seq
+SYNC_COLLECTIONS = (
+    "tasks", "week_stars", "weekly_progress", "rewards",
+    "math_settings", "german_settings", "english_settings"
+)
+# Backed-up collections that aren't synced still get updated_at, for incremental backups
+STAMPED_COLLECTIONS = SYNC_COLLECTIONS + ("math_statistics", "german_statistics", "english_statistics")
+_inflight_sync_seqs: Dict[int, datetime] = {}  # seq -> updated_at of writes that haven't finished yet
+# Allocations whose $inc hasn't returned yet -> (lowest seq they can get, time they started)
+_pending_sync_allocations: Dict[object, Tuple[int, datetime]] = {}
+_sync_seq_seen = 0  # highest counter value this process has read
+
+def note_sync_seq(seq: int):
+    """Remember the highest counter value seen, the floor for allocations started after it"""
+    global _sync_seq_seen
+    _sync_seq_seen = max(_sync_seq_seen, seq)
+
+async def next_sync_seq() -> int:
+    """Allocate the next sequence number from the counters collection"""
+    counter = await db.counters.find_one_and_update(
+        {"_id": "sync_seq"}, {"$inc": {"seq": 1}}, upsert=True, return_document=ReturnDocument.AFTER
+    )
+    note_sync_seq(counter["seq"])
+    return counter["seq"]
+
+async def current_sync_watermark() -> int:
+    """Highest seq below which every write has finished
+
+    Only writes made by this process hold the watermark back: a write that is still allocating its seq
+    counts from the last counter value seen, one that has its seq counts from that seq. Writes made by
+    other processes against the same database are not covered.
+    """
+    counter = await db.counters.find_one({"_id": "sync_seq"})
+    seq = counter["seq"] if counter else 0
+    note_sync_seq(seq)
+    floors = [floor for floor, _ in _pending_sync_allocations.values()] + list(_inflight_sync_seqs)
+    if floors:
+        seq = min(seq, min(floors) - 1)
+    return seq
+
+def current_backup_watermark() -> datetime:
+    """Time before which every write has finished; only in-flight writes in this process hold it back"""
+    started = [started_at for _, started_at in _pending_sync_allocations.values()]
+    watermark = min([datetime.utcnow(), *_inflight_sync_seqs.values(), *started])
+    # Mongo stores datetimes in milliseconds; round down so `updated_at >= watermark` can't miss a write
+    return watermark.replace(microsecond=watermark.microsecond // 1000 * 1000)
+
+def stamp_update(update, stamp: Dict[str, Any]):
+    """Add the sync_seq/updated_at stamp to an update document or pipeline"""
+    if isinstance(update, list):
+        return update + [{"$set": stamp}]
+    return {**update, "$set": {**update.get("$set", {}), **stamp}}
+
+def stamp_bulk_request(request, stamp: Dict[str, Any]):
+    """Copy of a bulk_write request with the stamp added, keeping every option of the original"""
+    # pymongo has no public accessors for a request's parts, so this mirrors the constructors of pymongo 4.x
+    if isinstance(request, (UpdateOne, UpdateMany)):
+        return type(request)(
+            request._filter, stamp_update(request._doc, stamp), upsert=request._upsert,
+            collation=request._collation, array_filters=request._array_filters, hint=request._hint
+        )
+    if isinstance(request, ReplaceOne):
+        return ReplaceOne(
+            request._filter, {**request._doc, **stamp}, upsert=request._upsert,
+            collation=request._collation, hint=request._hint
+        )
+    if isinstance(request, InsertOne):
+        return InsertOne({**request._doc, **stamp})
+    raise ValueError(f"{type(request).__name__} is not supported in bulk writes to synced collections, use delete_one/delete_many")
+
+class SyncStampedCollection:
+    """Collection wrapper stamping each write with one sync_seq and updated_at, and recording deletions as tombstones"""
+    def __init__(self, collection):
+        self._collection = collection
+
+    def __getattr__(self, name):
+        return getattr(self._collection, name)
+
+    async def _stamped(self, write):
+        """Run `write` with a freshly allocated stamp
+
+        The allocation is one extra round trip (a findAndModify on the counter) per write call, not per document:
+        a bulk_write, insert_many or update_many shares one seq. Deletes add the tombstone insert on top, and
+        delete_many a read of the ids it deletes. The query budgets in tests/test_query_budgets.py count these.
+        """
+        # Hold the watermark back before the counter round trip: a reader may see the incremented counter first
+        allocation = object()
+        _pending_sync_allocations[allocation] = (_sync_seq_seen + 1, datetime.utcnow())
+        seq = None
+        try:
+            seq = await next_sync_seq()
+            stamp = {"sync_seq": seq, "updated_at": datetime.utcnow()}
+            _inflight_sync_seqs[seq] = stamp["updated_at"]
+            del _pending_sync_allocations[allocation]
+            return await write(stamp)
+        finally:
+            _pending_sync_allocations.pop(allocation, None)
+            if seq is not None:
+                _inflight_sync_seqs.pop(seq, None)
+
+    async def insert_one(self, document, **kwargs):
+        return await self._stamped(lambda stamp: self._collection.insert_one({**document, **stamp}, **kwargs))
+
+    async def insert_many(self, documents, **kwargs):
+        return await self._stamped(lambda stamp: self._collection.insert_many(
+            [{**document, **stamp} for document in documents], **kwargs
+        ))
+
+    async def replace_one(self, filter, replacement, **kwargs):
+        return await self._stamped(lambda stamp: self._collection.replace_one(filter, {**replacement, **stamp}, **kwargs))
+
+    async def update_one(self, filter, update, **kwargs):
+        return await self._stamped(lambda stamp: self._collection.update_one(filter, stamp_update(update, stamp), **kwargs))
+
+    async def update_many(self, filter, update, **kwargs):
+        return await self._stamped(lambda stamp: self._collection.update_many(filter, stamp_update(update, stamp), **kwargs))
+
+    async def find_one_and_update(self, filter, update, *args, **kwargs):
+        return await self._stamped(lambda stamp: self._collection.find_one_and_update(filter, stamp_update(update, stamp), *args, **kwargs))
+
+    async def bulk_write(self, requests, **kwargs):
+        return await self._stamped(lambda stamp: self._collection.bulk_write(
+            [stamp_bulk_request(request, stamp) for request in requests], **kwargs
+        ))
+
+    async def delete_one(self, filter, **kwargs):
+        async def write(stamp):
+            # One round trip deletes the document and returns the id its tombstone needs
+            doc = await self._collection.find_one_and_delete(filter, {"id": 1}, **kwargs)
+            if doc is None:
+                return DeleteResult({"n": 0}, acknowledged=True)
+            await self._record_tombstones([doc], stamp)
+            return DeleteResult({"n": 1}, acknowledged=True)
+        return await self._stamped(write)
+
+    async def delete_many(self, filter, **kwargs):
+        async def write(stamp):
+            docs = await self._collection.find(filter, {"id": 1}).to_list(length=None)
+            # Delete exactly the documents that get tombstones
+            result = await self._collection.delete_many({"_id": {"$in": [doc["_id"] for doc in docs]}}, **kwargs)
+            await self._record_tombstones(docs, stamp)
+            return result
+        return await self._stamped(write)
+
+    async def _record_tombstones(self, docs, stamp: Dict[str, Any]):
+        if not docs:
+            return
+        await db.sync_tombstones.insert_many([
+            {"collection": self._collection.name, "id": doc.get("id", str(doc["_id"])), "sync_seq": stamp["sync_seq"], "deleted_at": stamp["updated_at"]}
+            for doc in docs
+        ])
+        schedule_tombstone_prune()
+
+# Tombstones are kept for SYNC_TOMBSTONE_RETENTION_SECONDS; clients and backups older than that start over
+SYNC_TOMBSTONE_RETENTION_SECONDS = int(os.environ.get('SYNC_TOMBSTONE_RETENTION_SECONDS', str(90 * 24 * 3600)))
+TOMBSTONE_PRUNE_INTERVAL_SECONDS = 3600
+_tombstone_prune_task: Optional[asyncio.Task] = None
+_tombstones_pruned_at = 0.0  # monotonic time of this process's last prune
+
+async def prune_sync_tombstones():
+    """Delete tombstones past the retention, recording the highest pruned seq and the cutoff first"""
+    cutoff = datetime.utcnow() - timedelta(seconds=SYNC_TOMBSTONE_RETENTION_SECONDS)
+    newest = await db.sync_tombstones.find({"deleted_at": {"$lt": cutoff}}, {"sync_seq": 1}).sort("sync_seq", -1).limit(1).to_list(1)
+    if not newest:
+        return
+    # /sync and incremental backups compare against these, so they must be written before anything is deleted
+    await db.counters.update_one(
+        {"_id": "sync_seq"},
+        {"$max": {"tombstones_pruned_seq": newest[0]["sync_seq"], "tombstones_pruned_at": cutoff}},
+        upsert=True
+    )
+    await db.sync_tombstones.delete_many({"deleted_at": {"$lt": cutoff}})
+
+def schedule_tombstone_prune():
+    """Prune in the background at most once per TOMBSTONE_PRUNE_INTERVAL_SECONDS"""
+    global _tombstone_prune_task, _tombstones_pruned_at
+    now = time.monotonic()
+    if _tombstones_pruned_at and now - _tombstones_pruned_at < TOMBSTONE_PRUNE_INTERVAL_SECONDS:
+        return
+    if _tombstone_prune_task is not None and not _tombstone_prune_task.done():
+        return
+    _tombstones_pruned_at = now
+    _tombstone_prune_task = asyncio.create_task(prune_sync_tombstones())
+
+class SyncStampedDatabase:
+    """Database wrapper handing out stamped collections for STAMPED_COLLECTIONS"""
+    def __init__(self, database):
+        self._database = database
+
+    def __getattr__(self, name):
+        attribute = getattr(self._database, name)
+        return SyncStampedCollection(attribute) if name in STAMPED_COLLECTIONS else attribute
+
+    def __getitem__(self, name):
+        collection = self._database[name]
+        return SyncStampedCollection(collection) if name in STAMPED_COLLECTIONS else collection
+
+db = SyncStampedDatabase(db)
+
+# JSON serialization
+def json_default(obj):
+    """Serialize the types found in Mongo documents and models that JSON doesn't cover natively"""
+    if isinstance(obj, ObjectId):
+        return str(obj)
+    if isinstance(obj, BaseModel):
+        return obj.model_dump()
+    if isinstance(obj, uuid.UUID):
+        return str(obj)
+    if hasattr(obj, "isoformat"):
+        return obj.isoformat()
+    if isinstance(obj, (set, frozenset)):
+        return list(obj)
+    raise TypeError(f"Object of type {type(obj).__name__} is not JSON serializable")
+
+def dumps_json(content: Any) -> bytes:
+    """Encode content as UTF-8 JSON, with orjson when available"""
+    if orjson is not None:
+        return orjson.dumps(content, default=json_default, option=orjson.OPT_NON_STR_KEYS)
+    return json.dumps(content, default=json_default, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+def loads_json(data: bytes) -> Any:
+    """Decode JSON bytes, with orjson when available"""
+    if orjson is not None:
+        return orjson.loads(data)
+    return json.loads(data)
+
+class FastJSONResponse(JSONResponse):
+    """Default response class: raw Mongo documents (ObjectId, datetime, UUID) serialize without jsonable_encoder"""
+    def render(self, content: Any) -> bytes:
+        return dumps_json(content)
+
+def model_projection(model) -> Dict[str, int]:
+    """Mongo projection returning exactly a model's fields, so documents can be served without the model"""
+    return {"_id": 0, **{field: 1 for field in model.model_fields}}
+
+def fill_model_defaults(model, docs: List[Dict[str, Any]], fields: Optional[List[str]] = None) -> List[Dict[str, Any]]:
+    """Add the model's defaults to documents stored before a field existed, as validating them would"""
+    defaults = [
+        (name, field) for name, field in model.model_fields.items()
+        if not field.is_required() and (fields is None or name in fields)
+    ]
+    for doc in docs:
+        for name, field in defaults:
+            if name not in doc:
+                doc[name] = field.get_default(call_default_factory=True)
+    return docs
+
 # Create the main app
-app = FastAPI()
+app = FastAPI(default_response_class=FastJSONResponse)
 api_router = APIRouter(prefix="/api")
 
 # Add global exception handler
@@ -80,8 +555,311 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["GET", "POST", "PUT", "DELETE", "OPTIONS"],
     allow_headers=["*"],
+    expose_headers=["X-Next-Cursor", "X-Profile-Id", "X-Profile-Status"],
 )
 
+# Response compression
+COMPRESSION_MINIMUM_SIZE = int(os.environ.get('COMPRESSION_MINIMUM_SIZE', '1024'))
+SKIP_COMPRESSION_TYPES = (
+    "text/event-stream", "application/gzip", "application/vnd.weekly-star-tracker.backup", "image/", "audio/", "video/"
+)
+
+def choose_content_encoding(accept_encoding: str) -> Optional[str]:
+    """Pick the best encoding the client accepts: br when brotli is installed, else gzip"""
+    accepted = set()
+    for part in accept_encoding.lower().split(","):
+        coding, _, params = part.strip().partition(";")
+        if params.replace(" ", "") in ("q=0", "q=0.0", "q=0.00", "q=0.000"):
+            continue
+        accepted.add(coding.strip())
+    if brotli is not None and "br" in accepted:
+        return "br"
+    if "gzip" in accepted:
+        return "gzip"
+    return None
+
+class StreamCompressor:
+    """Incremental gzip/brotli/zstd compressor with a common compress/finish interface"""
+    def __init__(self, encoding: str):
+        self.encoding = encoding
+        if encoding == "br":
+            self._compressor = brotli.Compressor(quality=4)
+        elif encoding == "zstd":
+            self._compressor = zstandard.ZstdCompressor(level=3).compressobj()
+        else:
+            self._compressor = zlib.compressobj(6, zlib.DEFLATED, 31)  # wbits 31 = gzip container
+
+    def compress(self, data: bytes) -> bytes:
+        if self.encoding == "br":
+            return self._compressor.process(data) + self._compressor.flush()
+        if self.encoding == "zstd":
+            return self._compressor.compress(data) + self._compressor.flush(zstandard.COMPRESSOBJ_FLUSH_BLOCK)
+        return self._compressor.compress(data) + self._compressor.flush(zlib.Z_SYNC_FLUSH)
+
+    def finish(self) -> bytes:
+        if self.encoding == "br":
+            return self._compressor.finish()
+        return self._compressor.flush()
+
+class StreamDecompressor:
+    """Incremental gzip/zstd decompressor, the counterpart of StreamCompressor for backup sections"""
+    def __init__(self, encoding: str):
+        self.encoding = encoding
+        if encoding == "zstd":
+            if zstandard is None:
+                raise ValueError("zstd-compressed section, but the zstandard module is not installed")
+            self._decompressor = zstandard.ZstdDecompressor().decompressobj()
+        elif encoding == "gzip":
+            self._decompressor = zlib.decompressobj(wbits=31)
+        else:
+            raise ValueError(f"Unknown codec: {encoding}")
+
+    def decompress(self, data: bytes) -> bytes:
+        return self._decompressor.decompress(data)
+
+    def finish(self) -> bytes:
+        return self._decompressor.flush() if self.encoding == "gzip" else b""
+
+class CompressionMiddleware:
+    """Compress responses above a size threshold; responses that already carry a Content-Encoding pass through"""
+    def __init__(self, app, minimum_size: int = COMPRESSION_MINIMUM_SIZE):
+        self.app = app
+        self.minimum_size = minimum_size
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        encoding = choose_content_encoding(Headers(scope=scope).get("accept-encoding", ""))
+        if encoding is None:
+            await self.app(scope, receive, send)
+            return
+
+        start_message = None
+        compressor = None
+        passthrough = False
+
+        async def send_compressed(message):
+            nonlocal start_message, compressor, passthrough
+            if message["type"] == "http.response.start":
+                start_message = message
+                headers = Headers(raw=message["headers"])
+                content_type = headers.get("content-type", "")
+                passthrough = "content-encoding" in headers or content_type.startswith(SKIP_COMPRESSION_TYPES)
+                return
+            if message["type"] != "http.response.body":
+                await send(message)
+                return
+            if passthrough:
+                if start_message is not None:
+                    await send(start_message)
+                    start_message = None
+                await send(message)
+                return
+
+            body = message.get("body", b"")
+            more_body = message.get("more_body", False)
+            if start_message is not None:
+                headers = MutableHeaders(raw=start_message["headers"])
+                if not more_body and len(body) < self.minimum_size:
+                    # Small single-chunk responses are not worth compressing
+                    passthrough = True
+                    await send(start_message)
+                    start_message = None
+                    await send(message)
+                    return
+                compressor = StreamCompressor(encoding)
+                headers["Content-Encoding"] = encoding
+                headers.add_vary_header("Accept-Encoding")
+                if "content-length" in headers:
+                    del headers["Content-Length"]
+                if "etag" in headers and not headers["etag"].startswith("W/"):
+                    # The encoded bytes differ from the identity ones, so the strong validator becomes weak
+                    headers["ETag"] = "W/" + headers["etag"]
+                if not more_body:
+                    compressed = compressor.compress(body) + compressor.finish()
+                    headers["Content-Length"] = str(len(compressed))
+                    await send(start_message)
+                    start_message = None
+                    await send({"type": "http.response.body", "body": compressed})
+                    return
+                await send(start_message)
+                start_message = None
+
+            chunk = compressor.compress(body)
+            if not more_body:
+                chunk += compressor.finish()
+            await send({"type": "http.response.body", "body": chunk, "more_body": more_body})
+
+        await self.app(scope, receive, send_compressed)
+
+class PrecompressedPayload:
+    """JSON body serialized and compressed once, then served from memory for every request"""
+    def __init__(self, content: Any, version: str = ""):
+        self.body = dumps_json(content)
+        self.etag = f'"{version}{zlib.crc32(self.body):08x}-{len(self.body):x}"'
+        self.encoded = {"gzip": gzip.compress(self.body, compresslevel=9)}
+        if brotli is not None:
+            self.encoded["br"] = brotli.compress(self.body, quality=11)
+
+    def response(self, request: Request) -> Response:
+        """Pick the stored representation for this client (or 304 when its copy is current)"""
+        headers = {"ETag": self.etag, "Cache-Control": "no-cache", "Vary": "Accept-Encoding"}
+        if etag_matches(request, self.etag):
+            return Response(status_code=304, headers=headers)
+        encoding = choose_content_encoding(request.headers.get("accept-encoding", ""))
+        if encoding in self.encoded:
+            headers["Content-Encoding"] = encoding
+            return Response(content=self.encoded[encoding], media_type="application/json", headers=headers)
+        return Response(content=self.body, media_type="application/json", headers=headers)
+
+app.add_middleware(CompressionMiddleware)
+
+class MetricsMiddleware:
+    """Record count, latency, errors and Mongo round trips per route template (outermost, so compression is included)"""
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        status = 500
+        stats = RequestStats(scope)
+        token = _request_stats.set(stats)
+        start = time.perf_counter()
+
+        async def send_with_status(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_status)
+        except Exception:
+            status = 500
+            raise
+        finally:
+            duration = time.perf_counter() - start
+            _request_stats.reset(token)
+            # The router stores the matched route in the scope; unmatched paths share one label
+            template = stats.route
+            method = scope["method"]
+            http_requests_total.inc(method, template, str(status))
+            http_request_duration_seconds.observe(duration, method, template)
+            mongo_round_trips_per_request.observe(len(stats.commands), template)
+            for command_name in stats.commands:
+                mongo_route_commands_total.inc(template, command_name)
+            if status >= 500:
+                http_request_errors_total.inc(method, template)
+
+app.add_middleware(MetricsMiddleware)
+
+# On-demand profiling: a request carrying the PROFILING_SECRET runs under cProfile and its profile is kept on disk
+PROFILING_SECRET = os.environ.get('PROFILING_SECRET', '')
+PROFILE_DIR = Path(os.environ.get('PROFILE_DIR', str(ROOT_DIR / 'profiles')))
+PROFILE_RETAIN = int(os.environ.get('PROFILE_RETAIN', '50'))
+PROFILE_HEADER = "x-profile"  # header only: a query parameter would leave the secret in access logs and history
+PROFILE_MAX_DEPTH = 128  # collapsed stacks stop here, deep recursion would otherwise multiply the paths
+
+def collapsed_stacks(stats: pstats.Stats) -> List[str]:
+    """Flame-graph input ("caller;callee microseconds" lines) reconstructed from cProfile's caller/callee edges"""
+    def label(func) -> str:
+        filename, line, name = func
+        if filename == "~":
+            return name  # built-in
+        return f"{name} ({Path(filename).name}:{line})"
+
+    callees: Dict[Any, List[Tuple[Any, float]]] = {}
+    for func, (_, _, _, _, callers) in stats.stats.items():
+        for caller, (_, _, _, cumulative) in callers.items():
+            callees.setdefault(caller, []).append((func, cumulative))
+
+    totals: Dict[str, float] = {}
+
+    def walk(func, stack: Tuple[str, ...], seen: frozenset, time_here: float):
+        # Time spent in a function along this path is split in proportion to its overall self/cumulative time
+        _, _, own, cumulative, _ = stats.stats[func]
+        if cumulative <= 0 or time_here < 0.000001 or len(stack) >= PROFILE_MAX_DEPTH:
+            return
+        scale = min(1.0, time_here / cumulative)
+        stack = stack + (label(func),)
+        key = ";".join(stack)
+        totals[key] = totals.get(key, 0.0) + own * scale
+        for callee, edge in callees.get(func, []):
+            if callee not in seen and callee in stats.stats:
+                walk(callee, stack, seen | {callee}, edge * scale)
+
+    for func, (_, _, _, cumulative, callers) in stats.stats.items():
+        if not callers:
+            walk(func, (), frozenset({func}), cumulative)
+    return [f"{key} {round(seconds * 1_000_000)}" for key, seconds in totals.items() if seconds >= 0.000001]
+
+def save_profile(profile_id: str, profiler: cProfile.Profile, method: str, path: str, duration: float):
+    """Write <id>.pstats and <id>.collapsed, then drop the oldest profiles beyond PROFILE_RETAIN"""
+    PROFILE_DIR.mkdir(parents=True, exist_ok=True)
+    stats = pstats.Stats(profiler)
+    stats.dump_stats(str(PROFILE_DIR / f"{profile_id}.pstats"))
+    (PROFILE_DIR / f"{profile_id}.collapsed").write_text("\n".join(collapsed_stacks(stats)) + "\n", encoding="utf-8")
+    print(f"🔬 Profiled {method} {path} in {duration * 1000:.1f} ms: {PROFILE_DIR / profile_id}.pstats")
+
+    profiles = sorted(PROFILE_DIR.glob("*.pstats"), key=lambda file: file.stat().st_mtime)
+    for old in profiles[:max(0, len(profiles) - PROFILE_RETAIN)]:
+        old.unlink(missing_ok=True)
+        old.with_suffix(".collapsed").unlink(missing_ok=True)
+
+class ProfilingMiddleware:
+    """Run requests that present the profiling secret under cProfile and return the profile id in X-Profile-Id"""
+    # cProfile sees everything the event loop runs while it is enabled: one request is profiled at a time,
+    # and requests served concurrently with it show up in its profile
+    def __init__(self, app, secret: str):
+        self.app = app
+        self.secret = secret.encode("utf-8")
+        self._active = False
+
+    def requested(self, scope) -> bool:
+        token = Headers(scope=scope).get(PROFILE_HEADER)
+        return token is not None and hmac.compare_digest(token.encode("utf-8"), self.secret)
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not self.requested(scope):
+            await self.app(scope, receive, send)
+            return
+        if self._active:
+            async def send_busy(message):
+                if message["type"] == "http.response.start":
+                    MutableHeaders(raw=message["headers"])["X-Profile-Status"] = "busy"
+                await send(message)
+            await self.app(scope, receive, send_busy)
+            return
+
+        profile_id = f"{datetime.utcnow().strftime('%Y%m%dT%H%M%S')}-{secrets.token_hex(4)}"
+
+        async def send_with_id(message):
+            if message["type"] == "http.response.start":
+                MutableHeaders(raw=message["headers"])["X-Profile-Id"] = profile_id
+            await send(message)
+
+        profiler = cProfile.Profile()
+        self._active = True
+        start = time.perf_counter()
+        profiler.enable()
+        try:
+            await self.app(scope, receive, send_with_id)
+        finally:
+            profiler.disable()
+            self._active = False
+            duration = time.perf_counter() - start
+            try:
+                await asyncio.to_thread(save_profile, profile_id, profiler, scope["method"], scope["path"], duration)
+            except Exception as e:
+                logging.error(f"Saving profile {profile_id} failed: {e}")
+
+if PROFILING_SECRET:
+    # Without the secret the middleware isn't installed at all, so regular requests pay nothing
+    app.add_middleware(ProfilingMiddleware, secret=PROFILING_SECRET)
+
 # Models
 class Task(BaseModel):
     id: str = Field(default_factory=lambda: str(uuid.uuid4()))
@@ -98,6 +876,16 @@ class DailyStar(BaseModel):
     stars: int = Field(default=0)  # 0, 1, or 2
     week_start: datetime
 
+WEEK_DAYS = ["monday", "tuesday", "wednesday", "thursday", "friday", "saturday", "sunday"]
+
+class WeekStars(BaseModel):
+    """Stored star row: one task's week, a slot per weekday plus the cached row sum"""
+    id: str = Field(default_factory=lambda: str(uuid.uuid4()))
+    task_id: str
+    week_start: datetime
+    stars: List[int] = Field(default_factory=lambda: [0] * len(WEEK_DAYS))
+    total: int = Field(default=0)
+
 class WeeklyProgress(BaseModel):
     id: str = Field(default_factory=lambda: str(uuid.uuid4()))
     week_start: datetime
@@ -117,6 +905,7 @@ class Reward(BaseModel):
     required_stars: int
     is_claimed: bool = Field(default=False)
     claimed_at: Optional[datetime] = None
+    created_at: datetime = Field(default_factory=datetime.utcnow)
 
 class RewardCreate(BaseModel):
     name: str
@@ -128,6 +917,29 @@ class AddStarsRequest(BaseModel):
 class WithdrawStarsRequest(BaseModel):
     stars: int
 
+class StarCellUpdate(BaseModel):
+    task_id: str
+    day: str
+    stars: int
+
+class StarBatchUpdate(BaseModel):
+    cells: List[StarCellUpdate]
+
+class SyncMutation(BaseModel):
+    key: str  # client-generated idempotency key
+    type: str
+    payload: Dict[str, Any] = Field(default_factory=dict)
+
+class SyncMutationBatch(BaseModel):
+    mutations: List[SyncMutation]
+
+class CompletedPack(BaseModel):
+    pack: Dict[str, Any]  # the signed pack as it was served
+    answers: Dict[int, str] = Field(default_factory=dict)  # problem index -> answer
+
+class PackRedemption(BaseModel):
+    packs: List[CompletedPack]
+
 class MathProblem(BaseModel):
     id: str = Field(default_factory=lambda: str(uuid.uuid4()))
     question: str
@@ -143,7 +955,7 @@ class MathChallenge(BaseModel):
     grade: int  # 2 or 3
     problems: List[MathProblem]
     completed: bool = Field(default=False)
-    score: int = Field(default=0)
+    score: float = Field(default=0.0)
     stars_earned: int = Field(default=0)
     created_at: datetime = Field(default_factory=datetime.utcnow)
 
@@ -200,7 +1012,7 @@ class GermanChallenge(BaseModel):
     grade: int  # 2 or 3
     problems: List[GermanProblem]
     completed: bool = Field(default=False)
-    score: int = Field(default=0)
+    score: float = Field(default=0.0)
     stars_earned: int = Field(default=0)
     created_at: datetime = Field(default_factory=datetime.utcnow)
 
@@ -251,7 +1063,7 @@ class EnglishChallenge(BaseModel):
     grade: int  # 2 or 3
     problems: List[EnglishProblem]
     completed: bool = Field(default=False)
-    score: int = Field(default=0)
+    score: float = Field(default=0.0)
     stars_earned: int = Field(default=0)
     created_at: datetime = Field(default_factory=datetime.utcnow)
 
@@ -286,7 +1098,58 @@ class EnglishStatistics(BaseModel):
     problem_type_stats: Dict[str, Dict] = Field(default={})  # Stats per problem type
     last_updated: datetime = Field(default_factory=datetime.utcnow)
 
-async def generate_german_problems(grade: int, count: int = None) -> List[GermanProblem]:
+# Lightweight internal problem representation (serialized to the API models' shape only at the boundary)
+class ProblemRecord:
+    """Slotted problem produced by the generators; ids are assigned by position when a challenge is built"""
+    __slots__ = ("question", "question_type", "correct_answer", "options", "problem_data", "clock_data", "currency_data")
+    
+    def __init__(self, question: str, correct_answer: str, question_type: str = "text", options: Optional[List[str]] = None,
+                 problem_data: Optional[Dict] = None, clock_data: Optional[Dict] = None, currency_data: Optional[Dict] = None):
+        self.question = question
+        self.question_type = question_type
+        self.correct_answer = correct_answer
+        self.options = options
+        self.problem_data = problem_data
+        self.clock_data = clock_data
+        self.currency_data = currency_data
+    
+    def to_dict(self, index: int, fields: tuple) -> dict:
+        """Serialize to the given API model fields, using the position as the problem id"""
+        doc = {}
+        for field in fields:
+            if field == "id":
+                doc[field] = str(index)
+            else:
+                doc[field] = getattr(self, field, None)
+        return doc
+
+# Fields of the API problem models, in their declared order
+PROBLEM_FIELDS = {
+    "math": tuple(MathProblem.model_fields),
+    "german": tuple(GermanProblem.model_fields),
+    "english": tuple(EnglishProblem.model_fields)
+}
+
+def build_challenge_document(subject: str, grade: int, problems: List[ProblemRecord]) -> dict:
+    """Build the stored/returned challenge document directly from problem records"""
+    fields = PROBLEM_FIELDS[subject]
+    return {
+        "id": str(uuid.uuid4()),
+        "grade": grade,
+        "problems": [problem.to_dict(index, fields) for index, problem in enumerate(problems)],
+        "completed": False,
+        "score": 0.0,
+        "stars_earned": 0,
+        "created_at": datetime.utcnow()
+    }
+
+def construct_trusted_challenge(challenge_model, problem_model, doc: dict):
+    """Rebuild a challenge from a trusted DB document without re-running validation"""
+    challenge = challenge_model.model_construct(**doc)
+    challenge.problems = [problem_model.model_construct(**problem) for problem in doc.get("problems", [])]
+    return challenge
+
+async def generate_german_problems(grade: int, count: int = None) -> List[ProblemRecord]:
     """Generate AI-powered German language problems"""
     
     # Get German settings
@@ -302,35 +1165,7 @@ async def generate_german_problems(grade: int, count: int = None) -> List[German
         count = settings.problem_count
     
     # Generate mix of problems based on enabled types
-    problems = []
-    enabled_types = [k for k, v in settings.problem_types.items() if v]
-    
-    if not enabled_types:
-        enabled_types = ["spelling", "word_types", "fill_blank"]  # fallback
-    
-    problems_per_type = count // len(enabled_types)
-    remaining = count % len(enabled_types)
-    
-    for problem_type in enabled_types:
-        type_count = problems_per_type + (1 if remaining > 0 else 0)
-        remaining -= 1
-        
-        if problem_type == "spelling":
-            problems.extend(await generate_spelling_problems(type_count, grade, settings))
-        elif problem_type == "word_types":
-            problems.extend(await generate_word_type_problems(type_count, grade, settings))
-        elif problem_type == "fill_blank":
-            problems.extend(await generate_fill_blank_problems(type_count, grade, settings))
-        elif problem_type == "grammar":
-            problems.extend(await generate_grammar_problems(type_count, grade, settings))
-        elif problem_type == "articles":
-            problems.extend(await generate_article_problems(type_count, grade, settings))
-        elif problem_type == "sentence_order":
-            problems.extend(await generate_sentence_order_problems(type_count, grade, settings))
-    
-    # Shuffle the problems
-    random.shuffle(problems)
-    return problems[:count]
+    return await generate_planned_problems("german", grade, count, settings)
 
 def apply_spelling_difficulty_filter(word_list, difficulty):
     """Filter word list based on difficulty setting"""
@@ -389,7 +1224,7 @@ def apply_fill_blank_difficulty_filter(templates, difficulty, context_length="sh
         else:  # medium context
             return templates
 
-async def generate_spelling_problems(count: int, grade: int, settings: GermanSettings) -> List[GermanProblem]:
+async def generate_spelling_problems(count: int, grade: int, settings: GermanSettings) -> List[ProblemRecord]:
     """Generate German spelling problems using massively expanded content"""
     problems = []
     
@@ -435,7 +1270,7 @@ async def generate_spelling_problems(count: int, grade: int, settings: GermanSet
             
             random.shuffle(options)
             
-            problem = GermanProblem(
+            problem = ProblemRecord(
                 question=f"Welches Wort ist richtig geschrieben?",
                 question_type="spelling",
                 options=options,
@@ -736,7 +1571,7 @@ async def generate_spelling_problems(count: int, grade: int, settings: GermanSet
         options = [word_data["correct"]] + word_data["wrong"]
         random.shuffle(options)
         
-        problem = GermanProblem(
+        problem = ProblemRecord(
             question=f"Welches Wort ist richtig geschrieben?",
             question_type="spelling",
             options=options,
@@ -746,7 +1581,7 @@ async def generate_spelling_problems(count: int, grade: int, settings: GermanSet
     
     return problems
 
-async def generate_word_type_problems(count: int, grade: int, settings: GermanSettings) -> List[GermanProblem]:
+async def generate_word_type_problems(count: int, grade: int, settings: GermanSettings) -> List[ProblemRecord]:
     """Generate word type identification problems using massively expanded content"""
     problems = []
     
@@ -782,7 +1617,7 @@ async def generate_word_type_problems(count: int, grade: int, settings: GermanSe
         for i in range(min(count, len(shuffled_examples))):
             example = shuffled_examples[i]
             
-            problem = GermanProblem(
+            problem = ProblemRecord(
                 question=f'Welche Wortart ist das unterstrichene Wort?\n\nSatz: "{example["sentence"]}"\nWort: "{example["word"]}"',
                 question_type="word_types",
                 options=example["options"],
@@ -865,7 +1700,7 @@ async def generate_word_type_problems(count: int, grade: int, settings: GermanSe
     for i in range(min(count, len(shuffled_examples))):
         example = shuffled_examples[i]
         
-        problem = GermanProblem(
+        problem = ProblemRecord(
             question=f'Welche Wortart ist das unterstrichene Wort?\n\nSatz: "{example["sentence"]}"\nWort: "{example["word"]}"',
             question_type="word_types",
             options=example["options"],
@@ -876,7 +1711,7 @@ async def generate_word_type_problems(count: int, grade: int, settings: GermanSe
     
     return problems
 
-async def generate_fill_blank_problems(count: int, grade: int, settings: GermanSettings) -> List[GermanProblem]:
+async def generate_fill_blank_problems(count: int, grade: int, settings: GermanSettings) -> List[ProblemRecord]:
     """Generate fill-in-the-blank problems using massively expanded content"""
     problems = []
     
@@ -912,7 +1747,7 @@ async def generate_fill_blank_problems(count: int, grade: int, settings: GermanS
         for i in range(min(count, len(shuffled_templates))):
             template = shuffled_templates[i]
             
-            problem = GermanProblem(
+            problem = ProblemRecord(
                 question=f"Setze das richtige Wort ein:\n\n{template['text']}",
                 question_type="fill_blank",
                 options=template["options"],
@@ -938,7 +1773,7 @@ async def generate_fill_blank_problems(count: int, grade: int, settings: GermanS
     for i in range(min(count, len(shuffled_templates))):
         template = shuffled_templates[i]
         
-        problem = GermanProblem(
+        problem = ProblemRecord(
             question=f"Setze das richtige Wort ein:\n\n{template['text']}",
             question_type="fill_blank",
             options=template["options"],
@@ -949,30 +1784,30 @@ async def generate_fill_blank_problems(count: int, grade: int, settings: GermanS
     
     return problems
 
-async def generate_grammar_problems(count: int, grade: int, settings: GermanSettings) -> List[GermanProblem]:
+GERMAN_GRAMMAR_GRADE2 = [
+    {"question": "Wie lautet die Mehrzahl von 'Hund'?", "answer": "Hunde", "options": ["Hunde", "Hunds", "Hunden"]},
+    {"question": "Welcher Artikel gehört zu 'Haus'?", "answer": "das", "options": ["der", "die", "das"]},
+    {"question": "Wie lautet die Mehrzahl von 'Kind'?", "answer": "Kinder", "options": ["Kinder", "Kinds", "Kindern"]},
+    {"question": "Welcher Artikel gehört zu 'Schule'?", "answer": "die", "options": ["der", "die", "das"]}
+]
+
+GERMAN_GRAMMAR_GRADE3 = [
+    {"question": "Welche Zeitform ist das: 'Ich bin gelaufen'?", "answer": "Perfekt", "options": ["Präsens", "Perfekt", "Präteritum"]},
+    {"question": "Wie lautet die erste Person Singular von 'gehen' im Präteritum?", "answer": "ging", "options": ["gehe", "ging", "gegangen"]},
+    {"question": "Welcher Fall ist 'dem Hund' (dem Hund geben)?", "answer": "Dativ", "options": ["Nominativ", "Akkusativ", "Dativ"]},
+    {"question": "Wie lautet die Steigerung von 'gut'?", "answer": "besser", "options": ["guter", "besser", "gutster"]}
+]
+
+async def generate_grammar_problems(count: int, grade: int, settings: GermanSettings) -> List[ProblemRecord]:
     """Generate basic grammar problems"""
     problems = []
     
-    grade2_grammar = [
-        {"question": "Wie lautet die Mehrzahl von 'Hund'?", "answer": "Hunde", "options": ["Hunde", "Hunds", "Hunden"]},
-        {"question": "Welcher Artikel gehört zu 'Haus'?", "answer": "das", "options": ["der", "die", "das"]},
-        {"question": "Wie lautet die Mehrzahl von 'Kind'?", "answer": "Kinder", "options": ["Kinder", "Kinds", "Kindern"]},
-        {"question": "Welcher Artikel gehört zu 'Schule'?", "answer": "die", "options": ["der", "die", "das"]}
-    ]
-    
-    grade3_grammar = [
-        {"question": "Welche Zeitform ist das: 'Ich bin gelaufen'?", "answer": "Perfekt", "options": ["Präsens", "Perfekt", "Präteritum"]},
-        {"question": "Wie lautet die erste Person Singular von 'gehen' im Präteritum?", "answer": "ging", "options": ["gehe", "ging", "gegangen"]},
-        {"question": "Welcher Fall ist 'dem Hund' (dem Hund geben)?", "answer": "Dativ", "options": ["Nominativ", "Akkusativ", "Dativ"]},
-        {"question": "Wie lautet die Steigerung von 'gut'?", "answer": "besser", "options": ["guter", "besser", "gutster"]}
-    ]
-    
-    grammar_list = grade2_grammar if grade == 2 else grade3_grammar
+    grammar_list = GERMAN_GRAMMAR_GRADE2 if grade == 2 else GERMAN_GRAMMAR_GRADE3
     
     for i in range(min(count, len(grammar_list))):
         grammar = random.choice(grammar_list)
         
-        problem = GermanProblem(
+        problem = ProblemRecord(
             question=grammar["question"],
             question_type="grammar",
             options=grammar["options"],
@@ -982,25 +1817,25 @@ async def generate_grammar_problems(count: int, grade: int, settings: GermanSett
     
     return problems
 
-async def generate_article_problems(count: int, grade: int, settings: GermanSettings) -> List[GermanProblem]:
+GERMAN_ARTICLE_WORDS = [
+    {"word": "Baum", "article": "der"},
+    {"word": "Blume", "article": "die"},
+    {"word": "Haus", "article": "das"},
+    {"word": "Auto", "article": "das"},
+    {"word": "Katze", "article": "die"},
+    {"word": "Hund", "article": "der"},
+    {"word": "Schule", "article": "die"},
+    {"word": "Buch", "article": "das"}
+]
+
+async def generate_article_problems(count: int, grade: int, settings: GermanSettings) -> List[ProblemRecord]:
     """Generate article identification problems"""
     problems = []
     
-    article_words = [
-        {"word": "Baum", "article": "der"},
-        {"word": "Blume", "article": "die"},
-        {"word": "Haus", "article": "das"},
-        {"word": "Auto", "article": "das"},
-        {"word": "Katze", "article": "die"},
-        {"word": "Hund", "article": "der"},
-        {"word": "Schule", "article": "die"},
-        {"word": "Buch", "article": "das"}
-    ]
-    
-    for i in range(min(count, len(article_words))):
-        word_data = random.choice(article_words)
+    for i in range(min(count, len(GERMAN_ARTICLE_WORDS))):
+        word_data = random.choice(GERMAN_ARTICLE_WORDS)
         
-        problem = GermanProblem(
+        problem = ProblemRecord(
             question=f"Welcher Artikel gehört zu '{word_data['word']}'?",
             question_type="articles",
             options=["der", "die", "das"],
@@ -1010,48 +1845,143 @@ async def generate_article_problems(count: int, grade: int, settings: GermanSett
     
     return problems
 
-async def generate_sentence_order_problems(count: int, grade: int, settings: GermanSettings) -> List[GermanProblem]:
-    """Generate sentence ordering problems"""
-    problems = []
+# Sentence order index: built once per grade from the existing sentence corpora
+_SENTENCE_ORDER_INDEX: Dict[int, List[tuple]] = {}
+_SENTENCE_TOKEN_PATTERN = re.compile(r"[^\W_]+(?:-[^\W_]+)*")
+
+def tokenize_sentence(sentence: str) -> tuple:
+    """Split a sentence into its words, ignoring punctuation and extra whitespace"""
+    return tuple(_SENTENCE_TOKEN_PATTERN.findall(sentence))
+
+def scramble_sentence_tokens(tokens: tuple) -> Optional[tuple]:
+    """Deterministically scramble tokens so the result never matches the original order"""
+    if len(set(tokens)) < 2:
+        return None
+    
+    # Seed from the sentence itself so the same sentence always scrambles the same way
+    rng = random.Random(zlib.crc32(" ".join(tokens).encode("utf-8")))
+    scrambled = list(tokens)
+    rng.shuffle(scrambled)
+    
+    # Rotate until the order differs (only needed if the shuffle returned the original)
+    for _ in range(len(tokens)):
+        if tuple(scrambled) != tokens:
+            return tuple(scrambled)
+        scrambled = scrambled[1:] + scrambled[:1]
+    return None
+
+def sentence_order_puzzle_tokens(tokens: tuple, capitalized_words: set) -> tuple:
+    """Tokens as they are shown scrambled: the first word lowercased so its capital letter doesn't mark the start,
+    unless the corpus also capitalizes it mid-sentence (a noun or a name)"""
+    first = tokens[0]
+    if first in capitalized_words:
+        return tokens
+    return (first.lower(),) + tokens[1:]
+
+def index_sentence_order(sentences: List[str]) -> List[tuple]:
+    """Tokenize and pre-scramble sentences into (sentence, tokens, scrambled) entries, skipping duplicates"""
+    tokenized = [(" ".join(sentence.split()), tokenize_sentence(sentence)) for sentence in sentences]
+    capitalized_words = {token for _, tokens in tokenized for token in tokens[1:] if token[:1].isupper()}
+    
+    index = []
+    seen = set()
+    for sentence, tokens in tokenized:
+        key = tuple(token.casefold() for token in tokens)
+        if key in seen or not 3 <= len(tokens) <= 10:
+            continue
+        # Tokens carry no punctuation, so the final period doesn't mark the end either
+        scrambled = scramble_sentence_tokens(sentence_order_puzzle_tokens(tokens, capitalized_words))
+        if scrambled is None:
+            continue
+        seen.add(key)
+        index.append((sentence, tokens, scrambled))
+    return index
+
+def build_sentence_order_index(grade: int) -> List[tuple]:
+    """Collect, tokenize and pre-scramble all corpus sentences usable for a grade"""
+    sentences = []
+    try:
+        if grade == 2:
+            from german_content_complete import GRADE2_WORD_TYPES_COMPLETE, GRADE2_FILL_BLANK_COMPLETE
+            from english_content_expanded import ENGLISH_SENTENCES_BASIC
+            word_types, fill_blanks, translations = GRADE2_WORD_TYPES_COMPLETE, GRADE2_FILL_BLANK_COMPLETE, ENGLISH_SENTENCES_BASIC
+        else:
+            from german_grade3_content import GRADE3_WORD_TYPES_COMPLETE, GRADE3_FILL_BLANK_COMPLETE
+            from english_content_expanded import ENGLISH_SENTENCES_INTERMEDIATE
+            word_types, fill_blanks, translations = GRADE3_WORD_TYPES_COMPLETE, GRADE3_FILL_BLANK_COMPLETE, ENGLISH_SENTENCES_INTERMEDIATE
+        
+        sentences.extend(example["sentence"] for example in word_types)
+        sentences.extend(template["text"].replace("___", template["answer"]) for template in fill_blanks)
+        sentences.extend(sentence["german"] for sentence in translations)
+    except ImportError:
+        # Fallback to the original small set if imports fail
+        sentences = [
+            "Der Hund bellt laut.",
+            "Mama kocht das Essen.",
+            "Wir gehen zur Schule.",
+            "Das Auto fährt schnell."
+        ]
     
-    sentence_parts = [
-        {"correct": "Der Hund bellt laut.", "scrambled": ["bellt", "Der", "laut", "Hund"]},
-        {"correct": "Mama kocht das Essen.", "scrambled": ["kocht", "Essen", "Mama", "das"]},
-        {"correct": "Wir gehen zur Schule.", "scrambled": ["gehen", "Schule", "Wir", "zur"]},
-        {"correct": "Das Auto fährt schnell.", "scrambled": ["fährt", "Auto", "Das", "schnell"]}
-    ]
+    return index_sentence_order(sentences)
+
+def get_sentence_order_index(grade: int) -> List[tuple]:
+    """Return the cached sentence order index for a grade, building it on first use"""
+    index = _SENTENCE_ORDER_INDEX.get(grade)
+    if index is None:
+        index = build_sentence_order_index(grade)
+        _SENTENCE_ORDER_INDEX[grade] = index
+    return index
+
+def get_sentence_order_candidates(grade: int, settings: GermanSettings) -> List[tuple]:
+    """Index entries the difficulty setting allows (by sentence length); the whole index if none fit"""
+    index = get_sentence_order_index(grade)
+    difficulty = settings.difficulty_settings.get("spelling_difficulty", "medium")
+    if difficulty == "easy":
+        candidates = [entry for entry in index if len(entry[1]) <= 5]
+    elif difficulty == "hard":
+        candidates = [entry for entry in index if len(entry[1]) >= 6]
+    else:  # medium
+        candidates = index
+    return candidates or index
+
+def normalize_sentence_answer(sentence: str) -> tuple:
+    """Normalize a sentence answer for order-aware comparison (case, whitespace and punctuation insensitive)"""
+    return tuple(token.casefold() for token in tokenize_sentence(sentence))
+
+async def generate_sentence_order_problems(count: int, grade: int, settings: GermanSettings) -> List[ProblemRecord]:
+    """Generate sentence ordering problems from the pre-tokenized sentence index"""
+    problems = []
     
-    for i in range(min(count, len(sentence_parts))):
-        sentence = random.choice(sentence_parts)
-        
-        problem = GermanProblem(
-            question=f"Bringe die Wörter in die richtige Reihenfolge:\n{' - '.join(sentence['scrambled'])}",
+    candidates = get_sentence_order_candidates(grade, settings)
+    for sentence, tokens, scrambled in random.sample(candidates, min(count, len(candidates))):
+        problem = ProblemRecord(
+            question=f"Bringe die Wörter in die richtige Reihenfolge:\n{' - '.join(scrambled)}",
             question_type="sentence_order",
-            correct_answer=sentence["correct"],
-            problem_data={"scrambled_words": sentence["scrambled"]}
+            correct_answer=sentence,
+            problem_data={"scrambled_words": list(scrambled)}
         )
         problems.append(problem)
     
     return problems
 
 # AI-powered German problem generation functions
-async def generate_ai_spelling_problems(count: int, grade: int, settings: GermanSettings) -> List[GermanProblem]:
+async def generate_ai_spelling_problems(count: int, grade: int, settings: GermanSettings) -> List[ProblemRecord]:
     """Generate AI spelling problems using static fallback content"""
     # For external deployment, use fallback content only
     return await generate_spelling_problems(count, grade, settings)
 
-async def generate_ai_word_type_problems(count: int, grade: int, settings: GermanSettings) -> List[GermanProblem]:
+async def generate_ai_word_type_problems(count: int, grade: int, settings: GermanSettings) -> List[ProblemRecord]:
     """Generate AI word type problems using static fallback content"""
     # For external deployment, use fallback content only
     return await generate_word_type_problems(count, grade, settings)
 
-async def generate_ai_fill_blank_problems(count: int, grade: int, settings: GermanSettings) -> List[GermanProblem]:
+async def generate_ai_fill_blank_problems(count: int, grade: int, settings: GermanSettings) -> List[ProblemRecord]:
     """Generate AI fill blank problems using static fallback content"""
     # For external deployment, use fallback content only
     return await generate_fill_blank_problems(count, grade, settings)
 
 # English Challenge Generation Functions
-async def generate_english_problems(grade: int, count: int = None) -> List[EnglishProblem]:
+async def generate_english_problems(grade: int, count: int = None) -> List[ProblemRecord]:
     """Generate AI-powered English language problems"""
     
     # Get English settings
@@ -1067,37 +1997,9 @@ async def generate_english_problems(grade: int, count: int = None) -> List[Engli
         count = settings.problem_count
     
     # Generate mix of problems based on enabled types
-    problems = []
-    enabled_types = [k for k, v in settings.problem_types.items() if v]
-    
-    if not enabled_types:
-        enabled_types = ["vocabulary_de_en", "vocabulary_en_de", "simple_sentences"]  # fallback
-    
-    problems_per_type = count // len(enabled_types)
-    remaining = count % len(enabled_types)
-    
-    for problem_type in enabled_types:
-        type_count = problems_per_type + (1 if remaining > 0 else 0)
-        remaining -= 1
-        
-        if problem_type == "vocabulary_de_en":
-            problems.extend(await generate_vocabulary_de_en_problems(type_count, grade, settings))
-        elif problem_type == "vocabulary_en_de":
-            problems.extend(await generate_vocabulary_en_de_problems(type_count, grade, settings))
-        elif problem_type == "simple_sentences":
-            problems.extend(await generate_simple_sentence_problems(type_count, grade, settings))
-        elif problem_type == "basic_grammar":
-            problems.extend(await generate_basic_grammar_problems(type_count, grade, settings))
-        elif problem_type == "colors_numbers":
-            problems.extend(await generate_colors_numbers_problems(type_count, grade, settings))
-        elif problem_type == "animals_objects":
-            problems.extend(await generate_animals_objects_problems(type_count, grade, settings))
-    
-    # Shuffle the problems
-    random.shuffle(problems)
-    return problems[:count]
+    return await generate_planned_problems("english", grade, count, settings)
 
-async def generate_vocabulary_de_en_problems(count: int, grade: int, settings: EnglishSettings) -> List[EnglishProblem]:
+async def generate_vocabulary_de_en_problems(count: int, grade: int, settings: EnglishSettings) -> List[ProblemRecord]:
     """Generate German to English vocabulary problems using massively expanded content"""
     problems = []
     
@@ -1311,7 +2213,7 @@ async def generate_vocabulary_de_en_problems(count: int, grade: int, settings: E
         options = [vocab_item["english"]] + wrong_answers
         random.shuffle(options)
         
-        problem = EnglishProblem(
+        problem = ProblemRecord(
             question=f"Was bedeutet '{vocab_item['german']}' auf Englisch?",
             question_type="vocabulary_de_en",
             options=options,
@@ -1325,7 +2227,113 @@ async def generate_vocabulary_de_en_problems(count: int, grade: int, settings: E
     
     return problems
 
-async def generate_vocabulary_en_de_problems(count: int, grade: int, settings: EnglishSettings) -> List[EnglishProblem]:
+ENGLISH_EN_DE_VOCABULARY_GRADE2 = [
+    {"german": "Hund", "english": "dog", "wrong": ["Katze", "Vogel", "Fisch"]},
+    {"german": "Katze", "english": "cat", "wrong": ["Hund", "Maus", "Vogel"]},
+    {"german": "Auto", "english": "car", "wrong": ["Bus", "Zug", "Fahrrad"]},
+    {"german": "Haus", "english": "house", "wrong": ["Baum", "Auto", "Buch"]},
+    {"german": "Baum", "english": "tree", "wrong": ["Blume", "Gras", "Haus"]},
+    {"german": "Wasser", "english": "water", "wrong": ["Milch", "Saft", "Tee"]},
+    {"german": "Brot", "english": "bread", "wrong": ["Kuchen", "Apfel", "Käse"]},
+    {"german": "Apfel", "english": "apple", "wrong": ["Banane", "Orange", "Traube"]},
+    {"german": "Schule", "english": "school", "wrong": ["Haus", "Park", "Laden"]},
+    {"german": "Buch", "english": "book", "wrong": ["Stift", "Papier", "Tisch"]},
+    {"german": "rot", "english": "red", "wrong": ["blau", "grün", "gelb"]},
+    {"german": "blau", "english": "blue", "wrong": ["rot", "grün", "schwarz"]},
+    {"german": "groß", "english": "big", "wrong": ["klein", "lang", "schnell"]},
+    {"german": "klein", "english": "small", "wrong": ["groß", "hoch", "breit"]},
+    {"german": "gut", "english": "good", "wrong": ["schlecht", "schnell", "langsam"]},
+    {"german": "Ball", "english": "ball", "wrong": ["Spielzeug", "Spiel", "Stock"]},
+    {"german": "Mama", "english": "mom", "wrong": ["Papa", "Schwester", "Bruder"]},
+    {"german": "Papa", "english": "dad", "wrong": ["Mama", "Onkel", "Opa"]},
+    {"german": "Kind", "english": "child", "wrong": ["Erwachsener", "Baby", "Eltern"]},
+    {"german": "Freund", "english": "friend", "wrong": ["Feind", "Lehrer", "Arzt"]},
+    {"german": "Sonne", "english": "sun", "wrong": ["Mond", "Stern", "Wolke"]},
+    {"german": "Mond", "english": "moon", "wrong": ["Sonne", "Stern", "Planet"]},
+    {"german": "Blume", "english": "flower", "wrong": ["Baum", "Gras", "Blatt"]},
+    {"german": "Vogel", "english": "bird", "wrong": ["Fisch", "Katze", "Hund"]},
+    {"german": "Fisch", "english": "fish", "wrong": ["Vogel", "Katze", "Maus"]},
+    {"german": "Maus", "english": "mouse", "wrong": ["Katze", "Hund", "Vogel"]},
+    {"german": "Tür", "english": "door", "wrong": ["Fenster", "Wand", "Dach"]},
+    {"german": "Fenster", "english": "window", "wrong": ["Tür", "Wand", "Boden"]},
+    {"german": "Tisch", "english": "table", "wrong": ["Stuhl", "Bett", "Sofa"]},
+    {"german": "Stuhl", "english": "chair", "wrong": ["Tisch", "Bett", "Lampe"]},
+    {"german": "warm", "english": "warm", "wrong": ["kalt", "heiß", "kühl"]},
+    {"german": "kalt", "english": "cold", "wrong": ["warm", "heiß", "kühl"]},
+    {"german": "schnell", "english": "fast", "wrong": ["langsam", "groß", "klein"]},
+    {"german": "langsam", "english": "slow", "wrong": ["schnell", "rasch", "eilig"]},
+    {"german": "neu", "english": "new", "wrong": ["alt", "gebraucht", "kaputt"]},
+    {"german": "alt", "english": "old", "wrong": ["neu", "jung", "frisch"]},
+    {"german": "glücklich", "english": "happy", "wrong": ["traurig", "wütend", "müde"]},
+    {"german": "traurig", "english": "sad", "wrong": ["glücklich", "froh", "fröhlich"]},
+    {"german": "Milch", "english": "milk", "wrong": ["Wasser", "Saft", "Tee"]},
+    {"german": "Käse", "english": "cheese", "wrong": ["Brot", "Butter", "Fleisch"]},
+    {"german": "Ei", "english": "egg", "wrong": ["Huhn", "Milch", "Brot"]},
+    {"german": "Fleisch", "english": "meat", "wrong": ["Brot", "Obst", "Gemüse"]},
+    {"german": "Gemüse", "english": "vegetable", "wrong": ["Obst", "Fleisch", "Brot"]},
+    {"german": "Obst", "english": "fruit", "wrong": ["Gemüse", "Fleisch", "Brot"]},
+    {"german": "Banane", "english": "banana", "wrong": ["Apfel", "Orange", "Traube"]},
+    {"german": "Orange", "english": "orange", "wrong": ["Apfel", "Banane", "Zitrone"]},
+    {"german": "Zitrone", "english": "lemon", "wrong": ["Orange", "Apfel", "Limette"]},
+    {"german": "Traube", "english": "grape", "wrong": ["Beere", "Kirsche", "Pflaume"]},
+    {"german": "Kirsche", "english": "cherry", "wrong": ["Traube", "Beere", "Pflaume"]},
+    {"german": "Erdbeere", "english": "strawberry", "wrong": ["Kirsche", "Traube", "Beere"]},
+    {"german": "Familie", "english": "family", "wrong": ["Freunde", "Leute", "Gruppe"]},
+    {"german": "Bruder", "english": "brother", "wrong": ["Schwester", "Cousin", "Freund"]},
+    {"german": "Schwester", "english": "sister", "wrong": ["Bruder", "Cousine", "Freundin"]},
+    {"german": "Oma", "english": "grandma", "wrong": ["Mama", "Tante", "Schwester"]},
+    {"german": "Opa", "english": "grandpa", "wrong": ["Papa", "Onkel", "Bruder"]},
+    {"german": "Tante", "english": "aunt", "wrong": ["Mama", "Schwester", "Cousine"]},
+    {"german": "Onkel", "english": "uncle", "wrong": ["Papa", "Bruder", "Cousin"]},
+    {"german": "Baby", "english": "baby", "wrong": ["Kind", "Erwachsener", "Teenager"]},
+    {"german": "Junge", "english": "boy", "wrong": ["Mädchen", "Mann", "Kind"]},
+    {"german": "Mädchen", "english": "girl", "wrong": ["Junge", "Frau", "Kind"]},
+    {"german": "Mann", "english": "man", "wrong": ["Frau", "Junge", "Person"]},
+    {"german": "Frau", "english": "woman", "wrong": ["Mann", "Mädchen", "Person"]},
+    {"german": "Tier", "english": "animal", "wrong": ["Pflanze", "Person", "Ding"]},
+    {"german": "Pferd", "english": "horse", "wrong": ["Kuh", "Schwein", "Schaf"]},
+    {"german": "Kuh", "english": "cow", "wrong": ["Pferd", "Schwein", "Ziege"]},
+    {"german": "Schwein", "english": "pig", "wrong": ["Kuh", "Pferd", "Schaf"]},
+    {"german": "Schaf", "english": "sheep", "wrong": ["Ziege", "Kuh", "Schwein"]},
+    {"german": "Ziege", "english": "goat", "wrong": ["Schaf", "Kuh", "Pferd"]},
+    {"german": "Hase", "english": "rabbit", "wrong": ["Maus", "Katze", "Hamster"]},
+    {"german": "Hamster", "english": "hamster", "wrong": ["Maus", "Hase", "Ratte"]},
+    {"german": "eins", "english": "one", "wrong": ["zwei", "drei", "vier"]},
+    {"german": "zwei", "english": "two", "wrong": ["eins", "drei", "vier"]},
+    {"german": "drei", "english": "three", "wrong": ["zwei", "vier", "fünf"]},
+    {"german": "vier", "english": "four", "wrong": ["drei", "fünf", "sechs"]},
+    {"german": "fünf", "english": "five", "wrong": ["vier", "sechs", "sieben"]},
+    {"german": "sechs", "english": "six", "wrong": ["fünf", "sieben", "acht"]},
+    {"german": "sieben", "english": "seven", "wrong": ["sechs", "acht", "neun"]},
+    {"german": "acht", "english": "eight", "wrong": ["sieben", "neun", "zehn"]},
+    {"german": "neun", "english": "nine", "wrong": ["acht", "zehn", "elf"]},
+    {"german": "zehn", "english": "ten", "wrong": ["neun", "elf", "zwölf"]}
+]
+
+ENGLISH_EN_DE_VOCABULARY_GRADE3 = [
+    {"german": "Wissenschaft", "english": "science", "wrong": ["Kunst", "Geschichte", "Musik"]},
+    {"german": "Experiment", "english": "experiment", "wrong": ["Test", "Spiel", "Lektion"]},
+    {"german": "Forschung", "english": "research", "wrong": ["Studium", "Hausaufgabe", "Projekt"]},
+    {"german": "Entdeckung", "english": "discovery", "wrong": ["Erfindung", "Schöpfung", "Fund"]},
+    {"german": "Erfindung", "english": "invention", "wrong": ["Entdeckung", "Schöpfung", "Idee"]},
+    {"german": "Technologie", "english": "technology", "wrong": ["Wissenschaft", "Computer", "Maschine"]},
+    {"german": "Computer", "english": "computer", "wrong": ["Fernseher", "Radio", "Telefon"]},
+    {"german": "Internet", "english": "internet", "wrong": ["Computer", "Website", "E-Mail"]},
+    {"german": "Programm", "english": "program", "wrong": ["Computer", "Software", "Spiel"]},
+    {"german": "Software", "english": "software", "wrong": ["Hardware", "Computer", "Programm"]},
+    {"german": "Roboter", "english": "robot", "wrong": ["Maschine", "Computer", "Android"]},
+    {"german": "Maschine", "english": "machine", "wrong": ["Roboter", "Werkzeug", "Gerät"]},
+    {"german": "Werkzeug", "english": "tool", "wrong": ["Maschine", "Instrument", "Gerät"]},
+    {"german": "Instrument", "english": "instrument", "wrong": ["Werkzeug", "Gerät", "Maschine"]},
+    {"german": "Gerät", "english": "device", "wrong": ["Maschine", "Werkzeug", "Gadget"]},
+    {"german": "Energie", "english": "energy", "wrong": ["Kraft", "Elektrizität", "Brennstoff"]},
+    {"german": "Elektrizität", "english": "electricity", "wrong": ["Energie", "Kraft", "Batterie"]},
+    {"german": "Batterie", "english": "battery", "wrong": ["Elektrizität", "Kraft", "Energie"]},
+    {"german": "Motor", "english": "engine", "wrong": ["Maschine", "Motor", "Gerät"]},
+    {"german": "Fahrzeug", "english": "vehicle", "wrong": ["Auto", "Transport", "Maschine"]}
+]
+
+async def generate_vocabulary_en_de_problems(count: int, grade: int, settings: EnglishSettings) -> List[ProblemRecord]:
     """Generate English to German vocabulary problems"""
     problems = []
     
@@ -1340,113 +2348,7 @@ async def generate_vocabulary_en_de_problems(count: int, grade: int, settings: E
         logging.error(f"AI vocabulary EN->DE generation failed: {e}")
     
     # Use same vocabulary list but reverse the question
-    grade2_vocabulary = [
-        {"german": "Hund", "english": "dog", "wrong": ["Katze", "Vogel", "Fisch"]},
-        {"german": "Katze", "english": "cat", "wrong": ["Hund", "Maus", "Vogel"]},
-        {"german": "Auto", "english": "car", "wrong": ["Bus", "Zug", "Fahrrad"]},
-        {"german": "Haus", "english": "house", "wrong": ["Baum", "Auto", "Buch"]},
-        {"german": "Baum", "english": "tree", "wrong": ["Blume", "Gras", "Haus"]},
-        {"german": "Wasser", "english": "water", "wrong": ["Milch", "Saft", "Tee"]},
-        {"german": "Brot", "english": "bread", "wrong": ["Kuchen", "Apfel", "Käse"]},
-        {"german": "Apfel", "english": "apple", "wrong": ["Banane", "Orange", "Traube"]},
-        {"german": "Schule", "english": "school", "wrong": ["Haus", "Park", "Laden"]},
-        {"german": "Buch", "english": "book", "wrong": ["Stift", "Papier", "Tisch"]},
-        {"german": "rot", "english": "red", "wrong": ["blau", "grün", "gelb"]},
-        {"german": "blau", "english": "blue", "wrong": ["rot", "grün", "schwarz"]},
-        {"german": "groß", "english": "big", "wrong": ["klein", "lang", "schnell"]},
-        {"german": "klein", "english": "small", "wrong": ["groß", "hoch", "breit"]},
-        {"german": "gut", "english": "good", "wrong": ["schlecht", "schnell", "langsam"]},
-        {"german": "Ball", "english": "ball", "wrong": ["Spielzeug", "Spiel", "Stock"]},
-        {"german": "Mama", "english": "mom", "wrong": ["Papa", "Schwester", "Bruder"]},
-        {"german": "Papa", "english": "dad", "wrong": ["Mama", "Onkel", "Opa"]},
-        {"german": "Kind", "english": "child", "wrong": ["Erwachsener", "Baby", "Eltern"]},
-        {"german": "Freund", "english": "friend", "wrong": ["Feind", "Lehrer", "Arzt"]},
-        {"german": "Sonne", "english": "sun", "wrong": ["Mond", "Stern", "Wolke"]},
-        {"german": "Mond", "english": "moon", "wrong": ["Sonne", "Stern", "Planet"]},
-        {"german": "Blume", "english": "flower", "wrong": ["Baum", "Gras", "Blatt"]},
-        {"german": "Vogel", "english": "bird", "wrong": ["Fisch", "Katze", "Hund"]},
-        {"german": "Fisch", "english": "fish", "wrong": ["Vogel", "Katze", "Maus"]},
-        {"german": "Maus", "english": "mouse", "wrong": ["Katze", "Hund", "Vogel"]},
-        {"german": "Tür", "english": "door", "wrong": ["Fenster", "Wand", "Dach"]},
-        {"german": "Fenster", "english": "window", "wrong": ["Tür", "Wand", "Boden"]},
-        {"german": "Tisch", "english": "table", "wrong": ["Stuhl", "Bett", "Sofa"]},
-        {"german": "Stuhl", "english": "chair", "wrong": ["Tisch", "Bett", "Lampe"]},
-        {"german": "warm", "english": "warm", "wrong": ["kalt", "heiß", "kühl"]},
-        {"german": "kalt", "english": "cold", "wrong": ["warm", "heiß", "kühl"]},
-        {"german": "schnell", "english": "fast", "wrong": ["langsam", "groß", "klein"]},
-        {"german": "langsam", "english": "slow", "wrong": ["schnell", "rasch", "eilig"]},
-        {"german": "neu", "english": "new", "wrong": ["alt", "gebraucht", "kaputt"]},
-        {"german": "alt", "english": "old", "wrong": ["neu", "jung", "frisch"]},
-        {"german": "glücklich", "english": "happy", "wrong": ["traurig", "wütend", "müde"]},
-        {"german": "traurig", "english": "sad", "wrong": ["glücklich", "froh", "fröhlich"]},
-        {"german": "Milch", "english": "milk", "wrong": ["Wasser", "Saft", "Tee"]},
-        {"german": "Käse", "english": "cheese", "wrong": ["Brot", "Butter", "Fleisch"]},
-        {"german": "Ei", "english": "egg", "wrong": ["Huhn", "Milch", "Brot"]},
-        {"german": "Fleisch", "english": "meat", "wrong": ["Brot", "Obst", "Gemüse"]},
-        {"german": "Gemüse", "english": "vegetable", "wrong": ["Obst", "Fleisch", "Brot"]},
-        {"german": "Obst", "english": "fruit", "wrong": ["Gemüse", "Fleisch", "Brot"]},
-        {"german": "Banane", "english": "banana", "wrong": ["Apfel", "Orange", "Traube"]},
-        {"german": "Orange", "english": "orange", "wrong": ["Apfel", "Banane", "Zitrone"]},
-        {"german": "Zitrone", "english": "lemon", "wrong": ["Orange", "Apfel", "Limette"]},
-        {"german": "Traube", "english": "grape", "wrong": ["Beere", "Kirsche", "Pflaume"]},
-        {"german": "Kirsche", "english": "cherry", "wrong": ["Traube", "Beere", "Pflaume"]},
-        {"german": "Erdbeere", "english": "strawberry", "wrong": ["Kirsche", "Traube", "Beere"]},
-        {"german": "Familie", "english": "family", "wrong": ["Freunde", "Leute", "Gruppe"]},
-        {"german": "Bruder", "english": "brother", "wrong": ["Schwester", "Cousin", "Freund"]},
-        {"german": "Schwester", "english": "sister", "wrong": ["Bruder", "Cousine", "Freundin"]},
-        {"german": "Oma", "english": "grandma", "wrong": ["Mama", "Tante", "Schwester"]},
-        {"german": "Opa", "english": "grandpa", "wrong": ["Papa", "Onkel", "Bruder"]},
-        {"german": "Tante", "english": "aunt", "wrong": ["Mama", "Schwester", "Cousine"]},
-        {"german": "Onkel", "english": "uncle", "wrong": ["Papa", "Bruder", "Cousin"]},
-        {"german": "Baby", "english": "baby", "wrong": ["Kind", "Erwachsener", "Teenager"]},
-        {"german": "Junge", "english": "boy", "wrong": ["Mädchen", "Mann", "Kind"]},
-        {"german": "Mädchen", "english": "girl", "wrong": ["Junge", "Frau", "Kind"]},
-        {"german": "Mann", "english": "man", "wrong": ["Frau", "Junge", "Person"]},
-        {"german": "Frau", "english": "woman", "wrong": ["Mann", "Mädchen", "Person"]},
-        {"german": "Tier", "english": "animal", "wrong": ["Pflanze", "Person", "Ding"]},
-        {"german": "Pferd", "english": "horse", "wrong": ["Kuh", "Schwein", "Schaf"]},
-        {"german": "Kuh", "english": "cow", "wrong": ["Pferd", "Schwein", "Ziege"]},
-        {"german": "Schwein", "english": "pig", "wrong": ["Kuh", "Pferd", "Schaf"]},
-        {"german": "Schaf", "english": "sheep", "wrong": ["Ziege", "Kuh", "Schwein"]},
-        {"german": "Ziege", "english": "goat", "wrong": ["Schaf", "Kuh", "Pferd"]},
-        {"german": "Hase", "english": "rabbit", "wrong": ["Maus", "Katze", "Hamster"]},
-        {"german": "Hamster", "english": "hamster", "wrong": ["Maus", "Hase", "Ratte"]},
-        {"german": "eins", "english": "one", "wrong": ["zwei", "drei", "vier"]},
-        {"german": "zwei", "english": "two", "wrong": ["eins", "drei", "vier"]},
-        {"german": "drei", "english": "three", "wrong": ["zwei", "vier", "fünf"]},
-        {"german": "vier", "english": "four", "wrong": ["drei", "fünf", "sechs"]},
-        {"german": "fünf", "english": "five", "wrong": ["vier", "sechs", "sieben"]},
-        {"german": "sechs", "english": "six", "wrong": ["fünf", "sieben", "acht"]},
-        {"german": "sieben", "english": "seven", "wrong": ["sechs", "acht", "neun"]},
-        {"german": "acht", "english": "eight", "wrong": ["sieben", "neun", "zehn"]},
-        {"german": "neun", "english": "nine", "wrong": ["acht", "zehn", "elf"]},
-        {"german": "zehn", "english": "ten", "wrong": ["neun", "elf", "zwölf"]}
-    ]
-    
-    grade3_vocabulary = [
-        {"german": "Wissenschaft", "english": "science", "wrong": ["Kunst", "Geschichte", "Musik"]},
-        {"german": "Experiment", "english": "experiment", "wrong": ["Test", "Spiel", "Lektion"]},
-        {"german": "Forschung", "english": "research", "wrong": ["Studium", "Hausaufgabe", "Projekt"]},
-        {"german": "Entdeckung", "english": "discovery", "wrong": ["Erfindung", "Schöpfung", "Fund"]},
-        {"german": "Erfindung", "english": "invention", "wrong": ["Entdeckung", "Schöpfung", "Idee"]},
-        {"german": "Technologie", "english": "technology", "wrong": ["Wissenschaft", "Computer", "Maschine"]},
-        {"german": "Computer", "english": "computer", "wrong": ["Fernseher", "Radio", "Telefon"]},
-        {"german": "Internet", "english": "internet", "wrong": ["Computer", "Website", "E-Mail"]},
-        {"german": "Programm", "english": "program", "wrong": ["Computer", "Software", "Spiel"]},
-        {"german": "Software", "english": "software", "wrong": ["Hardware", "Computer", "Programm"]},
-        {"german": "Roboter", "english": "robot", "wrong": ["Maschine", "Computer", "Android"]},
-        {"german": "Maschine", "english": "machine", "wrong": ["Roboter", "Werkzeug", "Gerät"]},
-        {"german": "Werkzeug", "english": "tool", "wrong": ["Maschine", "Instrument", "Gerät"]},
-        {"german": "Instrument", "english": "instrument", "wrong": ["Werkzeug", "Gerät", "Maschine"]},
-        {"german": "Gerät", "english": "device", "wrong": ["Maschine", "Werkzeug", "Gadget"]},
-        {"german": "Energie", "english": "energy", "wrong": ["Kraft", "Elektrizität", "Brennstoff"]},
-        {"german": "Elektrizität", "english": "electricity", "wrong": ["Energie", "Kraft", "Batterie"]},
-        {"german": "Batterie", "english": "battery", "wrong": ["Elektrizität", "Kraft", "Energie"]},
-        {"german": "Motor", "english": "engine", "wrong": ["Maschine", "Motor", "Gerät"]},
-        {"german": "Fahrzeug", "english": "vehicle", "wrong": ["Auto", "Transport", "Maschine"]}
-    ]
-    
-    vocabulary_list = grade2_vocabulary if grade == 2 else grade3_vocabulary
+    vocabulary_list = ENGLISH_EN_DE_VOCABULARY_GRADE2 if grade == 2 else ENGLISH_EN_DE_VOCABULARY_GRADE3
     
     # Shuffle and select random subset to ensure variety
     import random
@@ -1457,7 +2359,7 @@ async def generate_vocabulary_en_de_problems(count: int, grade: int, settings: E
         options = [vocab["german"]] + vocab["wrong"]
         random.shuffle(options)
         
-        problem = EnglishProblem(
+        problem = ProblemRecord(
             question=f"Was bedeutet '{vocab['english']}' auf Deutsch?",
             question_type="vocabulary_en_de",
             options=options,
@@ -1468,7 +2370,7 @@ async def generate_vocabulary_en_de_problems(count: int, grade: int, settings: E
     
     return problems
 
-async def generate_simple_sentence_problems(count: int, grade: int, settings: EnglishSettings) -> List[EnglishProblem]:
+async def generate_simple_sentence_problems(count: int, grade: int, settings: EnglishSettings) -> List[ProblemRecord]:
     """Generate simple sentence translation problems using massively expanded content"""
     problems = []
     
@@ -1526,7 +2428,7 @@ async def generate_simple_sentence_problems(count: int, grade: int, settings: En
         
         random.shuffle(options)
         
-        problem = EnglishProblem(
+        problem = ProblemRecord(
             question=f"Wie übersetzt man diesen Satz ins Englische?\n\n'{sentence['german']}'",
             question_type="simple_sentences",
             options=options,
@@ -1537,42 +2439,42 @@ async def generate_simple_sentence_problems(count: int, grade: int, settings: En
     
     return problems
 
-async def generate_basic_grammar_problems(count: int, grade: int, settings: EnglishSettings) -> List[EnglishProblem]:
+ENGLISH_GRAMMAR_GRADE2 = [
+    {"question": "Wähle die richtige Form: 'I ___ a student.'", "answer": "am", "options": ["am", "is", "are"]},
+    {"question": "Wähle die richtige Form: 'She ___ happy.'", "answer": "is", "options": ["am", "is", "are"]},
+    {"question": "Wähle die richtige Form: 'We ___ friends.'", "answer": "are", "options": ["am", "is", "are"]},
+    {"question": "Wähle die richtige Form: 'The cat ___ sleeping.'", "answer": "is", "options": ["am", "is", "are"]},
+    {"question": "Wähle die richtige Form: 'I ___ a dog.'", "answer": "have", "options": ["have", "has", "had"]},
+    {"question": "Wähle die richtige Form: 'She ___ a book.'", "answer": "has", "options": ["have", "has", "had"]},
+    {"question": "Wähle die richtige Form: 'We ___ two cats.'", "answer": "have", "options": ["have", "has", "had"]},
+    {"question": "Wähle die richtige Form: 'He ___ to school.'", "answer": "goes", "options": ["go", "goes", "going"]},
+    {"question": "Wähle die richtige Form: 'I ___ to school.'", "answer": "go", "options": ["go", "goes", "going"]},
+    {"question": "Wähle die richtige Form: 'They ___ football.'", "answer": "play", "options": ["play", "plays", "playing"]}
+]
+
+ENGLISH_GRAMMAR_GRADE3 = [
+    {"question": "Wähle die richtige Zeit: 'Yesterday I ___ to the park.'", "answer": "went", "options": ["go", "went", "will go"]},
+    {"question": "Wähle die richtige Zeit: 'Tomorrow we ___ shopping.'", "answer": "will go", "options": ["go", "went", "will go"]},
+    {"question": "Wähle die richtige Zeit: 'She ___ her homework now.'", "answer": "is doing", "options": ["does", "did", "is doing"]},
+    {"question": "Wähle die richtige Form: 'This book is ___ than that one.'", "answer": "better", "options": ["good", "better", "best"]},
+    {"question": "Wähle die richtige Form: 'She is the ___ student in class.'", "answer": "best", "options": ["good", "better", "best"]},
+    {"question": "Wähle die richtige Form: 'I have ___ books than you.'", "answer": "more", "options": ["much", "more", "most"]},
+    {"question": "Wähle die richtige Form: 'Can you help ___?'", "answer": "me", "options": ["I", "me", "my"]},
+    {"question": "Wähle die richtige Form: '___ book is this?'", "answer": "Whose", "options": ["Who", "Whose", "Which"]},
+    {"question": "Wähle die richtige Form: '___ are you going?'", "answer": "Where", "options": ["What", "Where", "When"]},
+    {"question": "Wähle die richtige Form: 'I don't have ___ money.'", "answer": "any", "options": ["some", "any", "no"]}
+]
+
+async def generate_basic_grammar_problems(count: int, grade: int, settings: EnglishSettings) -> List[ProblemRecord]:
     """Generate basic English grammar problems"""
     problems = []
     
-    grade2_grammar = [
-        {"question": "Wähle die richtige Form: 'I ___ a student.'", "answer": "am", "options": ["am", "is", "are"]},
-        {"question": "Wähle die richtige Form: 'She ___ happy.'", "answer": "is", "options": ["am", "is", "are"]},
-        {"question": "Wähle die richtige Form: 'We ___ friends.'", "answer": "are", "options": ["am", "is", "are"]},
-        {"question": "Wähle die richtige Form: 'The cat ___ sleeping.'", "answer": "is", "options": ["am", "is", "are"]},
-        {"question": "Wähle die richtige Form: 'I ___ a dog.'", "answer": "have", "options": ["have", "has", "had"]},
-        {"question": "Wähle die richtige Form: 'She ___ a book.'", "answer": "has", "options": ["have", "has", "had"]},
-        {"question": "Wähle die richtige Form: 'We ___ two cats.'", "answer": "have", "options": ["have", "has", "had"]},
-        {"question": "Wähle die richtige Form: 'He ___ to school.'", "answer": "goes", "options": ["go", "goes", "going"]},
-        {"question": "Wähle die richtige Form: 'I ___ to school.'", "answer": "go", "options": ["go", "goes", "going"]},
-        {"question": "Wähle die richtige Form: 'They ___ football.'", "answer": "play", "options": ["play", "plays", "playing"]}
-    ]
-    
-    grade3_grammar = [
-        {"question": "Wähle die richtige Zeit: 'Yesterday I ___ to the park.'", "answer": "went", "options": ["go", "went", "will go"]},
-        {"question": "Wähle die richtige Zeit: 'Tomorrow we ___ shopping.'", "answer": "will go", "options": ["go", "went", "will go"]},
-        {"question": "Wähle die richtige Zeit: 'She ___ her homework now.'", "answer": "is doing", "options": ["does", "did", "is doing"]},
-        {"question": "Wähle die richtige Form: 'This book is ___ than that one.'", "answer": "better", "options": ["good", "better", "best"]},
-        {"question": "Wähle die richtige Form: 'She is the ___ student in class.'", "answer": "best", "options": ["good", "better", "best"]},
-        {"question": "Wähle die richtige Form: 'I have ___ books than you.'", "answer": "more", "options": ["much", "more", "most"]},
-        {"question": "Wähle die richtige Form: 'Can you help ___?'", "answer": "me", "options": ["I", "me", "my"]},
-        {"question": "Wähle die richtige Form: '___ book is this?'", "answer": "Whose", "options": ["Who", "Whose", "Which"]},
-        {"question": "Wähle die richtige Form: '___ are you going?'", "answer": "Where", "options": ["What", "Where", "When"]},
-        {"question": "Wähle die richtige Form: 'I don't have ___ money.'", "answer": "any", "options": ["some", "any", "no"]}
-    ]
-    
-    grammar_list = grade2_grammar if grade == 2 else grade3_grammar
+    grammar_list = ENGLISH_GRAMMAR_GRADE2 if grade == 2 else ENGLISH_GRAMMAR_GRADE3
     
     for i in range(min(count, len(grammar_list))):
         grammar = random.choice(grammar_list)
         
-        problem = EnglishProblem(
+        problem = ProblemRecord(
             question=grammar["question"],
             question_type="basic_grammar",
             options=grammar["options"],
@@ -1582,39 +2484,39 @@ async def generate_basic_grammar_problems(count: int, grade: int, settings: Engl
     
     return problems
 
-async def generate_colors_numbers_problems(count: int, grade: int, settings: EnglishSettings) -> List[EnglishProblem]:
+ENGLISH_COLORS_NUMBERS = [
+    {"german": "rot", "english": "red", "wrong": ["blue", "green", "yellow"]},
+    {"german": "blau", "english": "blue", "wrong": ["red", "green", "black"]},
+    {"german": "grün", "english": "green", "wrong": ["red", "blue", "yellow"]},
+    {"german": "gelb", "english": "yellow", "wrong": ["red", "blue", "green"]},
+    {"german": "schwarz", "english": "black", "wrong": ["white", "gray", "brown"]},
+    {"german": "weiß", "english": "white", "wrong": ["black", "gray", "silver"]},
+    {"german": "braun", "english": "brown", "wrong": ["black", "gray", "tan"]},
+    {"german": "rosa", "english": "pink", "wrong": ["red", "purple", "orange"]},
+    {"german": "lila", "english": "purple", "wrong": ["pink", "blue", "violet"]},
+    {"german": "orange", "english": "orange", "wrong": ["red", "yellow", "pink"]},
+    {"german": "eins", "english": "one", "wrong": ["two", "three", "four"]},
+    {"german": "zwei", "english": "two", "wrong": ["one", "three", "four"]},
+    {"german": "drei", "english": "three", "wrong": ["two", "four", "five"]},
+    {"german": "vier", "english": "four", "wrong": ["three", "five", "six"]},
+    {"german": "fünf", "english": "five", "wrong": ["four", "six", "seven"]},
+    {"german": "sechs", "english": "six", "wrong": ["five", "seven", "eight"]},
+    {"german": "sieben", "english": "seven", "wrong": ["six", "eight", "nine"]},
+    {"german": "acht", "english": "eight", "wrong": ["seven", "nine", "ten"]},
+    {"german": "neun", "english": "nine", "wrong": ["eight", "ten", "eleven"]},
+    {"german": "zehn", "english": "ten", "wrong": ["nine", "eleven", "twelve"]}
+]
+
+async def generate_colors_numbers_problems(count: int, grade: int, settings: EnglishSettings) -> List[ProblemRecord]:
     """Generate colors and numbers problems"""
     problems = []
     
-    colors_numbers = [
-        {"german": "rot", "english": "red", "wrong": ["blue", "green", "yellow"]},
-        {"german": "blau", "english": "blue", "wrong": ["red", "green", "black"]},
-        {"german": "grün", "english": "green", "wrong": ["red", "blue", "yellow"]},
-        {"german": "gelb", "english": "yellow", "wrong": ["red", "blue", "green"]},
-        {"german": "schwarz", "english": "black", "wrong": ["white", "gray", "brown"]},
-        {"german": "weiß", "english": "white", "wrong": ["black", "gray", "silver"]},
-        {"german": "braun", "english": "brown", "wrong": ["black", "gray", "tan"]},
-        {"german": "rosa", "english": "pink", "wrong": ["red", "purple", "orange"]},
-        {"german": "lila", "english": "purple", "wrong": ["pink", "blue", "violet"]},
-        {"german": "orange", "english": "orange", "wrong": ["red", "yellow", "pink"]},
-        {"german": "eins", "english": "one", "wrong": ["two", "three", "four"]},
-        {"german": "zwei", "english": "two", "wrong": ["one", "three", "four"]},
-        {"german": "drei", "english": "three", "wrong": ["two", "four", "five"]},
-        {"german": "vier", "english": "four", "wrong": ["three", "five", "six"]},
-        {"german": "fünf", "english": "five", "wrong": ["four", "six", "seven"]},
-        {"german": "sechs", "english": "six", "wrong": ["five", "seven", "eight"]},
-        {"german": "sieben", "english": "seven", "wrong": ["six", "eight", "nine"]},
-        {"german": "acht", "english": "eight", "wrong": ["seven", "nine", "ten"]},
-        {"german": "neun", "english": "nine", "wrong": ["eight", "ten", "eleven"]},
-        {"german": "zehn", "english": "ten", "wrong": ["nine", "eleven", "twelve"]}
-    ]
-    
-    for i in range(min(count, len(colors_numbers))):
-        item = random.choice(colors_numbers)
+    for i in range(min(count, len(ENGLISH_COLORS_NUMBERS))):
+        item = random.choice(ENGLISH_COLORS_NUMBERS)
         options = [item["english"]] + item["wrong"]
         random.shuffle(options)
         
-        problem = EnglishProblem(
+        problem = ProblemRecord(
             question=f"Was bedeutet '{item['german']}' auf Englisch?",
             question_type="colors_numbers",
             options=options,
@@ -1625,39 +2527,39 @@ async def generate_colors_numbers_problems(count: int, grade: int, settings: Eng
     
     return problems
 
-async def generate_animals_objects_problems(count: int, grade: int, settings: EnglishSettings) -> List[EnglishProblem]:
+ENGLISH_ANIMALS_OBJECTS = [
+    {"german": "Hund", "english": "dog", "wrong": ["cat", "bird", "fish"]},
+    {"german": "Katze", "english": "cat", "wrong": ["dog", "mouse", "bird"]},
+    {"german": "Vogel", "english": "bird", "wrong": ["fish", "cat", "dog"]},
+    {"german": "Fisch", "english": "fish", "wrong": ["bird", "cat", "mouse"]},
+    {"german": "Pferd", "english": "horse", "wrong": ["cow", "pig", "sheep"]},
+    {"german": "Kuh", "english": "cow", "wrong": ["horse", "pig", "goat"]},
+    {"german": "Schwein", "english": "pig", "wrong": ["cow", "horse", "sheep"]},
+    {"german": "Schaf", "english": "sheep", "wrong": ["goat", "cow", "pig"]},
+    {"german": "Maus", "english": "mouse", "wrong": ["cat", "rat", "hamster"]},
+    {"german": "Hase", "english": "rabbit", "wrong": ["mouse", "cat", "hamster"]},
+    {"german": "Tisch", "english": "table", "wrong": ["chair", "bed", "sofa"]},
+    {"german": "Stuhl", "english": "chair", "wrong": ["table", "bed", "lamp"]},
+    {"german": "Bett", "english": "bed", "wrong": ["chair", "table", "sofa"]},
+    {"german": "Lampe", "english": "lamp", "wrong": ["light", "candle", "torch"]},
+    {"german": "Fenster", "english": "window", "wrong": ["door", "wall", "floor"]},
+    {"german": "Tür", "english": "door", "wrong": ["window", "wall", "gate"]},
+    {"german": "Auto", "english": "car", "wrong": ["bus", "train", "bike"]},
+    {"german": "Bus", "english": "bus", "wrong": ["car", "train", "truck"]},
+    {"german": "Zug", "english": "train", "wrong": ["bus", "car", "plane"]},
+    {"german": "Flugzeug", "english": "airplane", "wrong": ["train", "car", "helicopter"]}
+]
+
+async def generate_animals_objects_problems(count: int, grade: int, settings: EnglishSettings) -> List[ProblemRecord]:
     """Generate animals and objects problems"""
     problems = []
     
-    animals_objects = [
-        {"german": "Hund", "english": "dog", "wrong": ["cat", "bird", "fish"]},
-        {"german": "Katze", "english": "cat", "wrong": ["dog", "mouse", "bird"]},
-        {"german": "Vogel", "english": "bird", "wrong": ["fish", "cat", "dog"]},
-        {"german": "Fisch", "english": "fish", "wrong": ["bird", "cat", "mouse"]},
-        {"german": "Pferd", "english": "horse", "wrong": ["cow", "pig", "sheep"]},
-        {"german": "Kuh", "english": "cow", "wrong": ["horse", "pig", "goat"]},
-        {"german": "Schwein", "english": "pig", "wrong": ["cow", "horse", "sheep"]},
-        {"german": "Schaf", "english": "sheep", "wrong": ["goat", "cow", "pig"]},
-        {"german": "Maus", "english": "mouse", "wrong": ["cat", "rat", "hamster"]},
-        {"german": "Hase", "english": "rabbit", "wrong": ["mouse", "cat", "hamster"]},
-        {"german": "Tisch", "english": "table", "wrong": ["chair", "bed", "sofa"]},
-        {"german": "Stuhl", "english": "chair", "wrong": ["table", "bed", "lamp"]},
-        {"german": "Bett", "english": "bed", "wrong": ["chair", "table", "sofa"]},
-        {"german": "Lampe", "english": "lamp", "wrong": ["light", "candle", "torch"]},
-        {"german": "Fenster", "english": "window", "wrong": ["door", "wall", "floor"]},
-        {"german": "Tür", "english": "door", "wrong": ["window", "wall", "gate"]},
-        {"german": "Auto", "english": "car", "wrong": ["bus", "train", "bike"]},
-        {"german": "Bus", "english": "bus", "wrong": ["car", "train", "truck"]},
-        {"german": "Zug", "english": "train", "wrong": ["bus", "car", "plane"]},
-        {"german": "Flugzeug", "english": "airplane", "wrong": ["train", "car", "helicopter"]}
-    ]
-    
-    for i in range(min(count, len(animals_objects))):
-        item = random.choice(animals_objects)
+    for i in range(min(count, len(ENGLISH_ANIMALS_OBJECTS))):
+        item = random.choice(ENGLISH_ANIMALS_OBJECTS)
         options = [item["english"]] + item["wrong"]
         random.shuffle(options)
         
-        problem = EnglishProblem(
+        problem = ProblemRecord(
             question=f"Was bedeutet '{item['german']}' auf Englisch?",
             question_type="animals_objects",
             options=options,
@@ -1669,17 +2571,17 @@ async def generate_animals_objects_problems(count: int, grade: int, settings: En
     return problems
 
 # AI-powered English problem generation functions
-async def generate_ai_vocabulary_de_en_problems(count: int, grade: int, settings: EnglishSettings) -> List[EnglishProblem]:
+async def generate_ai_vocabulary_de_en_problems(count: int, grade: int, settings: EnglishSettings) -> List[ProblemRecord]:
     """Generate AI vocabulary DE-EN problems using static fallback content"""
     # For external deployment, use fallback content only
     return await generate_vocabulary_de_en_problems(count, grade, settings)
 
-async def generate_ai_vocabulary_en_de_problems(count: int, grade: int, settings: EnglishSettings) -> List[EnglishProblem]:
+async def generate_ai_vocabulary_en_de_problems(count: int, grade: int, settings: EnglishSettings) -> List[ProblemRecord]:
     """Generate AI vocabulary EN-DE problems using static fallback content"""
     # For external deployment, use fallback content only
     return await generate_vocabulary_en_de_problems(count, grade, settings)
 
-async def generate_ai_simple_sentence_problems(count: int, grade: int, settings: EnglishSettings) -> List[EnglishProblem]:
+async def generate_ai_simple_sentence_problems(count: int, grade: int, settings: EnglishSettings) -> List[ProblemRecord]:
     """Generate AI simple sentence problems using static fallback content"""
     # For external deployment, use fallback content only
     return await generate_simple_sentence_problems(count, grade, settings)
@@ -1691,148 +2593,161 @@ def get_current_week_start():
     week_start = today - timedelta(days=days_since_monday)
     return week_start.replace(hour=0, minute=0, second=0, microsecond=0)
 
-async def generate_math_problems(problem_type: str, grade: int, count: int, settings: MathSettings) -> List[MathProblem]:
+async def generate_math_problems(problem_type: str, grade: int, count: int, settings: MathSettings) -> List[ProblemRecord]:
     """Generate math problems with specific type, grade, count and settings"""
-    
+    generator = PROBLEM_GENERATORS["math"].get(problem_type)
+    if generator is None:
+        return []
+    return await generator.generate(count, grade, settings)
+
+async def generate_addition_problems(count: int, grade: int, settings: MathSettings) -> List[ProblemRecord]:
+    """Generate addition problems (up to 20 in grade 2, up to 100 in grade 3)"""
     problems = []
+    for i in range(count):
+        if grade == 2:
+            # Grade 2: Numbers up to 20
+            a = random.randint(1, 15)
+            b = random.randint(1, 20 - a)
+            answer = a + b
+            wrong_answers = [answer + 1, answer - 1, answer + 2]
+        else:  # Grade 3
+            # Grade 3: Numbers up to 100
+            a = random.randint(10, 80)
+            b = random.randint(1, 100 - a)
+            answer = a + b
+            wrong_answers = [answer + 5, answer - 5, answer + 10]
+        
+        options = [str(answer)] + [str(w) for w in wrong_answers]
+        random.shuffle(options)
+        
+        problem = ProblemRecord(
+            question=f"{a} + {b} = ?",
+            question_type="addition",
+            options=options,
+            correct_answer=str(answer)
+        )
+        problems.append(problem)
     
-    if problem_type == "addition":
-        for i in range(count):
-            if grade == 2:
-                # Grade 2: Numbers up to 20
-                a = random.randint(1, 15)
-                b = random.randint(1, 20 - a)
-                answer = a + b
-                wrong_answers = [answer + 1, answer - 1, answer + 2]
-            else:  # Grade 3
-                # Grade 3: Numbers up to 100
-                a = random.randint(10, 80)
-                b = random.randint(1, 100 - a)
-                answer = a + b
-                wrong_answers = [answer + 5, answer - 5, answer + 10]
-            
-            options = [str(answer)] + [str(w) for w in wrong_answers]
-            random.shuffle(options)
-            
-            problem = MathProblem(
-                question=f"{a} + {b} = ?",
-                question_type="addition",
-                options=options,
-                correct_answer=str(answer)
-            )
-            problems.append(problem)
+    return problems
+
+async def generate_subtraction_problems(count: int, grade: int, settings: MathSettings) -> List[ProblemRecord]:
+    """Generate subtraction problems with non-negative results"""
+    problems = []
+    for i in range(count):
+        if grade == 2:
+            a = random.randint(5, 20)
+            b = random.randint(1, a)
+            answer = a - b
+            wrong_answers = [answer + 1, answer - 1, answer + 2]
+        else:  # Grade 3
+            a = random.randint(20, 100)
+            b = random.randint(1, a)
+            answer = a - b
+            wrong_answers = [answer + 5, answer - 5, answer + 10]
+        
+        options = [str(answer)] + [str(w) for w in wrong_answers if w >= 0][:3]
+        while len(options) < 4:
+            options.append(str(random.randint(0, answer + 10)))
+        random.shuffle(options)
+        
+        problem = ProblemRecord(
+            question=f"{a} - {b} = ?",
+            question_type="subtraction", 
+            options=options,
+            correct_answer=str(answer)
+        )
+        problems.append(problem)
     
-    elif problem_type == "subtraction":
-        for i in range(count):
-            if grade == 2:
-                a = random.randint(5, 20)
-                b = random.randint(1, a)
-                answer = a - b
-                wrong_answers = [answer + 1, answer - 1, answer + 2]
-            else:  # Grade 3
-                a = random.randint(20, 100)
-                b = random.randint(1, a)
-                answer = a - b
-                wrong_answers = [answer + 5, answer - 5, answer + 10]
-            
-            options = [str(answer)] + [str(w) for w in wrong_answers if w >= 0][:3]
-            while len(options) < 4:
-                options.append(str(random.randint(0, answer + 10)))
-            random.shuffle(options)
-            
-            problem = MathProblem(
-                question=f"{a} - {b} = ?",
-                question_type="subtraction", 
-                options=options,
-                correct_answer=str(answer)
-            )
-            problems.append(problem)
+    return problems
+
+async def generate_multiplication_problems(count: int, grade: int, settings: MathSettings) -> List[ProblemRecord]:
+    """Generate multiplication problems (small tables in grade 2, up to 10 × 10 in grade 3)"""
+    problems = []
+    for i in range(count):
+        if grade == 2:
+            a = random.randint(1, 5)
+            b = random.randint(1, 5)
+        else:  # Grade 3
+            a = random.randint(2, 10)
+            b = random.randint(2, 10)
+        
+        answer = a * b
+        wrong_answers = [answer + a, answer - a, answer + b]
+        
+        options = [str(answer)] + [str(w) for w in wrong_answers if w > 0][:3]
+        while len(options) < 4:
+            options.append(str(random.randint(1, answer + 20)))
+        random.shuffle(options)
+        
+        problem = ProblemRecord(
+            question=f"{a} × {b} = ?",
+            question_type="multiplication",
+            options=options,
+            correct_answer=str(answer)
+        )
+        problems.append(problem)
     
-    elif problem_type == "multiplication":
-        for i in range(count):
+    return problems
+
+async def generate_word_problems(count: int, grade: int, settings: MathSettings) -> List[ProblemRecord]:
+    """Generate simple word problems"""
+    problems = []
+    word_templates = [
+        ("Anna hat {a} Äpfel. Sie bekommt {b} weitere. Wie viele hat sie jetzt?", "addition"),
+        ("Tim hat {a} Bonbons. Er gibt {b} weg. Wie viele bleiben?", "subtraction"),
+        ("Es gibt {a} Gruppen mit je {b} Kindern. Wie viele Kinder sind das?", "multiplication")
+    ]
+    
+    for i in range(count):
+        template, operation = random.choice(word_templates)
+        
+        if operation == "addition":
             if grade == 2:
-                a = random.randint(1, 5)
-                b = random.randint(1, 5)
-            else:  # Grade 3
-                a = random.randint(2, 10)
-                b = random.randint(2, 10)
-            
+                a, b = random.randint(3, 12), random.randint(2, 8)
+            else:
+                a, b = random.randint(15, 45), random.randint(5, 25)
+            answer = a + b
+        elif operation == "subtraction":
+            if grade == 2:
+                a = random.randint(5, 15)
+                b = random.randint(2, a)
+            else:
+                a = random.randint(20, 60)
+                b = random.randint(5, a)
+            answer = a - b
+        else:  # multiplication
+            if grade == 2:
+                a, b = random.randint(2, 4), random.randint(2, 5)
+            else:
+                a, b = random.randint(3, 8), random.randint(2, 7)
             answer = a * b
-            wrong_answers = [answer + a, answer - a, answer + b]
-            
-            options = [str(answer)] + [str(w) for w in wrong_answers if w > 0][:3]
-            while len(options) < 4:
-                options.append(str(random.randint(1, answer + 20)))
-            random.shuffle(options)
-            
-            problem = MathProblem(
-                question=f"{a} × {b} = ?",
-                question_type="multiplication",
-                options=options,
-                correct_answer=str(answer)
-            )
-            problems.append(problem)
-    
-    elif problem_type == "word_problems":
-        # Simple word problems
-        word_templates = [
-            ("Anna hat {a} Äpfel. Sie bekommt {b} weitere. Wie viele hat sie jetzt?", "addition"),
-            ("Tim hat {a} Bonbons. Er gibt {b} weg. Wie viele bleiben?", "subtraction"),
-            ("Es gibt {a} Gruppen mit je {b} Kindern. Wie viele Kinder sind das?", "multiplication")
-        ]
         
-        for i in range(count):
-            template, operation = random.choice(word_templates)
-            
-            if operation == "addition":
-                if grade == 2:
-                    a, b = random.randint(3, 12), random.randint(2, 8)
-                else:
-                    a, b = random.randint(15, 45), random.randint(5, 25)
-                answer = a + b
-            elif operation == "subtraction":
-                if grade == 2:
-                    a = random.randint(5, 15)
-                    b = random.randint(2, a)
-                else:
-                    a = random.randint(20, 60)
-                    b = random.randint(5, a)
-                answer = a - b
-            else:  # multiplication
-                if grade == 2:
-                    a, b = random.randint(2, 4), random.randint(2, 5)
-                else:
-                    a, b = random.randint(3, 8), random.randint(2, 7)
-                answer = a * b
-            
-            question = template.format(a=a, b=b)
-            wrong_answers = [answer + 1, answer - 1, answer + 2]
-            options = [str(answer)] + [str(w) for w in wrong_answers if w > 0][:3]
-            while len(options) < 4:
-                options.append(str(random.randint(1, answer + 10)))
-            random.shuffle(options)
-            
-            problem = MathProblem(
-                question=question,
-                question_type="word_problems",
-                options=options,
-                correct_answer=str(answer)
-            )
-            problems.append(problem)
-    
-    elif problem_type == "currency_math":
-        # Generate currency problems
-        currency_problems = generate_currency_problems(count, settings)
-        problems.extend(currency_problems)
-    
-    elif problem_type == "clock_reading":
-        # Generate clock problems
-        clock_problems = generate_clock_problems(count, settings)
-        problems.extend(clock_problems)
+        question = template.format(a=a, b=b)
+        wrong_answers = [answer + 1, answer - 1, answer + 2]
+        options = [str(answer)] + [str(w) for w in wrong_answers if w > 0][:3]
+        while len(options) < 4:
+            options.append(str(random.randint(1, answer + 10)))
+        random.shuffle(options)
+        
+        problem = ProblemRecord(
+            question=question,
+            question_type="word_problems",
+            options=options,
+            correct_answer=str(answer)
+        )
+        problems.append(problem)
     
     return problems
 
-def generate_german_word_problems(count: int, grade: int, settings: MathSettings) -> List[MathProblem]:
+async def generate_currency_math_problems(count: int, grade: int, settings: MathSettings) -> List[ProblemRecord]:
+    """Generate currency problems (grade-independent, driven by the currency settings)"""
+    return generate_currency_problems(count, settings)
+
+async def generate_clock_reading_problems(count: int, grade: int, settings: MathSettings) -> List[ProblemRecord]:
+    """Generate clock reading problems (grade-independent, driven by the clock settings)"""
+    return generate_clock_problems(count, settings)
+
+def generate_german_word_problems(count: int, grade: int, settings: MathSettings) -> List[ProblemRecord]:
     """Generate German word problems using templates"""
     problems = []
     
@@ -1941,7 +2856,7 @@ def generate_german_word_problems(count: int, grade: int, settings: MathSettings
                 
             # Create the problem
             question = template_data["template"].format(a=a, b=b)
-            problem = MathProblem(
+            problem = ProblemRecord(
                 question=question,
                 question_type="text",
                 correct_answer=str(answer)
@@ -1954,7 +2869,7 @@ def generate_german_word_problems(count: int, grade: int, settings: MathSettings
     
     return problems
 
-def generate_clock_problems(count: int, settings: MathSettings) -> List[MathProblem]:
+def generate_clock_problems(count: int, settings: MathSettings) -> List[ProblemRecord]:
     """Generate clock reading problems with SVG data"""
     problems = []
     clock_settings = settings.clock_settings
@@ -1982,7 +2897,7 @@ def generate_clock_problems(count: int, settings: MathSettings) -> List[MathProb
         elif minutes == 45:
             time_str = f"{hours}:45"
         
-        problem = MathProblem(
+        problem = ProblemRecord(
             question="Wie viel Uhr zeigt die Uhr an?",
             question_type="clock",
             clock_data={"hours": hours, "minutes": minutes},
@@ -1992,7 +2907,7 @@ def generate_clock_problems(count: int, settings: MathSettings) -> List[MathProb
     
     return problems
 
-def generate_currency_problems(count: int, settings: MathSettings) -> List[MathProblem]:
+def generate_currency_problems(count: int, settings: MathSettings) -> List[ProblemRecord]:
     """Generate currency math problems"""
     problems = []
     currency_settings = settings.currency_settings
@@ -2013,7 +2928,7 @@ def generate_currency_problems(count: int, settings: MathSettings) -> List[MathP
             result = round(amount1 - amount2, 2)
             question = f"Wie viel Wechselgeld bekommst du: {amount1:.2f}{symbol} - {amount2:.2f}{symbol}?"
         
-        problem = MathProblem(
+        problem = ProblemRecord(
             question=question,
             question_type="currency",
             currency_data={"amounts": [amount1, amount2], "operation": operation},
@@ -2023,40 +2938,492 @@ def generate_currency_problems(count: int, settings: MathSettings) -> List[MathP
     
     return problems
 
-async def generate_ai_math_problems(problem_type: str, grade: int, count: int, settings: MathSettings) -> List[MathProblem]:
+async def generate_ai_math_problems(problem_type: str, grade: int, count: int, settings: MathSettings) -> List[ProblemRecord]:
     """Generate AI math problems using static fallback content"""
     # For external deployment, use fallback content only
     return await generate_math_problems(problem_type, grade, count, settings)
 
-async def generate_simple_math_problems(grade: int, count: int, settings: MathSettings) -> List[MathProblem]:
+async def generate_simple_math_problems(grade: int, count: int, settings: MathSettings) -> List[ProblemRecord]:
     """Fallback simple math problem generation"""
     problems = []
     for i in range(count):
         if i % 3 == 0:  # Addition
             a = random.randint(1, min(50, settings.max_number // 2))
             b = random.randint(1, min(50, 100 - a))  # Ensure sum doesn't exceed 100
-            problems.append(MathProblem(question=f"What is {a} + {b}?", correct_answer=str(a + b)))
+            problems.append(ProblemRecord(question=f"What is {a} + {b}?", correct_answer=str(a + b)))
         elif i % 3 == 1:  # Subtraction
             a = random.randint(10, min(100, settings.max_number))
             b = random.randint(1, a)
-            problems.append(MathProblem(question=f"What is {a} - {b}?", correct_answer=str(a - b)))
+            problems.append(ProblemRecord(question=f"What is {a} - {b}?", correct_answer=str(a - b)))
         else:  # Multiplication
             a = random.randint(1, min(10, settings.max_multiplication))
             b = random.randint(1, min(10, 100 // a))  # Ensure product doesn't exceed 100
-            problems.append(MathProblem(question=f"What is {a} × {b}?", correct_answer=str(a * b)))
+            problems.append(ProblemRecord(question=f"What is {a} × {b}?", correct_answer=str(a * b)))
     return problems
 
+# Problem generator registry
+@dataclass(frozen=True)
+class ProblemGenerator:
+    """Registry entry describing how one problem type is generated"""
+    subject: str  # "math", "german" or "english"
+    problem_type: str  # key used in the subject's settings.problem_types
+    generate: Callable[[int, int, Any], Awaitable[list]]  # async (count, grade, settings) -> problems
+    pool: Optional[Callable[[int, Any], Optional[list]]] = None  # (grade, settings) -> content left after difficulty filtering, None for procedural types
+    cost: float = 1.0  # relative cost per problem, cheaper types absorb top-ups first
+
+    def capacity(self, grade: int, settings) -> Optional[int]:
+        """Maximum number of problems one request can draw from the pool (None = unlimited)"""
+        if self.pool is None:
+            return None
+        content = self.pool(grade, settings)
+        return len(content) if content is not None else None
+
+PROBLEM_GENERATORS: Dict[str, Dict[str, ProblemGenerator]] = {"math": {}, "german": {}, "english": {}}
+
+DEFAULT_PROBLEM_TYPES = {
+    "math": ["addition", "subtraction", "multiplication"],
+    "german": ["spelling", "word_types", "fill_blank"],
+    "english": ["vocabulary_de_en", "vocabulary_en_de", "simple_sentences"]
+}
+
+def register_problem_generator(subject: str, problem_type: str, generate, pool=None, cost: float = 1.0):
+    """Register a generator for a problem type"""
+    PROBLEM_GENERATORS[subject][problem_type] = ProblemGenerator(subject, problem_type, generate, pool, cost)
+
+def load_content_pool(module_name: str, *attributes: str) -> Optional[list]:
+    """Load (and concatenate) content lists from a content module, None if unavailable"""
+    try:
+        module = importlib.import_module(module_name)
+        content = []
+        for attribute in attributes:
+            content.extend(getattr(module, attribute))
+        return content
+    except (ImportError, AttributeError):
+        return None
+
+register_problem_generator("math", "addition", generate_addition_problems)
+register_problem_generator("math", "subtraction", generate_subtraction_problems)
+register_problem_generator("math", "multiplication", generate_multiplication_problems)
+register_problem_generator("math", "word_problems", generate_word_problems)
+register_problem_generator("math", "currency_math", generate_currency_math_problems)
+register_problem_generator("math", "clock_reading", generate_clock_reading_problems)
+
+def german_spelling_pool(grade: int, settings: GermanSettings) -> Optional[list]:
+    words = load_content_pool("german_content_complete", "GRADE2_SPELLING_COMPLETE") if grade == 2 else load_content_pool("german_grade3_content", "GRADE3_SPELLING_COMPLETE")
+    if words is None:
+        return None
+    return apply_spelling_difficulty_filter(words, settings.difficulty_settings.get("spelling_difficulty", "medium"))
+
+def german_word_types_pool(grade: int, settings: GermanSettings) -> Optional[list]:
+    examples = load_content_pool("german_content_complete", "GRADE2_WORD_TYPES_COMPLETE") if grade == 2 else load_content_pool("german_grade3_content", "GRADE3_WORD_TYPES_COMPLETE")
+    if examples is None:
+        return None
+    return apply_word_type_difficulty_filter(
+        examples,
+        settings.difficulty_settings.get("spelling_difficulty", "medium"),
+        settings.difficulty_settings.get("word_types_include_adjectives", True)
+    )
+
+def german_fill_blank_pool(grade: int, settings: GermanSettings) -> Optional[list]:
+    templates = load_content_pool("german_content_complete", "GRADE2_FILL_BLANK_COMPLETE") if grade == 2 else load_content_pool("german_grade3_content", "GRADE3_FILL_BLANK_COMPLETE")
+    if templates is None:
+        return None
+    return apply_fill_blank_difficulty_filter(
+        templates,
+        settings.difficulty_settings.get("spelling_difficulty", "medium"),
+        settings.difficulty_settings.get("fill_blank_context_length", "short")
+    )
+
+def english_vocabulary_pool(grade: int, settings: EnglishSettings) -> Optional[list]:
+    if grade == 2 or settings.difficulty_settings.get("vocabulary_level") == "basic":
+        return load_content_pool("english_content_expanded", "ENGLISH_VOCABULARY_BASIC")
+    return load_content_pool("english_content_expanded", "ENGLISH_VOCABULARY_BASIC", "ENGLISH_VOCABULARY_INTERMEDIATE")
+
+def english_sentences_pool(grade: int, settings: EnglishSettings) -> Optional[list]:
+    if grade == 2 or settings.difficulty_settings.get("sentence_level") == "basic":
+        return load_content_pool("english_content_expanded", "ENGLISH_SENTENCES_BASIC")
+    return load_content_pool("english_content_expanded", "ENGLISH_SENTENCES_BASIC", "ENGLISH_SENTENCES_INTERMEDIATE")
+
+register_problem_generator("german", "spelling", generate_spelling_problems, pool=german_spelling_pool)
+register_problem_generator("german", "word_types", generate_word_type_problems, pool=german_word_types_pool)
+register_problem_generator("german", "fill_blank", generate_fill_blank_problems, pool=german_fill_blank_pool)
+register_problem_generator("german", "grammar", generate_grammar_problems,
+    pool=lambda grade, settings: GERMAN_GRAMMAR_GRADE2 if grade == 2 else GERMAN_GRAMMAR_GRADE3)
+register_problem_generator("german", "articles", generate_article_problems,
+    pool=lambda grade, settings: GERMAN_ARTICLE_WORDS)
+register_problem_generator("german", "sentence_order", generate_sentence_order_problems,
+    pool=get_sentence_order_candidates)
+
+register_problem_generator("english", "vocabulary_de_en", generate_vocabulary_de_en_problems, cost=2.0,
+    pool=english_vocabulary_pool)
+register_problem_generator("english", "vocabulary_en_de", generate_vocabulary_en_de_problems,
+    pool=lambda grade, settings: ENGLISH_EN_DE_VOCABULARY_GRADE2 if grade == 2 else ENGLISH_EN_DE_VOCABULARY_GRADE3)
+register_problem_generator("english", "simple_sentences", generate_simple_sentence_problems,
+    pool=english_sentences_pool)
+register_problem_generator("english", "basic_grammar", generate_basic_grammar_problems,
+    pool=lambda grade, settings: ENGLISH_GRAMMAR_GRADE2 if grade == 2 else ENGLISH_GRAMMAR_GRADE3)
+register_problem_generator("english", "colors_numbers", generate_colors_numbers_problems,
+    pool=lambda grade, settings: ENGLISH_COLORS_NUMBERS)
+register_problem_generator("english", "animals_objects", generate_animals_objects_problems,
+    pool=lambda grade, settings: ENGLISH_ANIMALS_OBJECTS)
+
+# Compiled allocations, keyed by (subject, grade, count, enabled types, difficulty settings); settings are
+# client-controlled, so only the PROBLEM_PLAN_CACHE_SIZE most recently used plans are kept
+PROBLEM_PLAN_CACHE_SIZE = 256
+_PROBLEM_PLAN_CACHE: "OrderedDict[tuple, List[Tuple[str, int, Optional[int]]]]" = OrderedDict()
+
+def plan_problem_allocation(subject: str, grade: int, count: int, settings) -> List[Tuple[str, int, Optional[int]]]:
+    """Compile settings into an exact per-type allocation (type, count, capacity) that sums to count where capacity allows"""
+    registry = PROBLEM_GENERATORS[subject]
+    enabled_types = tuple(k for k, v in settings.problem_types.items() if v and k in registry)
+    if not enabled_types:
+        enabled_types = tuple(DEFAULT_PROBLEM_TYPES[subject])  # fallback
+    
+    # Capacities depend on the difficulty filters, so their settings are part of the key
+    difficulty = tuple(sorted(getattr(settings, "difficulty_settings", {}).items()))
+    cache_key = (subject, grade, count, enabled_types, difficulty)
+    plan = _PROBLEM_PLAN_CACHE.get(cache_key)
+    if plan is not None:
+        _PROBLEM_PLAN_CACHE.move_to_end(cache_key)
+        cache_requests_total.inc("problem_plan", "hit")
+        return plan
+    cache_requests_total.inc("problem_plan", "miss")
+    
+    capacities = {t: registry[t].capacity(grade, settings) for t in enabled_types}
+    allocation = {t: 0 for t in enabled_types}
+    remaining = count
+    active = list(enabled_types)
+    
+    # Split evenly (earlier types get the remainder), then hand capped-out shares to the rest
+    while remaining > 0 and active:
+        share, extra = divmod(remaining, len(active))
+        still_open = []
+        for i, problem_type in enumerate(active):
+            wanted = share + (1 if i < extra else 0)
+            capacity = capacities[problem_type]
+            if capacity is not None:
+                wanted = min(wanted, capacity - allocation[problem_type])
+            allocation[problem_type] += wanted
+            remaining -= wanted
+            if capacity is None or allocation[problem_type] < capacity:
+                still_open.append(problem_type)
+        active = still_open
+    
+    plan = [(t, allocation[t], capacities[t]) for t in enabled_types if allocation[t] > 0]
+    _PROBLEM_PLAN_CACHE[cache_key] = plan
+    if len(_PROBLEM_PLAN_CACHE) > PROBLEM_PLAN_CACHE_SIZE:
+        _PROBLEM_PLAN_CACHE.popitem(last=False)
+    return plan
+
+async def run_problem_generator(generator: ProblemGenerator, count: int, grade: int, settings) -> list:
+    """Run a single registered generator (single place for batching, caching and metrics)"""
+    start = time.perf_counter()
+    try:
+        return await generator.generate(count, grade, settings)
+    finally:
+        problem_generation_seconds.observe(time.perf_counter() - start, generator.subject, generator.problem_type)
+
+def problem_key(problem) -> tuple:
+    """Identity of a generated problem; the question alone repeats across items of types like spelling"""
+    return (problem.question, problem.correct_answer)
+
+async def generate_planned_problems(subject: str, grade: int, count: int, settings) -> list:
+    """Generate exactly `count` problems for a subject by running the planned generators"""
+    registry = PROBLEM_GENERATORS[subject]
+    plan = plan_problem_allocation(subject, grade, count, settings)
+    
+    # The generators are CPU-bound, so they run one after the other rather than as concurrent tasks
+    problems = []
+    shortfall = 0
+    headroom = []
+    for problem_type, wanted, capacity in plan:
+        try:
+            result = await run_problem_generator(registry[problem_type], wanted, grade, settings)
+        except Exception as e:
+            print(f"⚠️  Warning: Failed to generate {subject} {problem_type} problems: {e}")
+            shortfall += wanted
+            continue
+        problems.extend(result[:wanted])
+        shortfall += max(0, wanted - len(result))
+        if len(result) >= wanted and (capacity is None or capacity > wanted):
+            headroom.append((registry[problem_type], wanted, capacity))
+    
+    # Top up from types with content left, preferring unlimited and cheap ones. A pooled type is asked for its
+    # earlier share plus the shortfall (at most its capacity), and items already drawn from it are skipped
+    if shortfall > 0 and headroom:
+        headroom.sort(key=lambda entry: (entry[2] is not None, entry[0].cost))
+        drawn = {problem_key(problem) for problem in problems}
+        for generator, wanted, capacity in headroom:
+            requested = shortfall if capacity is None else min(capacity, wanted + shortfall)
+            try:
+                extra = await run_problem_generator(generator, requested, grade, settings)
+            except Exception as e:
+                print(f"⚠️  Warning: Failed to top up {subject} {generator.problem_type} problems: {e}")
+                continue
+            for problem in extra:
+                if shortfall <= 0:
+                    break
+                if capacity is None or problem_key(problem) not in drawn:
+                    drawn.add(problem_key(problem))
+                    problems.append(problem)
+                    shortfall -= 1
+            if shortfall <= 0:
+                break
+    
+    random.shuffle(problems)
+    return problems[:count]
+
+# Conditional GET helpers
+def etag_matches(request: Request, etag: str) -> bool:
+    """Check the request's If-None-Match header against an ETag"""
+    if_none_match = request.headers.get("if-none-match")
+    if not if_none_match:
+        return False
+    candidates = [candidate.strip() for candidate in if_none_match.split(",")]
+    return "*" in candidates or etag in candidates or f"W/{etag}" in candidates
+
+# Collection versions: bumped on every write, used as ETags for the read endpoints
+VERSIONED_COLLECTIONS = [
+    "tasks", "week_stars", "weekly_progress", "rewards",
+    "math_settings", "german_settings", "english_settings"
+]
+# Writes in this process invalidate its cache at once; writes by other processes are only seen once an entry
+# is older than the TTL, so with several processes a conditional GET can answer 304 for that long. 0 turns the cache off.
+VERSION_CACHE_TTL_SECONDS = float(os.environ.get('VERSION_CACHE_TTL_SECONDS', '2'))
+# collection -> (version, fetched_at, generation); a bump replaces the entry with (None, 0.0, generation + 1)
+_version_cache: Dict[str, Tuple[Optional[int], float, int]] = {}
+
+async def get_collection_versions(collections: List[str]) -> Dict[str, int]:
+    """Current version of each collection, served from the in-process cache when fresh"""
+    now = time.monotonic()
+    versions = {}
+    missing = {}  # collection -> generation when the read started
+    for name in collections:
+        version, fetched_at, generation = _version_cache.get(name, (None, 0.0, 0))
+        if version is not None and now - fetched_at < VERSION_CACHE_TTL_SECONDS:
+            versions[name] = version
+            cache_requests_total.inc("collection_versions", "hit")
+        else:
+            missing[name] = generation
+            cache_requests_total.inc("collection_versions", "miss")
+    
+    if missing:
+        docs = await db.collection_versions.find({"_id": {"$in": list(missing)}}).to_list(len(missing))
+        found = {doc["_id"]: doc.get("version", 0) for doc in docs}
+        for name, generation in missing.items():
+            versions[name] = found.get(name, 0)
+            # A bump during the read may have made this version stale; only cache it if none happened
+            if _version_cache.get(name, (None, 0.0, 0))[2] == generation:
+                _version_cache[name] = (versions[name], now, generation)
+    
+    return versions
+
+# Server-push events
+SSE_HEARTBEAT_SECONDS = float(os.environ.get('SSE_HEARTBEAT_SECONDS', '15'))
+EVENT_QUEUE_SIZE = 100
+EVENT_REPLAY_SIZE = 500  # recent events kept for clients reconnecting with Last-Event-ID
+PROGRESS_COLLECTIONS = {"weekly_progress", "week_stars"}  # writes to these push fresh totals as a progress event
+
+class EventBus:
+    """In-process pub/sub feeding /events; a subscriber that falls behind gets a resync instead of blocking writers"""
+    def __init__(self):
+        self._subscribers = set()
+        self._next_id = 0
+        self._epoch = uuid.uuid4().hex[:8]  # in every event id, so ids from another process or an earlier run never match
+        self._recent: Deque[Tuple[int, str, Dict[str, Any]]] = deque(maxlen=EVENT_REPLAY_SIZE)
+
+    @property
+    def has_subscribers(self) -> bool:
+        return bool(self._subscribers)
+
+    def event_id(self, number: int) -> str:
+        return f"{self._epoch}-{number}"
+
+    def subscribe(self) -> asyncio.Queue:
+        queue = asyncio.Queue(maxsize=EVENT_QUEUE_SIZE)
+        self._subscribers.add(queue)
+        return queue
+
+    def unsubscribe(self, queue: asyncio.Queue):
+        self._subscribers.discard(queue)
+
+    def replay(self, last_event_id: str) -> Optional[List[Tuple[int, str, Dict[str, Any]]]]:
+        """Events published after `last_event_id`, or None when some of them are no longer (or never were) here"""
+        epoch, _, number = last_event_id.partition("-")
+        if epoch != self._epoch or not number.isdigit() or int(number) > self._next_id:
+            return None
+        last = int(number)
+        if last < self._next_id and self._recent[0][0] > last + 1:
+            return None
+        return [event for event in self._recent if event[0] > last]
+
+    def publish(self, event_type: str, data: Dict[str, Any]):
+        self._next_id += 1
+        self._recent.append((self._next_id, event_type, data))
+        for queue in list(self._subscribers):
+            try:
+                queue.put_nowait((self._next_id, event_type, data))
+            except asyncio.QueueFull:
+                # Drop the backlog; the client refetches everything on resync
+                while not queue.empty():
+                    queue.get_nowait()
+                queue.put_nowait((self._next_id, "resync", {}))
+
+event_bus = EventBus()
+
+def publish_star_cells(week_start: datetime, cells: Dict[Tuple[str, int], int]):
+    """Push one star event per written cell"""
+    for (task_id, slot), stars in cells.items():
+        event_bus.publish("star", {"task_id": task_id, "day": WEEK_DAYS[slot], "stars": stars, "week_start": week_start})
+
+async def load_progress_totals() -> Dict[str, Any]:
+    """The current week's star totals (earned from the row sums, the rest from the progress document)"""
+    week_start = get_current_week_start()
+    progress, total_stars_earned = await asyncio.gather(
+        db.weekly_progress.find_one({"week_start": week_start}, {"_id": 0}),
+        sum_week_stars(week_start)
+    )
+    progress = progress or {}
+    total_stars_used = progress.get("total_stars_used", 0)
+    return {
+        "week_start": week_start,
+        "total_stars_earned": total_stars_earned,
+        "total_stars_used": total_stars_used,
+        "available_stars": progress.get("available_stars", 0),
+        "stars_in_safe": progress.get("stars_in_safe", 0),
+        "total_stars": total_stars_earned - total_stars_used
+    }
+
+def format_sse(event_type: str, data: Dict[str, Any], event_id: Optional[str] = None) -> str:
+    """One server-sent event frame"""
+    frame = f"event: {event_type}\ndata: {dumps_json(data).decode('utf-8')}\n\n"
+    return f"id: {event_id}\n{frame}" if event_id is not None else frame
+
+async def bump_collection_versions(*collections: str):
+    """Increment the version of each written collection (one round trip) and refresh the local cache"""
+    if not collections:
+        return
+    await db.collection_versions.bulk_write(
+        [UpdateOne({"_id": name}, {"$inc": {"version": 1}}, upsert=True) for name in collections],
+        ordered=False
+    )
+    for name in collections:
+        _version_cache[name] = (None, 0.0, _version_cache.get(name, (None, 0.0, 0))[2] + 1)
+    
+    # Always kept for replay to reconnecting clients; the totals cost two reads, so only while someone listens
+    event_bus.publish("changed", {"collections": list(collections)})
+    if event_bus.has_subscribers and PROGRESS_COLLECTIONS & set(collections):
+        event_bus.publish("progress", await load_progress_totals())
+    
+    if _preload_payload is not None and set(collections) & set(PRELOAD_SETTINGS_COLLECTIONS):
+        schedule_preload_refresh()
+
+async def versioned_json_response(request: Request, collections: List[str], load, week_scoped: bool = False) -> Response:
+    """Serve a read endpoint with a version-based ETag; a matching If-None-Match skips the load entirely"""
+    versions = await get_collection_versions(collections)
+    parts = [f"{name}.{versions[name]}" for name in collections]
+    if week_scoped:
+        # Week-scoped data changes at the start of a new week even without writes
+        parts.append(get_current_week_start().strftime("%Y%m%d"))
+    if request.url.query:
+        # Pages and projections of the same data are different representations
+        parts.append(f"{zlib.crc32(request.url.query.encode('utf-8')):08x}")
+    etag = f'"v-{"-".join(parts)}"'
+    
+    headers = {"ETag": etag, "Cache-Control": "no-cache"}
+    if etag_matches(request, etag):
+        cache_requests_total.inc("conditional_get", "hit")
+        return Response(status_code=304, headers=headers)
+    cache_requests_total.inc("conditional_get", "miss")
+    
+    content = await load()
+    if isinstance(content, Page):
+        if content.next_cursor:
+            headers["X-Next-Cursor"] = content.next_cursor
+        content = content.items
+    return FastJSONResponse(content=content, headers=headers)
+
+# Cursor pagination
+DEFAULT_PAGE_SIZE = int(os.environ.get('DEFAULT_PAGE_SIZE', '1000'))
+MAX_PAGE_SIZE = 1000
+
+@dataclass
+class Page:
+    """One page of a list endpoint; the body stays a plain list and the cursor goes in X-Next-Cursor"""
+    items: List[Dict[str, Any]]
+    next_cursor: Optional[str] = None
+
+def encode_cursor(values: List[Any]) -> str:
+    return base64.urlsafe_b64encode(dumps_json(values)).decode("ascii")
+
+def decode_cursor(cursor: str, model, keys: Tuple[str, ...]) -> List[Any]:
+    """Keyset values from an opaque cursor, with datetimes restored"""
+    try:
+        values = json.loads(base64.urlsafe_b64decode(cursor.encode("ascii")))
+        if len(values) != len(keys):
+            raise ValueError("cursor length")
+        return [
+            datetime.fromisoformat(value) if model.model_fields[key].annotation is datetime and value is not None else value
+            for key, value in zip(keys, values)
+        ]
+    except (ValueError, TypeError, binascii.Error):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+def keyset_filter(keys: Tuple[str, ...], values: List[Any]) -> Dict[str, Any]:
+    """Documents strictly after `values` in (keys...) order"""
+    clauses = []
+    for position, key in enumerate(keys):
+        clause = {previous: values[index] for index, previous in enumerate(keys[:position])}
+        clause[key] = {"$gt": values[position]}
+        clauses.append(clause)
+    return clauses[0] if len(clauses) == 1 else {"$or": clauses}
+
+def requested_fields(model, fields: Optional[str]) -> Optional[List[str]]:
+    """Parse a comma-separated `fields` parameter against a model's fields"""
+    if not fields:
+        return None
+    requested = [field.strip() for field in fields.split(",") if field.strip()]
+    unknown = [field for field in requested if field not in model.model_fields]
+    if unknown:
+        raise HTTPException(status_code=400, detail=f"Unknown fields: {', '.join(unknown)}")
+    return requested
+
+async def find_page(collection, query: Dict[str, Any], model, keys: Tuple[str, ...],
+                    limit: Optional[int] = None, cursor: Optional[str] = None, fields: Optional[str] = None) -> Page:
+    """One keyset page of `collection` ordered by `keys`, projected to the requested model fields"""
+    limit = max(1, min(limit or DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE))
+    selected = requested_fields(model, fields)
+    if selected is None:
+        projection = model_projection(model)
+    else:
+        projection = {"_id": 0, **{field: 1 for field in selected}, **{key: 1 for key in keys}}
+    if cursor:
+        query = {**query, **keyset_filter(keys, decode_cursor(cursor, model, keys))}
+    
+    docs = await collection.find(query, projection).sort([(key, 1) for key in keys]).limit(limit + 1).to_list(limit + 1)
+    next_cursor = None
+    if len(docs) > limit:
+        docs = docs[:limit]
+        next_cursor = encode_cursor([docs[-1].get(key) for key in keys])
+    if selected is not None:
+        # Keyset fields were only fetched to build the cursor
+        docs = [{field: doc[field] for field in selected if field in doc} for doc in docs]
+    return Page(fill_model_defaults(model, docs, selected), next_cursor)
+
 # Task Management Endpoints
 @api_router.post("/tasks", response_model=Task)
 async def create_task(task_data: TaskCreate):
     task = Task(name=task_data.name)
     await db.tasks.insert_one(task.dict())
+    await bump_collection_versions("tasks")
     return task
 
 @api_router.get("/tasks", response_model=List[Task])
-async def get_tasks():
-    tasks = await db.tasks.find().to_list(1000)
-    return [Task(**task) for task in tasks]
+async def get_tasks(request: Request, limit: Optional[int] = None, cursor: Optional[str] = None, fields: Optional[str] = None):
+    return await versioned_json_response(request, ["tasks"], lambda: load_tasks(limit, cursor, fields))
+
+async def load_tasks(limit: Optional[int] = None, cursor: Optional[str] = None, fields: Optional[str] = None) -> Page:
+    return await find_page(db.tasks, {}, Task, ("created_at", "id"), limit, cursor, fields)
 
 @api_router.delete("/tasks/{task_id}")
 async def delete_task(task_id: str):
@@ -2064,9 +3431,155 @@ async def delete_task(task_id: str):
     if result.deleted_count == 0:
         raise HTTPException(status_code=404, detail="Task not found")
     # Also delete associated stars
-    await db.daily_stars.delete_many({"task_id": task_id})
+    await db.week_stars.delete_many({"task_id": task_id})
+    await bump_collection_versions("tasks", "week_stars")
     return {"message": "Task deleted"}
 
+# Week-row star storage
+def day_slot(day: str) -> int:
+    """Array slot of a weekday name in a week row"""
+    try:
+        return WEEK_DAYS.index(day.lower())
+    except ValueError:
+        raise HTTPException(status_code=400, detail=f"Unknown day: {day}")
+
+def expand_week_row(row: Dict[str, Any]) -> List[Dict[str, Any]]:
+    """API shape of a stored week row: one DailyStar cell per day with stars"""
+    return [
+        {
+            "id": f"{row['id']}-{slot}",
+            "task_id": row["task_id"],
+            "day": day,
+            "stars": row["stars"][slot],
+            "week_start": row["week_start"]
+        }
+        for slot, day in enumerate(WEEK_DAYS) if row["stars"][slot]
+    ]
+
+def build_week_rows(cells: List[Dict[str, Any]]) -> List[WeekStars]:
+    """Fold per-day star documents (old storage or old backups) into week rows"""
+    rows: Dict[Tuple[str, datetime], WeekStars] = {}
+    for cell in cells:
+        week_start = cell["week_start"]
+        if isinstance(week_start, str):
+            week_start = datetime.fromisoformat(week_start)
+        day = str(cell.get("day", "")).lower()
+        if day not in WEEK_DAYS:
+            continue
+        key = (cell["task_id"], week_start)
+        row = rows.setdefault(key, WeekStars(task_id=cell["task_id"], week_start=week_start))
+        row.stars[WEEK_DAYS.index(day)] = cell.get("stars", 0)
+    for row in rows.values():
+        row.total = sum(row.stars)
+    return list(rows.values())
+
+async def sum_week_stars(week_start: datetime) -> int:
+    """Stars earned in a week, from the cached row sums (summed by the server, however many rows the week has)"""
+    result = await db.week_stars.aggregate([
+        {"$match": {"week_start": week_start}},
+        {"$group": {"_id": None, "total": {"$sum": "$total"}}}
+    ]).to_list(1)
+    return result[0]["total"] if result else 0
+
+async def set_star_cell(task_id: str, week_start: datetime, slot: int, stars: int):
+    """Set one slot of a week row and move the row sum by the difference, in one update guarded by the slot as read"""
+    row_filter = {"task_id": task_id, "week_start": week_start}
+    while True:
+        row = await db.week_stars.find_one(row_filter, {"_id": 0, "stars": 1})
+        if row is None:
+            row = WeekStars(task_id=task_id, week_start=week_start)
+            row.stars[slot] = stars
+            row.total = stars
+            result = await db.week_stars.update_one(
+                row_filter,
+                {"$setOnInsert": {key: value for key, value in row.dict().items() if key not in row_filter}},
+                upsert=True
+            )
+            if result.upserted_id is not None:
+                return
+            continue  # another request created the row first; write the slot into that one
+        
+        old_stars = row["stars"][slot]
+        if old_stars == stars:
+            return
+        result = await db.week_stars.update_one(
+            {**row_filter, f"stars.{slot}": old_stars},
+            {"$set": {f"stars.{slot}": stars}, "$inc": {"total": stars - old_stars}}
+        )
+        if result.matched_count:
+            return
+        # The slot changed between the read and the update; read it again
+
+async def write_star_cells(week_start: datetime, cells: Dict[Tuple[str, int], int]):
+    """Apply many (task_id, slot) -> stars cells with one read and one unordered bulk write"""
+    slots_by_task: Dict[str, Dict[int, int]] = {}
+    for (task_id, slot), stars in cells.items():
+        slots_by_task.setdefault(task_id, {})[slot] = stars
+    
+    rows = await db.week_stars.find(
+        {"week_start": week_start, "task_id": {"$in": list(slots_by_task)}},
+        {"_id": 0, "task_id": 1, "stars": 1}
+    ).to_list(len(slots_by_task))
+    current = {row["task_id"]: row["stars"] for row in rows}
+    
+    operations = []
+    updates = inserts = 0
+    for task_id, slots in slots_by_task.items():
+        row_filter = {"task_id": task_id, "week_start": week_start}
+        if task_id in current:
+            old_stars = current[task_id]
+            changed = {slot: stars for slot, stars in slots.items() if old_stars[slot] != stars}
+            if not changed:
+                continue
+            # Guard on the row as read, so the $inc can't apply to a row changed in between
+            operations.append(UpdateOne(
+                {**row_filter, "stars": old_stars},
+                {
+                    "$set": {f"stars.{slot}": stars for slot, stars in changed.items()},
+                    "$inc": {"total": sum(stars - old_stars[slot] for slot, stars in changed.items())}
+                }
+            ))
+            updates += 1
+        else:
+            row = WeekStars(task_id=task_id, week_start=week_start)
+            for slot, stars in slots.items():
+                row.stars[slot] = stars
+            row.total = sum(row.stars)
+            operations.append(UpdateOne(
+                row_filter,
+                {"$setOnInsert": {key: value for key, value in row.dict().items() if key not in row_filter}},
+                upsert=True
+            ))
+            inserts += 1
+    
+    if not operations:
+        return
+    result = await db.week_stars.bulk_write(operations, ordered=False)
+    if result.matched_count != updates or result.upserted_count != inserts:
+        # A concurrent write got between the read and the bulk write; the per-cell path is safe to replay
+        for (task_id, slot), stars in cells.items():
+            await set_star_cell(task_id, week_start, slot, stars)
+
+async def migrate_daily_stars_to_week_rows() -> int:
+    """Move per-day daily_stars documents (previous storage) into week rows, then drop them"""
+    cells = await db.daily_stars.find({}, {"_id": 0}).to_list(length=None)
+    if not cells:
+        return 0
+    
+    rows = build_week_rows(cells)
+    await db.week_stars.bulk_write([
+        UpdateOne(
+            {"task_id": row.task_id, "week_start": row.week_start},
+            {"$set": {"stars": row.stars, "total": row.total}, "$setOnInsert": {"id": row.id}},
+            upsert=True
+        )
+        for row in rows
+    ], ordered=False)
+    await db.daily_stars.drop()
+    await bump_collection_versions("week_stars")
+    print(f"⭐ Migrated {len(cells)} daily star documents into {len(rows)} week rows")
+    return len(rows)
+
 # Star Management Endpoints
 @api_router.post("/stars/{task_id}/{day}")
 async def update_stars(task_id: str, day: str, stars: int):
@@ -2075,31 +3588,59 @@ async def update_stars(task_id: str, day: str, stars: int):
     
     week_start = get_current_week_start()
     
-    # Update or create daily star record
-    daily_star = DailyStar(task_id=task_id, day=day, stars=stars, week_start=week_start)
-    await db.daily_stars.replace_one(
-        {"task_id": task_id, "day": day, "week_start": week_start},
-        daily_star.dict(),
-        upsert=True
-    )
+    # Update one slot of the task's week row
+    slot = day_slot(day)
+    await set_star_cell(task_id, week_start, slot, stars)
+    publish_star_cells(week_start, {(task_id, slot): stars})
+    await bump_collection_versions("week_stars")
     return {"message": "Stars updated"}
 
-@api_router.get("/stars")
-async def get_current_week_stars():
+@api_router.post("/stars/batch")
+async def update_stars_batch(batch: StarBatchUpdate):
+    """Apply many star cells with one bulk write and return the updated progress"""
+    if any(cell.stars < 0 or cell.stars > 2 for cell in batch.cells):
+        raise HTTPException(status_code=400, detail="Stars must be between 0 and 2")
+    
     week_start = get_current_week_start()
-    stars = await db.daily_stars.find({"week_start": week_start}).to_list(1000)
-    return [DailyStar(**star) for star in stars]
+    
+    # Last write wins for repeated cells, since an unordered bulk write has no order guarantee
+    cells = {(cell.task_id, day_slot(cell.day)): cell.stars for cell in batch.cells}
+    if cells:
+        await write_star_cells(week_start, cells)
+        publish_star_cells(week_start, cells)
+    
+    # load_weekly_progress recalculates the earned total from the stars just written
+    progress = await load_weekly_progress()
+    await bump_collection_versions("week_stars", "weekly_progress")
+    return {"message": "Stars updated", "updated": len(cells), "progress": progress}
+
+@api_router.get("/stars")
+async def get_current_week_stars(request: Request, limit: Optional[int] = None, cursor: Optional[str] = None, fields: Optional[str] = None):
+    return await versioned_json_response(
+        request, ["week_stars"], lambda: load_current_week_stars(limit, cursor, fields), week_scoped=True
+    )
+
+async def load_current_week_stars(limit: Optional[int] = None, cursor: Optional[str] = None, fields: Optional[str] = None) -> Page:
+    """Current week's star cells, paged by week row (task)"""
+    selected = requested_fields(DailyStar, fields)
+    page = await find_page(db.week_stars, {"week_start": get_current_week_start()}, WeekStars, ("task_id",), limit, cursor)
+    cells = [cell for row in page.items for cell in expand_week_row(row)]
+    if selected is not None:
+        cells = [{field: cell[field] for field in selected} for cell in cells]
+    return Page(cells, page.next_cursor)
 
 # Weekly Progress Endpoints
 @api_router.get("/progress")
-async def get_weekly_progress():
+async def get_weekly_progress(request: Request):
+    return await versioned_json_response(request, ["weekly_progress", "week_stars"], load_weekly_progress, week_scoped=True)
+
+async def load_weekly_progress() -> dict:
     week_start = get_current_week_start()
     progress = await db.weekly_progress.find_one({"week_start": week_start})
     
     if not progress:
         # Calculate total stars for current week
-        stars = await db.daily_stars.find({"week_start": week_start}).to_list(1000)
-        total_stars_earned = sum(star["stars"] for star in stars)
+        total_stars_earned = await sum_week_stars(week_start)
         
         progress_obj = WeeklyProgress(
             week_start=week_start, 
@@ -2116,8 +3657,7 @@ async def get_weekly_progress():
         return result
     
     # Recalculate total stars from tasks
-    stars = await db.daily_stars.find({"week_start": week_start}).to_list(1000)
-    total_stars_earned = sum(star["stars"] for star in stars)
+    total_stars_earned = await sum_week_stars(week_start)
     
     # Create a clean dict without MongoDB ObjectId
     clean_progress = {
@@ -2132,8 +3672,10 @@ async def get_weekly_progress():
     # Add computed total_stars field
     clean_progress["total_stars"] = clean_progress["total_stars_earned"] - clean_progress["total_stars_used"]
     
-    # Update the database with clean data
-    await db.weekly_progress.replace_one({"week_start": week_start}, clean_progress)
+    # Update the database with clean data, only when normalizing changed something
+    stored = {key: value for key, value in progress.items() if key not in ("_id", "sync_seq", "updated_at")}
+    if stored != clean_progress:
+        await db.weekly_progress.replace_one({"week_start": week_start}, clean_progress)
     return clean_progress
 
 @api_router.post("/progress/add-to-safe")
@@ -2182,6 +3724,7 @@ async def add_stars_to_safe(request: AddStarsRequest):
     clean_progress["total_stars"] = clean_progress["total_stars_earned"] - clean_progress["total_stars_used"]
     
     await db.weekly_progress.replace_one({"week_start": week_start}, clean_progress)
+    await bump_collection_versions("weekly_progress")
     return clean_progress
 
 @api_router.post("/progress/move-reward-to-safe")
@@ -2217,6 +3760,7 @@ async def move_reward_stars_to_safe(request: AddStarsRequest):
     }
     
     await db.weekly_progress.replace_one({"week_start": week_start}, clean_progress)
+    await bump_collection_versions("weekly_progress")
     
     return {
         "success": True,
@@ -2241,12 +3785,14 @@ async def withdraw_stars_from_safe(request: WithdrawStarsRequest):
     progress["available_stars"] = progress.get("available_stars", 0) + stars
     
     await db.weekly_progress.replace_one({"week_start": week_start}, progress)
+    await bump_collection_versions("weekly_progress")
     return WeeklyProgress(**progress)
 
 @api_router.delete("/rewards/all")
 async def delete_all_rewards():
     """Delete all rewards"""
     result = await db.rewards.delete_many({})
+    await bump_collection_versions("rewards")
     return {"message": f"All rewards deleted ({result.deleted_count} rewards removed)"}
 
 @api_router.post("/progress/reset-safe")
@@ -2259,186 +3805,831 @@ async def reset_safe_only():
     if progress:
         progress["stars_in_safe"] = 0
         await db.weekly_progress.replace_one({"week_start": week_start}, progress)
+        await bump_collection_versions("weekly_progress")
     
     return {"message": "Safe stars reset successfully (all other stars preserved)"}
 
-def convert_objectid_to_str(obj):
-    """Convert MongoDB ObjectId to string for JSON serialization"""
-    from bson import ObjectId
-    
-    if isinstance(obj, ObjectId):
-        return str(obj)
-    elif isinstance(obj, dict):
-        return {key: convert_objectid_to_str(value) for key, value in obj.items()}
-    elif isinstance(obj, list):
-        return [convert_objectid_to_str(item) for item in obj]
-    else:
-        return obj
+# Incremental backups: documents with updated_at at or after `since`, plus tombstones of deletions since then
+SINGLETON_COLLECTIONS = (
+    "math_settings", "german_settings", "english_settings",
+    "math_statistics", "german_statistics", "english_statistics"
+)
+
+async def resolve_backup_since(since: Optional[str]) -> Optional[datetime]:
+    """Parse the watermark of a previous backup; None means a full export"""
+    if since is None:
+        return None
+    try:
+        parsed = datetime.fromisoformat(since)
+    except ValueError:
+        raise HTTPException(status_code=400, detail=f"Invalid since: {since}")
+    if parsed.tzinfo is not None:
+        parsed = parsed.astimezone(timezone.utc).replace(tzinfo=None)
+    counter = await db.counters.find_one({"_id": "sync_seq"}) or {}
+    if counter.get("restored_at") and parsed < counter["restored_at"]:
+        # A restore swapped whole collections without tombstones, a delta can't describe that
+        raise HTTPException(status_code=409, detail="A backup was restored after this watermark, take a full backup")
+    if counter.get("tombstones_pruned_at") and parsed < counter["tombstones_pruned_at"]:
+        raise HTTPException(status_code=409, detail="Deletions after this watermark were pruned, take a full backup")
+    return parsed
+
+def backup_filter(since: Optional[datetime]) -> Dict[str, Any]:
+    return {} if since is None else {"updated_at": {"$gte": since}}
+
+async def deleted_since(since: datetime, collections) -> Dict[str, List[str]]:
+    """Ids deleted at or after `since`, per collection"""
+    tombstones = await db.sync_tombstones.find(
+        {"deleted_at": {"$gte": since}, "collection": {"$in": list(collections)}}, {"_id": 0, "collection": 1, "id": 1}
+    ).to_list(length=None)
+    deleted: Dict[str, Dict[str, None]] = {}
+    for tombstone in tombstones:
+        deleted.setdefault(tombstone["collection"], {})[tombstone["id"]] = None
+    return {name: list(ids) for name, ids in deleted.items()}
 
 @api_router.get("/backup/export")
-async def export_all_data():
-    """Export all app data as JSON backup"""
+async def export_all_data(since: Optional[str] = None):
+    """Export all app data as JSON backup, or only what changed after `since` (a previous backup's watermark)"""
+    since_time = await resolve_backup_since(since)
     try:
-        # Get current week start
-        week_start = get_current_week_start()
+        # Everything written before the watermark is in this backup; the next incremental one starts there
+        watermark = current_backup_watermark()
+        query = backup_filter(since_time)
         
         # Collect all data
         backup_data = {
             "export_date": datetime.now().isoformat(),
             "app_version": "weekly_star_tracker_v1.0",
+            "watermark": watermark.isoformat(),
             "data": {}
         }
+        if since_time is not None:
+            backup_data["incremental"] = True
+            backup_data["since"] = since_time.isoformat()
         
         # Export tasks
-        tasks = await db.tasks.find().to_list(length=None)
-        backup_data["data"]["tasks"] = convert_objectid_to_str(tasks)
+        tasks = await db.tasks.find(query).to_list(length=None)
+        backup_data["data"]["tasks"] = tasks
         
-        # Export daily stars
-        daily_stars = await db.daily_stars.find().to_list(length=None)
-        backup_data["data"]["daily_stars"] = convert_objectid_to_str(daily_stars)
+        # Export star week rows
+        week_stars = await db.week_stars.find(query).to_list(length=None)
+        backup_data["data"]["week_stars"] = week_stars
         
         # Export weekly progress
-        progress = await db.weekly_progress.find().to_list(length=None)
-        backup_data["data"]["weekly_progress"] = convert_objectid_to_str(progress)
+        progress = await db.weekly_progress.find(query).to_list(length=None)
+        backup_data["data"]["weekly_progress"] = progress
         
         # Export rewards
-        rewards = await db.rewards.find().to_list(length=None)
-        backup_data["data"]["rewards"] = convert_objectid_to_str(rewards)
+        rewards = await db.rewards.find(query).to_list(length=None)
+        backup_data["data"]["rewards"] = rewards
         
         # Export settings
-        math_settings = await db.math_settings.find_one()
-        german_settings = await db.german_settings.find_one()
-        english_settings = await db.english_settings.find_one()
+        math_settings = await db.math_settings.find_one(query)
+        german_settings = await db.german_settings.find_one(query)
+        english_settings = await db.english_settings.find_one(query)
         
         backup_data["data"]["settings"] = {
-            "math": convert_objectid_to_str(math_settings),
-            "german": convert_objectid_to_str(german_settings),
-            "english": convert_objectid_to_str(english_settings)
+            "math": math_settings,
+            "german": german_settings,
+            "english": english_settings
         }
         
         # Export statistics
-        math_stats = await db.math_statistics.find().to_list(length=None)
-        german_stats = await db.german_statistics.find().to_list(length=None)
-        english_stats = await db.english_statistics.find().to_list(length=None)
+        math_stats = await db.math_statistics.find(query).to_list(length=None)
+        german_stats = await db.german_statistics.find(query).to_list(length=None)
+        english_stats = await db.english_statistics.find(query).to_list(length=None)
         
         backup_data["data"]["statistics"] = {
-            "math": convert_objectid_to_str(math_stats),
-            "german": convert_objectid_to_str(german_stats),
-            "english": convert_objectid_to_str(english_stats)
+            "math": math_stats,
+            "german": german_stats,
+            "english": english_stats
         }
         
-        return backup_data
+        # Export deletions
+        if since_time is not None:
+            backup_data["deleted"] = await deleted_since(since_time, BACKUP_COLLECTIONS)
+        
+        # ObjectIds and datetimes are serialized by FastJSONResponse, no tree walk needed
+        return FastJSONResponse(content=backup_data)
         
     except Exception as e:
         logging.error(f"Export failed: {e}")
         raise HTTPException(status_code=500, detail=f"Export failed: {str(e)}")
 
-@api_router.post("/backup/import")
-async def import_all_data(backup_data: dict):
-    """Import data from JSON backup"""
+# Streaming backup export: gzip-compressed NDJSON
+BACKUP_FORMAT = "weekly_star_tracker_ndjson"
+BACKUP_COLLECTIONS = [
+    "tasks", "week_stars", "weekly_progress", "rewards",
+    "math_settings", "german_settings", "english_settings",
+    "math_statistics", "german_statistics", "english_statistics"
+]
+EXPORT_BATCH_SIZE = 500
+
+async def iter_ndjson_export(since: Optional[datetime] = None) -> AsyncIterator[bytes]:
+    """Backup as NDJSON: a header line, then per collection a section line, its documents and an end line with the count
+
+    Incremental exports (`since` given) add a `__deleted__` line per id deleted since then before each end line.
+    """
+    header = {
+        "format": BACKUP_FORMAT,
+        "format_version": 2,
+        "app_version": "weekly_star_tracker_v1.0",
+        "export_date": datetime.now().isoformat(),
+        "mode": "full" if since is None else "incremental",
+        "watermark": current_backup_watermark().isoformat(),
+        "collections": BACKUP_COLLECTIONS
+    }
+    if since is not None:
+        header["since"] = since.isoformat()
+    yield dumps_json({"__header__": header}) + b"\n"
+    
+    query = backup_filter(since)
+    counts = {}
+    for name in BACKUP_COLLECTIONS:
+        yield dumps_json({"__section__": name}) + b"\n"
+        count = 0
+        lines = []
+        # Documents are read and written one batch at a time, so memory stays flat however large the collection
+        async for doc in db[name].find(query, {"_id": 0}).batch_size(EXPORT_BATCH_SIZE):
+            lines.append(dumps_json(doc))
+            count += 1
+            if len(lines) >= EXPORT_BATCH_SIZE:
+                yield b"\n".join(lines) + b"\n"
+                lines = []
+        if lines:
+            yield b"\n".join(lines) + b"\n"
+        counts[name] = count
+        if since is None:
+            yield dumps_json({"__end__": name, "count": count}) + b"\n"
+            continue
+        deleted = (await deleted_since(since, [name])).get(name, [])
+        if deleted:
+            yield b"\n".join(dumps_json({"__deleted__": doc_id}) for doc_id in deleted) + b"\n"
+        yield dumps_json({"__end__": name, "count": count, "deleted": len(deleted)}) + b"\n"
+    
+    yield dumps_json({"__footer__": {"counts": counts, "total": sum(counts.values())}}) + b"\n"
+
+async def gzip_stream(chunks: AsyncIterator[bytes]) -> AsyncIterator[bytes]:
+    """Gzip an async byte stream chunk by chunk"""
+    compressor = StreamCompressor("gzip")
+    async for chunk in chunks:
+        yield compressor.compress(chunk)
+    yield compressor.finish()
+
+@api_router.get("/backup/export/stream")
+async def export_all_data_stream(since: Optional[str] = None):
+    """Stream all app data, or what changed after `since`, as a gzip-compressed NDJSON backup file"""
+    since_time = await resolve_backup_since(since)
+    kind = "backup" if since_time is None else "incremental"
+    filename = f"weekly-star-tracker-{kind}-{datetime.now().strftime('%Y-%m-%d')}.ndjson.gz"
+    return StreamingResponse(
+        gzip_stream(iter_ndjson_export(since_time)),
+        media_type="application/gzip",
+        headers={"Content-Disposition": f'attachment; filename="{filename}"'}
+    )
+
+# Staged restore: each collection is loaded into a staging copy and swapped in with renameCollection
+IMPORT_BATCH_SIZE = 1000
+BACKUP_DELETED_BATCH_SIZE = 10000  # deleted ids per backup frame or delete_many, far below the 16MB document limit
+BACKUP_MODELS = {
+    "tasks": Task,
+    "week_stars": WeekStars,
+    "weekly_progress": WeeklyProgress,
+    "rewards": Reward,
+    "math_settings": MathSettings,
+    "german_settings": GermanSettings,
+    "english_settings": EnglishSettings,
+    "math_statistics": MathStatistics,
+    "german_statistics": GermanStatistics,
+    "english_statistics": EnglishStatistics
+}
+
+def datetime_fields(model) -> List[str]:
+    return [
+        name for name, field in model.model_fields.items()
+        if field.annotation is datetime or datetime in get_args(field.annotation)
+    ]
+
+BACKUP_DATETIME_FIELDS = {name: datetime_fields(model) for name, model in BACKUP_MODELS.items()}
+
+def prepare_backup_document(name: str, doc: Dict[str, Any]) -> Dict[str, Any]:
+    """JSON backups carry datetimes as ISO strings and _id as a string; restore the types, let Mongo assign _id"""
+    doc = {key: value for key, value in doc.items() if key != "_id"}
+    for field in BACKUP_DATETIME_FIELDS.get(name, []):
+        if isinstance(doc.get(field), str):
+            doc[field] = datetime.fromisoformat(doc[field])
+    return doc
+
+class CollectionRestore:
+    """Load one collection into a staging copy in batches, then swap it in; the live collection is untouched until commit"""
+    deletions = 0  # full backups carry no deletions
+
+    def __init__(self, name: str, seq: int):
+        self.name = name
+        self.staging_name = f"{name}__restore"
+        self.seq = seq
+        self.restored_at = datetime.utcnow()
+        self.count = 0
+        self._batch = []
+
+    async def start(self):
+        await db[self.staging_name].drop()
+        await db.create_collection(self.staging_name)
+
+    def _prepare(self, doc: Dict[str, Any]) -> Dict[str, Any]:
+        doc = prepare_backup_document(self.name, doc)
+        if self.name in STAMPED_COLLECTIONS:
+            # Staging collections bypass the write stamping
+            doc["sync_seq"] = self.seq
+            doc["updated_at"] = self.restored_at
+        return doc
+
+    @property
+    def received(self) -> int:
+        """Documents added so far, flushed or not"""
+        return self.count + len(self._batch)
+
+    async def add(self, doc: Dict[str, Any]):
+        self._batch.append(self._prepare(doc))
+        if len(self._batch) >= IMPORT_BATCH_SIZE:
+            await self._flush()
+
+    async def _flush(self):
+        if self._batch:
+            await db[self.staging_name].insert_many(self._batch, ordered=False)
+            self.count += len(self._batch)
+            self._batch = []
+
+    async def commit(self):
+        await self._flush()
+        await create_collection_indexes(self.name, db[self.staging_name])
+        await db[self.staging_name].rename(self.name, dropTarget=True)
+
+    async def abort(self):
+        self._batch = []
+        await db[self.staging_name].drop()
+
+class CollectionDelta:
+    """Changes to one collection from an incremental backup, staged in batches and applied on top of the live data at commit"""
+    def __init__(self, name: str):
+        self.name = name
+        self.staging_name = f"{name}__delta"
+        self.count = 0
+        self.deleted_count = 0
+        self.received = 0  # documents added so far, staged or not
+        self.deletions = 0
+        self._batch = []
+
+    async def start(self):
+        await db[self.staging_name].drop()
+
+    async def add(self, doc: Dict[str, Any]):
+        self._batch.append({"doc": prepare_backup_document(self.name, doc)})
+        self.received += 1
+        if len(self._batch) >= IMPORT_BATCH_SIZE:
+            await self._flush()
+
+    async def delete(self, doc_id: str):
+        self._batch.append({"deleted": doc_id})
+        self.deletions += 1
+        if len(self._batch) >= IMPORT_BATCH_SIZE:
+            await self._flush()
+
+    async def _flush(self):
+        if self._batch:
+            await db[self.staging_name].insert_many(self._batch)
+            self._batch = []
+
+    async def commit(self):
+        await self._flush()
+        staging = db[self.staging_name]
+        # Deletions first: a document deleted and created again after `since` must end up present
+        ids = []
+        async for entry in staging.find({"deleted": {"$exists": True}}).sort("_id", 1).batch_size(BACKUP_DELETED_BATCH_SIZE):
+            ids.append(entry["deleted"])
+            if len(ids) >= BACKUP_DELETED_BATCH_SIZE:
+                await self._apply_deletions(ids)
+                ids = []
+        await self._apply_deletions(ids)
+        docs = []
+        async for entry in staging.find({"doc": {"$exists": True}}).sort("_id", 1).batch_size(IMPORT_BATCH_SIZE):
+            docs.append(entry["doc"])
+            if len(docs) >= IMPORT_BATCH_SIZE:
+                await self._apply_documents(docs)
+                docs = []
+        await self._apply_documents(docs)
+        await staging.drop()
+
+    async def _apply_deletions(self, ids: List[str]):
+        if ids:
+            result = await db[self.name].delete_many({"id": {"$in": ids}})
+            self.deleted_count += result.deleted_count
+
+    async def _apply_documents(self, docs: List[Dict[str, Any]]):
+        if docs:
+            # Settings and statistics are one document per collection, replaced regardless of id
+            await db[self.name].bulk_write([
+                ReplaceOne({} if self.name in SINGLETON_COLLECTIONS else {"id": doc["id"]}, doc, upsert=True)
+                for doc in docs
+            ], ordered=False)
+            self.count += len(docs)
+
+    async def abort(self):
+        self._batch = []
+        await db[self.staging_name].drop()
+
+async def restore_collection(name: str, docs: List[Dict[str, Any]], seq: int) -> int:
+    """Replace a collection with `docs` all-or-nothing"""
+    restore = CollectionRestore(name, seq)
+    await restore.start()
     try:
-        # Validate backup format
-        if "data" not in backup_data or "app_version" not in backup_data:
-            raise HTTPException(status_code=400, detail="Invalid backup format")
-        
-        data = backup_data["data"]
-        import_results = {
-            "tasks": 0,
-            "progress": 0, 
-            "rewards": 0,
-            "settings": 0,
-            "statistics": 0,
-            "errors": []
-        }
+        for doc in docs:
+            await restore.add(doc)
+        await restore.commit()
+    except Exception:
+        await restore.abort()
+        raise
+    return restore.count
+
+async def apply_collection_delta(name: str, docs: List[Dict[str, Any]], deleted: List[str]) -> CollectionDelta:
+    """Upsert `docs` and delete `deleted` ids in one collection"""
+    delta = CollectionDelta(name)
+    await delta.start()
+    try:
+        for doc in docs:
+            await delta.add(doc)
+        for doc_id in deleted:
+            await delta.delete(doc_id)
+        await delta.commit()
+    except Exception:
+        await delta.abort()
+        raise
+    return delta
+
+async def finish_restore(restored: List[str], seq: int, incremental: bool = False):
+    """Invalidate caches, and after collections were swapped make sync clients and incremental backups start over"""
+    if not restored:
+        return
+    if not incremental:
+        await db.counters.update_one(
+            {"_id": "sync_seq"}, {"$max": {"reset_seq": seq, "restored_at": datetime.utcnow()}}, upsert=True
+        )
+    await bump_collection_versions(*[name for name in restored if name in VERSIONED_COLLECTIONS])
+
+def json_backup_sections(data: Dict[str, Any]) -> Dict[str, List[Dict[str, Any]]]:
+    """Collections and documents of a JSON backup; empty sections are left alone as before"""
+    sections = {}
+    for name in ["tasks", "weekly_progress", "rewards"]:
+        if data.get(name):
+            sections[name] = data[name]
+    if data.get("week_stars"):
+        sections["week_stars"] = data["week_stars"]
+    elif data.get("daily_stars"):
+        # Backups made before week rows
+        sections["week_stars"] = [row.dict() for row in build_week_rows(data["daily_stars"])]
+    for subject in ["math", "german", "english"]:
+        if (data.get("settings") or {}).get(subject):
+            sections[f"{subject}_settings"] = [data["settings"][subject]]
+        if (data.get("statistics") or {}).get(subject):
+            sections[f"{subject}_statistics"] = data["statistics"][subject]
+    return sections
+
+@dataclass
+class ImportResult:
+    counts: Dict[str, int]
+    errors: List[str]
+    deleted: Dict[str, int]
+    incremental: bool = False
+
+def import_results_summary(result: ImportResult) -> Dict[str, Any]:
+    """Import counts in the shape the frontend shows"""
+    counts = result.counts
+    return {
+        "tasks": counts.get("tasks", 0),
+        "week_stars": counts.get("week_stars", 0),
+        "progress": counts.get("weekly_progress", 0),
+        "rewards": counts.get("rewards", 0),
+        "settings": sum(1 for subject in ["math", "german", "english"] if counts.get(f"{subject}_settings")),
+        "statistics": sum(counts.get(f"{subject}_statistics", 0) for subject in ["math", "german", "english"]),
+        "deleted": sum(result.deleted.values()),
+        "errors": result.errors
+    }
+
+async def iter_ndjson_lines(chunks: AsyncIterator[bytes]) -> AsyncIterator[Dict[str, Any]]:
+    """Decode an NDJSON byte stream, gunzipping it on the fly when it starts with the gzip magic"""
+    decompressor = None
+    pending = b""
+    first = True
+    async for chunk in chunks:
+        if first and chunk:
+            first = False
+            if chunk[:2] == b"\x1f\x8b":
+                decompressor = zlib.decompressobj(wbits=31)
+        if decompressor is not None:
+            chunk = decompressor.decompress(chunk)
+        pending += chunk
+        *lines, pending = pending.split(b"\n")
+        for line in lines:
+            if line.strip():
+                yield loads_json(line)
+    if decompressor is not None:
+        pending += decompressor.flush()
+    for line in pending.split(b"\n"):
+        if line.strip():
+            yield loads_json(line)
+
+async def import_ndjson_stream(chunks: AsyncIterator[bytes], seq: int) -> ImportResult:
+    """Restore a streaming export section by section; a section is swapped in only if its end marker and count check out
+
+    Incremental exports are applied on top of the live collections instead of replacing them.
+    """
+    result = ImportResult(counts={}, errors=[], deleted={})
+    counts, errors = result.counts, result.errors
+    restore = None
+    failed_section = None
+    header_seen = False
+    
+    async for line in iter_ndjson_lines(chunks):
+        if not header_seen:
+            header = line.get("__header__") if isinstance(line, dict) else None
+            if not header or header.get("format") != BACKUP_FORMAT:
+                raise HTTPException(status_code=400, detail="Invalid backup format")
+            result.incremental = header.get("mode") == "incremental"
+            header_seen = True
+            continue
         
-        # Import tasks
-        if "tasks" in data and data["tasks"]:
+        if "__section__" in line:
+            name = line["__section__"]
+            if name not in BACKUP_MODELS:
+                errors.append(f"Unknown section skipped: {name}")
+                failed_section = name
+                continue
+            restore = CollectionDelta(name) if result.incremental else CollectionRestore(name, seq)
+            failed_section = None
+            await restore.start()
+        elif "__end__" in line:
+            if restore is not None:
+                try:
+                    if restore.received != line.get("count"):
+                        raise ValueError(f"expected {line.get('count')} documents, got {restore.received}")
+                    if restore.deletions != line.get("deleted", 0):
+                        raise ValueError(f"expected {line.get('deleted', 0)} deletions, got {restore.deletions}")
+                    await restore.commit()
+                    counts[restore.name] = restore.count
+                    if result.incremental:
+                        result.deleted[restore.name] = restore.deleted_count
+                except Exception as e:
+                    await restore.abort()
+                    errors.append(f"{restore.name} import failed: {str(e)}")
+            restore = None
+        elif "__footer__" in line:
+            break
+        elif "__deleted__" in line:
+            if not result.incremental:
+                raise HTTPException(status_code=400, detail="Deletions in a full backup")
+            if restore is not None:
+                await restore.delete(line["__deleted__"])
+            elif failed_section is None:
+                raise HTTPException(status_code=400, detail="Deletion outside of a section")
+        elif restore is not None:
             try:
-                # Clear existing tasks first
-                await db.tasks.delete_many({})
-                # Insert imported tasks
-                if data["tasks"]:
-                    await db.tasks.insert_many(data["tasks"])
-                    import_results["tasks"] = len(data["tasks"])
+                await restore.add(line)
             except Exception as e:
-                import_results["errors"].append(f"Tasks import failed: {str(e)}")
+                await restore.abort()
+                errors.append(f"{restore.name} import failed: {str(e)}")
+                failed_section, restore = restore.name, None
+        elif failed_section is None:
+            raise HTTPException(status_code=400, detail="Document outside of a section")
+    
+    if not header_seen:
+        raise HTTPException(status_code=400, detail="Empty backup")
+    if restore is not None:
+        # Upload ended in the middle of a section: keep the live collection
+        await restore.abort()
+        errors.append(f"{restore.name} import failed: backup is truncated")
+    return result
+
+# Binary backup: raw BSON documents, compressed per collection, with a manifest of counts and checksums
+#
+# File layout: BSON_BACKUP_MAGIC followed by BSON frames (each frame is one BSON document, so it carries its length):
+#   {"header": {...}}                          format, mode, watermark, codec
+#   {"section": name, "codec": codec}          starts a collection
+#   {"chunk": <bytes>}                         compressed piece of the collection's concatenated BSON documents
+#   {"deleted": [id, ...]}                     up to BACKUP_DELETED_BATCH_SIZE ids deleted from the collection (incremental)
+#   {"end": name, "count", "sha256", ...}      count and checksum of the uncompressed documents, number of ids deleted
+#   {"manifest": {"collections": {...}}}       every section's end entry, last frame of a complete file
+BSON_BACKUP_FORMAT = "weekly_star_tracker_bson"
+BSON_BACKUP_MAGIC = b"WSTBSON\x01"
+BSON_BACKUP_MEDIA_TYPE = "application/vnd.weekly-star-tracker.backup"
+BSON_BACKUP_CHUNK_SIZE = 256 * 1024
+BSON_BACKUP_MAX_FRAME_SIZE = 16 * 1024 * 1024  # Mongo's document limit; chunks stay far below it
+RAW_BSON_OPTIONS = CodecOptions(document_class=RawBSONDocument)
+
+def raw_backup_collection(name: str):
+    """Collection handle returning documents as undecoded BSON"""
+    return db[name].with_options(codec_options=RAW_BSON_OPTIONS)
+
+def compress_documents(compressor: StreamCompressor, documents: List[bytes], finish: bool = False) -> bytes:
+    """Compressed chunk of raw BSON documents; the last chunk of a section also flushes the compressor"""
+    chunk = compressor.compress(b"".join(documents))
+    return chunk + compressor.finish() if finish else chunk
+
+async def iter_bson_export(since: Optional[datetime] = None, offload: bool = False) -> AsyncIterator[bytes]:
+    """Binary backup of all collections (or what changed after `since`) in the layout above"""
+    async def compress(compressor, documents, finish=False):
+        # Background exports (snapshots) compress in a worker thread, so they don't hold up requests
+        if offload:
+            return await asyncio.to_thread(compress_documents, compressor, documents, finish)
+        return compress_documents(compressor, documents, finish)
+    
+    codec = "zstd" if zstandard is not None else "gzip"
+    header = {
+        "format": BSON_BACKUP_FORMAT,
+        "format_version": 2,
+        "app_version": "weekly_star_tracker_v1.0",
+        "export_date": datetime.now().isoformat(),
+        "mode": "full" if since is None else "incremental",
+        "watermark": current_backup_watermark().isoformat(),
+        "codec": codec,
+        "collections": BACKUP_COLLECTIONS
+    }
+    if since is not None:
+        header["since"] = since.isoformat()
+    yield BSON_BACKUP_MAGIC + bson.encode({"header": header})
+    
+    query = backup_filter(since)
+    manifest = {}
+    for name in BACKUP_COLLECTIONS:
+        yield bson.encode({"section": name, "codec": codec})
+        compressor = StreamCompressor(codec)
+        digest = hashlib.sha256()
+        count = size = compressed_size = 0
+        pending = []
+        pending_size = 0
+        # Documents go out as Mongo returned them, without a decode/encode round trip
+        async for doc in raw_backup_collection(name).find(query, {"_id": 0}).batch_size(EXPORT_BATCH_SIZE):
+            data = doc.raw
+            digest.update(data)
+            pending.append(data)
+            pending_size += len(data)
+            count += 1
+            if pending_size >= BSON_BACKUP_CHUNK_SIZE:
+                chunk = await compress(compressor, pending)
+                compressed_size += len(chunk)
+                yield bson.encode({"chunk": chunk})
+                size += pending_size
+                pending, pending_size = [], 0
+        chunk = await compress(compressor, pending, finish=True)
+        compressed_size += len(chunk)
+        size += pending_size
+        yield bson.encode({"chunk": chunk})
         
-        # Import daily stars
-        if "daily_stars" in data and data["daily_stars"]:
+        entry = {"count": count, "sha256": digest.digest(), "bytes": size, "compressed_bytes": compressed_size}
+        end = {"end": name, **entry}
+        if since is not None:
+            # Deleted ids go out in frames of their own, so no frame grows past Mongo's document limit
+            deleted = (await deleted_since(since, [name])).get(name, [])
+            for start in range(0, len(deleted), BACKUP_DELETED_BATCH_SIZE):
+                yield bson.encode({"deleted": deleted[start:start + BACKUP_DELETED_BATCH_SIZE]})
+            end["deleted"] = len(deleted)
+        yield bson.encode(end)
+        manifest[name] = entry
+    
+    yield bson.encode({"manifest": {"collections": manifest, "total": sum(entry["count"] for entry in manifest.values())}})
+
+@api_router.get("/backup/export/binary")
+async def export_all_data_binary(since: Optional[str] = None):
+    """Stream all app data, or what changed after `since`, as a compact binary (BSON) backup file"""
+    since_time = await resolve_backup_since(since)
+    kind = "backup" if since_time is None else "incremental"
+    filename = f"weekly-star-tracker-{kind}-{datetime.now().strftime('%Y-%m-%d')}.wstb"
+    return StreamingResponse(
+        iter_bson_export(since_time),
+        media_type=BSON_BACKUP_MEDIA_TYPE,
+        headers={"Content-Disposition": f'attachment; filename="{filename}"'}
+    )
+
+class ByteStreamReader:
+    """Exact-size reads over an async byte stream, with a peek for sniffing the format"""
+    def __init__(self, chunks: AsyncIterator[bytes]):
+        self._chunks = chunks.__aiter__()
+        self._buffer = bytearray()
+        self._exhausted = False
+
+    async def peek(self, size: int) -> bytes:
+        while len(self._buffer) < size and not self._exhausted:
             try:
-                await db.daily_stars.delete_many({})
-                if data["daily_stars"]:
-                    await db.daily_stars.insert_many(data["daily_stars"])
-                    import_results["daily_stars"] = len(data["daily_stars"])
-            except Exception as e:
-                import_results["errors"].append(f"Daily stars import failed: {str(e)}")
-        
-        # Import weekly progress
-        if "weekly_progress" in data and data["weekly_progress"]:
+                self._buffer += await self._chunks.__anext__()
+            except StopAsyncIteration:
+                self._exhausted = True
+        return bytes(self._buffer[:size])
+
+    async def read(self, size: int) -> bytes:
+        """Up to `size` bytes; fewer only at the end of the stream"""
+        data = await self.peek(size)
+        del self._buffer[:len(data)]
+        return data
+
+    async def __aiter__(self):
+        if self._buffer:
+            yield bytes(self._buffer)
+            self._buffer.clear()
+        async for chunk in self._chunks:
+            yield chunk
+
+async def read_bson_frame(reader: ByteStreamReader) -> Optional[Dict[str, Any]]:
+    """Next frame, or None at the end of the stream (including a frame cut off by truncation)"""
+    head = await reader.peek(4)
+    if len(head) < 4:
+        return None
+    size = int.from_bytes(head, "little")
+    if not 5 <= size <= BSON_BACKUP_MAX_FRAME_SIZE:
+        raise HTTPException(status_code=400, detail="Corrupt backup frame")
+    data = await reader.read(size)
+    if len(data) < size:
+        return None
+    return bson.decode(data)
+
+class BsonSectionReader:
+    """Decompress a section's chunks and split them back into documents, checksumming the raw bytes"""
+    def __init__(self, codec: str):
+        self._decompressor = StreamDecompressor(codec)
+        self._digest = hashlib.sha256()
+        self._pending = b""
+
+    def feed(self, chunk: bytes) -> List[Dict[str, Any]]:
+        data = self._decompressor.decompress(chunk)
+        self._digest.update(data)
+        return self._split(self._pending + data)
+
+    def finish(self) -> List[Dict[str, Any]]:
+        data = self._decompressor.finish()
+        self._digest.update(data)
+        docs = self._split(self._pending + data)
+        if self._pending:
+            raise ValueError("section ends inside a document")
+        return docs
+
+    def _split(self, data: bytes) -> List[Dict[str, Any]]:
+        docs = []
+        offset = 0
+        view = memoryview(data)
+        while len(data) - offset >= 4:
+            size = int.from_bytes(view[offset:offset + 4], "little")
+            if len(data) - offset < size:
+                break
+            docs.append(bson.decode(view[offset:offset + size]))
+            offset += size
+        self._pending = data[offset:]
+        return docs
+
+    @property
+    def sha256(self) -> bytes:
+        return self._digest.digest()
+
+async def import_bson_stream(reader: ByteStreamReader, seq: int) -> ImportResult:
+    """Restore a binary backup section by section; a section is applied only if its count and checksum check out"""
+    result = ImportResult(counts={}, errors=[], deleted={})
+    if await reader.read(len(BSON_BACKUP_MAGIC)) != BSON_BACKUP_MAGIC:
+        raise HTTPException(status_code=400, detail="Invalid backup format")
+    header = (await read_bson_frame(reader) or {}).get("header")
+    if not header or header.get("format") != BSON_BACKUP_FORMAT:
+        raise HTTPException(status_code=400, detail="Invalid backup format")
+    result.incremental = header.get("mode") == "incremental"
+    
+    restore = None
+    section: Optional[BsonSectionReader] = None
+    failed_section = None
+    manifest = None
+    
+    def fail(name: str, error: Exception):
+        nonlocal restore, section, failed_section
+        result.errors.append(f"{name} import failed: {str(error)}")
+        failed_section, restore, section = name, None, None
+    
+    while (frame := await read_bson_frame(reader)) is not None:
+        if "section" in frame:
+            name = frame["section"]
+            if name not in BACKUP_MODELS:
+                result.errors.append(f"Unknown section skipped: {name}")
+                failed_section = name
+                continue
+            restore = CollectionDelta(name) if result.incremental else CollectionRestore(name, seq)
+            failed_section = None
             try:
-                await db.weekly_progress.delete_many({})
-                if data["weekly_progress"]:
-                    await db.weekly_progress.insert_many(data["weekly_progress"])
-                    import_results["progress"] = len(data["weekly_progress"])
-            except Exception as e:
-                import_results["errors"].append(f"Progress import failed: {str(e)}")
-        
-        # Import rewards
-        if "rewards" in data and data["rewards"]:
+                section = BsonSectionReader(frame.get("codec", "gzip"))
+            except ValueError as e:
+                fail(name, e)
+                continue
+            await restore.start()
+        elif "chunk" in frame:
+            if restore is None:
+                if failed_section is None:
+                    raise HTTPException(status_code=400, detail="Data outside of a section")
+                continue
             try:
-                await db.rewards.delete_many({})
-                if data["rewards"]:
-                    await db.rewards.insert_many(data["rewards"])
-                    import_results["rewards"] = len(data["rewards"])
+                for doc in section.feed(frame["chunk"]):
+                    await restore.add(doc)
             except Exception as e:
-                import_results["errors"].append(f"Rewards import failed: {str(e)}")
-        
-        # Import settings
-        if "settings" in data and data["settings"]:
+                await restore.abort()
+                fail(restore.name, e)
+        elif "end" in frame:
+            if restore is None:
+                continue
             try:
-                settings_count = 0
-                if data["settings"].get("math"):
-                    await db.math_settings.delete_many({})
-                    await db.math_settings.insert_one(data["settings"]["math"])
-                    settings_count += 1
-                if data["settings"].get("german"):
-                    await db.german_settings.delete_many({})
-                    await db.german_settings.insert_one(data["settings"]["german"])
-                    settings_count += 1
-                if data["settings"].get("english"):
-                    await db.english_settings.delete_many({})
-                    await db.english_settings.insert_one(data["settings"]["english"])
-                    settings_count += 1
-                import_results["settings"] = settings_count
+                for doc in section.finish():
+                    await restore.add(doc)
+                if restore.received != frame.get("count"):
+                    raise ValueError(f"expected {frame.get('count')} documents, got {restore.received}")
+                if section.sha256 != frame.get("sha256"):
+                    raise ValueError("checksum mismatch")
+                deleted = frame.get("deleted") or 0
+                if isinstance(deleted, list):
+                    # Format version 1 listed the deleted ids in the end frame
+                    for doc_id in deleted:
+                        await restore.delete(doc_id)
+                    deleted = len(deleted)
+                if deleted and not result.incremental:
+                    raise ValueError("deletions in a full backup")
+                if restore.deletions != deleted:
+                    raise ValueError(f"expected {deleted} deletions, got {restore.deletions}")
+                await restore.commit()
+                result.counts[restore.name] = restore.count
+                if result.incremental:
+                    result.deleted[restore.name] = restore.deleted_count
+                restore, section = None, None
             except Exception as e:
-                import_results["errors"].append(f"Settings import failed: {str(e)}")
+                await restore.abort()
+                fail(restore.name, e)
+        elif "deleted" in frame:
+            if restore is None:
+                continue
+            if not result.incremental:
+                await restore.abort()
+                fail(restore.name, ValueError("deletions in a full backup"))
+                continue
+            for doc_id in frame["deleted"]:
+                await restore.delete(doc_id)
+        elif "manifest" in frame:
+            manifest = frame["manifest"]
+            break
+    
+    if restore is not None:
+        # Upload ended in the middle of a section: keep the live collection
+        await restore.abort()
+        result.errors.append(f"{restore.name} import failed: backup is truncated")
+    elif manifest is None:
+        result.errors.append("Backup has no manifest, it is truncated")
+    else:
+        for name, count in result.counts.items():
+            expected = manifest.get("collections", {}).get(name, {}).get("count")
+            if expected != count:
+                result.errors.append(f"{name}: manifest lists {expected} documents, imported {count}")
+    return result
+
+@api_router.post("/backup/import")
+async def import_all_data(request: Request):
+    """Import data from a JSON backup, a (gzip) NDJSON streaming export or a binary backup"""
+    try:
+        seq = await next_sync_seq()
+        content_type = request.headers.get("content-type", "")
         
-        # Import statistics
-        if "statistics" in data and data["statistics"]:
-            try:
-                stats_count = 0
-                if data["statistics"].get("math"):
-                    await db.math_statistics.delete_many({})
-                    if data["statistics"]["math"]:
-                        await db.math_statistics.insert_many(data["statistics"]["math"])
-                        stats_count += len(data["statistics"]["math"])
-                if data["statistics"].get("german"):
-                    await db.german_statistics.delete_many({})
-                    if data["statistics"]["german"]:
-                        await db.german_statistics.insert_many(data["statistics"]["german"])
-                        stats_count += len(data["statistics"]["german"])
-                if data["statistics"].get("english"):
-                    await db.english_statistics.delete_many({}) 
-                    if data["statistics"]["english"]:
-                        await db.english_statistics.insert_many(data["statistics"]["english"])
-                        stats_count += len(data["statistics"]["english"])
-                import_results["statistics"] = stats_count
-            except Exception as e:
-                import_results["errors"].append(f"Statistics import failed: {str(e)}")
+        if content_type.startswith("application/json"):
+            backup_data = await request.json()
+            # Validate backup format
+            if not isinstance(backup_data, dict) or "data" not in backup_data or "app_version" not in backup_data:
+                raise HTTPException(status_code=400, detail="Invalid backup format")
+            
+            result = ImportResult(counts={}, errors=[], deleted={}, incremental=bool(backup_data.get("incremental")))
+            sections = json_backup_sections(backup_data["data"])
+            if result.incremental:
+                # Apply the delta on top of the live data
+                deleted = backup_data.get("deleted") or {}
+                for name in [name for name in BACKUP_MODELS if name in sections or deleted.get(name)]:
+                    try:
+                        delta = await apply_collection_delta(name, sections.get(name, []), deleted.get(name, []))
+                        result.counts[name] = delta.count
+                        result.deleted[name] = delta.deleted_count
+                    except Exception as e:
+                        result.errors.append(f"{name} import failed: {str(e)}")
+            else:
+                for name, docs in sections.items():
+                    try:
+                        result.counts[name] = await restore_collection(name, docs, seq)
+                    except Exception as e:
+                        result.errors.append(f"{name} import failed: {str(e)}")
+        else:
+            # Streaming formats: binary backups start with a magic number, anything else is (gzip) NDJSON
+            reader = ByteStreamReader(request.stream())
+            if await reader.peek(len(BSON_BACKUP_MAGIC)) == BSON_BACKUP_MAGIC:
+                result = await import_bson_stream(reader, seq)
+            else:
+                result = await import_ndjson_stream(reader, seq)
+        
+        await finish_restore(list(result.counts), seq, incremental=result.incremental)
         
         return {
-            "message": "Import completed",
-            "results": import_results,
+            "message": "Incremental import completed" if result.incremental else "Import completed",
+            "results": import_results_summary(result),
             "import_date": datetime.now().isoformat()
         }
         
@@ -2448,13 +4639,208 @@ async def import_all_data(backup_data: dict):
         logging.error(f"Import failed: {e}")
         raise HTTPException(status_code=500, detail=f"Import failed: {str(e)}")
 
+# Scheduled snapshots: binary backups written to local disk by a background task.
+# Opt-in, and for one process only: the schedule and _snapshot_lock are per process, so every process with
+# SNAPSHOTS_ENABLED would write its own snapshots into SNAPSHOT_DIR and prune the others' chains.
+SNAPSHOTS_ENABLED = os.environ.get('SNAPSHOTS_ENABLED', 'false').lower() == 'true'
+SNAPSHOT_DIR = Path(os.environ.get('SNAPSHOT_DIR', str(ROOT_DIR / 'snapshots')))
+SNAPSHOT_FULL_INTERVAL_SECONDS = float(os.environ.get('SNAPSHOT_FULL_INTERVAL_SECONDS', str(24 * 3600)))
+SNAPSHOT_INCREMENTAL_INTERVAL_SECONDS = float(os.environ.get('SNAPSHOT_INCREMENTAL_INTERVAL_SECONDS', '3600'))
+SNAPSHOT_RETAIN_FULL = int(os.environ.get('SNAPSHOT_RETAIN_FULL', '7'))
+SNAPSHOT_CHECK_SECONDS = 60
+SNAPSHOT_READ_SIZE = 1024 * 1024
+snapshot_metrics: Dict[str, Any] = {
+    "written": {"full": 0, "incremental": 0},
+    "failed": 0,
+    "duration_seconds_total": 0.0,
+    "bytes_total": 0,
+    "last": None
+}
+_snapshot_lock = asyncio.Lock()
+_snapshot_task: Optional[asyncio.Task] = None
+
+CallbackMetric("snapshots_written_total", "Snapshots written to SNAPSHOT_DIR", "counter", ("kind",),
+    lambda: {(kind,): count for kind, count in snapshot_metrics["written"].items()})
+CallbackMetric("snapshots_failed_total", "Scheduled or manual snapshots that failed", "counter", (),
+    lambda: {(): snapshot_metrics["failed"]})
+CallbackMetric("snapshot_bytes_total", "Bytes written to snapshot files", "counter", (),
+    lambda: {(): snapshot_metrics["bytes_total"]})
+CallbackMetric("snapshot_duration_seconds_total", "Time spent writing snapshots", "counter", (),
+    lambda: {(): snapshot_metrics["duration_seconds_total"]})
+
+def list_snapshots() -> List[Dict[str, Any]]:
+    """Metadata of the complete snapshots on disk, oldest first"""
+    if not SNAPSHOT_DIR.is_dir():
+        return []
+    snapshots = []
+    for path in SNAPSHOT_DIR.glob("*.json"):
+        try:
+            meta = json.loads(path.read_text())
+        except (OSError, ValueError):
+            continue
+        if (SNAPSHOT_DIR / meta.get("file", "")).is_file():
+            snapshots.append(meta)
+    return sorted(snapshots, key=lambda meta: meta["created_at"])
+
+def next_snapshot_kind(snapshots: List[Dict[str, Any]]) -> Optional[str]:
+    """Which snapshot is due: a full one per full interval, incrementals in between"""
+    now = datetime.utcnow()
+    fulls = [snapshot for snapshot in snapshots if snapshot["kind"] == "full"]
+    if not fulls or now - datetime.fromisoformat(fulls[-1]["created_at"]) >= timedelta(seconds=SNAPSHOT_FULL_INTERVAL_SECONDS):
+        return "full"
+    if now - datetime.fromisoformat(snapshots[-1]["created_at"]) >= timedelta(seconds=SNAPSHOT_INCREMENTAL_INTERVAL_SECONDS):
+        return "incremental"
+    return None
+
+def prune_snapshots(snapshots: List[Dict[str, Any]]):
+    """Keep the newest SNAPSHOT_RETAIN_FULL full snapshots and the incrementals built on them"""
+    fulls = [snapshot["name"] for snapshot in snapshots if snapshot["kind"] == "full"]
+    kept = set(fulls[-SNAPSHOT_RETAIN_FULL:])
+    for snapshot in snapshots:
+        if snapshot["base"] not in kept:
+            (SNAPSHOT_DIR / snapshot["file"]).unlink(missing_ok=True)
+            (SNAPSHOT_DIR / f"{snapshot['name']}.json").unlink(missing_ok=True)
+
+async def write_snapshot(name: str, since: Optional[datetime]) -> int:
+    """Write a binary export to SNAPSHOT_DIR/<name>.wstb and return its size; the file appears only when complete"""
+    path = SNAPSHOT_DIR / f"{name}.wstb"
+    partial = SNAPSHOT_DIR / f"{name}.partial"
+    size = 0
+    await asyncio.to_thread(SNAPSHOT_DIR.mkdir, parents=True, exist_ok=True)
+    file = await asyncio.to_thread(open, partial, "wb")
+    try:
+        async for chunk in iter_bson_export(since, offload=True):
+            # Compression and disk writes happen off the event loop, which also hands it back to requests between chunks
+            await asyncio.to_thread(file.write, chunk)
+            size += len(chunk)
+        await asyncio.to_thread(file.close)
+        await asyncio.to_thread(partial.rename, path)
+    except BaseException:
+        file.close()
+        partial.unlink(missing_ok=True)
+        raise
+    return size
+
+async def take_snapshot(kind: str = "incremental") -> Dict[str, Any]:
+    """Write a snapshot; incrementals continue from the latest snapshot's watermark and fall back to full without one"""
+    async with _snapshot_lock:
+        snapshots = await asyncio.to_thread(list_snapshots)
+        latest = snapshots[-1] if snapshots else None
+        since = None
+        if kind == "incremental" and latest is not None:
+            try:
+                since = await resolve_backup_since(latest["watermark"])
+            except HTTPException:
+                since = None  # a restore happened since: start a new chain
+        kind = "full" if since is None else "incremental"
+        
+        created_at = datetime.utcnow()
+        name = f"snapshot-{created_at.strftime('%Y%m%dT%H%M%S')}-{kind}"
+        # The export's own watermark is taken a moment later, so continuing from this one never skips a write
+        watermark = current_backup_watermark()
+        started = time.perf_counter()
+        try:
+            size = await write_snapshot(name, since)
+        except Exception:
+            snapshot_metrics["failed"] += 1
+            raise
+        duration = time.perf_counter() - started
+        
+        meta = {
+            "name": name,
+            "file": f"{name}.wstb",
+            "kind": kind,
+            "base": name if kind == "full" else latest["base"],
+            "created_at": created_at.isoformat(),
+            "since": since.isoformat() if since else None,
+            "watermark": watermark.isoformat(),
+            "size_bytes": size,
+            "duration_seconds": round(duration, 3)
+        }
+        await asyncio.to_thread((SNAPSHOT_DIR / f"{name}.json").write_text, json.dumps(meta))
+        
+        snapshot_metrics["written"][kind] += 1
+        snapshot_metrics["duration_seconds_total"] += duration
+        snapshot_metrics["bytes_total"] += size
+        snapshot_metrics["last"] = meta
+        if kind == "full":
+            await asyncio.to_thread(prune_snapshots, snapshots + [meta])
+        return meta
+
+async def run_snapshot_scheduler():
+    """Take due snapshots until shutdown"""
+    while True:
+        await asyncio.sleep(SNAPSHOT_CHECK_SECONDS)
+        try:
+            kind = next_snapshot_kind(await asyncio.to_thread(list_snapshots))
+            if kind is not None:
+                meta = await take_snapshot(kind)
+                print(f"💾 Snapshot {meta['name']} written ({meta['size_bytes']} bytes, {meta['duration_seconds']}s)")
+        except Exception as e:
+            print(f"⚠️ Snapshot failed: {e}")
+
+async def read_file_chunks(path: Path) -> AsyncIterator[bytes]:
+    with open(path, "rb") as file:
+        while chunk := await asyncio.to_thread(file.read, SNAPSHOT_READ_SIZE):
+            yield chunk
+
+@api_router.get("/snapshots")
+async def get_snapshots():
+    """Snapshots on disk (newest first), the schedule and snapshot metrics"""
+    snapshots = await asyncio.to_thread(list_snapshots)
+    return {
+        "enabled": SNAPSHOTS_ENABLED,
+        "directory": str(SNAPSHOT_DIR),
+        "full_interval_seconds": SNAPSHOT_FULL_INTERVAL_SECONDS,
+        "incremental_interval_seconds": SNAPSHOT_INCREMENTAL_INTERVAL_SECONDS,
+        "retain_full": SNAPSHOT_RETAIN_FULL,
+        "snapshots": snapshots[::-1],
+        "metrics": snapshot_metrics
+    }
+
+@api_router.post("/snapshots")
+async def create_snapshot(kind: str = "incremental"):
+    """Take a snapshot now"""
+    if kind not in ("full", "incremental"):
+        raise HTTPException(status_code=400, detail="kind must be full or incremental")
+    try:
+        return await take_snapshot(kind)
+    except Exception as e:
+        logging.error(f"Snapshot failed: {e}")
+        raise HTTPException(status_code=500, detail=f"Snapshot failed: {str(e)}")
+
+@api_router.post("/snapshots/{name}/restore")
+async def restore_snapshot(name: str):
+    """Restore a snapshot: its full base, then every incremental up to and including it"""
+    snapshots = await asyncio.to_thread(list_snapshots)
+    target = next((snapshot for snapshot in snapshots if snapshot["name"] == name), None)
+    if target is None:
+        raise HTTPException(status_code=404, detail="Snapshot not found")
+    chain = [
+        snapshot for snapshot in snapshots
+        if snapshot["base"] == target["base"] and snapshot["created_at"] <= target["created_at"]
+    ]
+    
+    steps = []
+    async with _snapshot_lock:
+        for snapshot in chain:
+            seq = await next_sync_seq()
+            result = await import_bson_stream(ByteStreamReader(read_file_chunks(SNAPSHOT_DIR / snapshot["file"])), seq)
+            await finish_restore(list(result.counts), seq, incremental=result.incremental)
+            steps.append({"snapshot": snapshot["name"], "results": import_results_summary(result)})
+            if result.errors:
+                # Later incrementals assume this step is complete
+                return {"message": f"Restore stopped at {snapshot['name']}", "restored": None, "steps": steps}
+    
+    return {"message": "Snapshot restored", "restored": name, "steps": steps}
+
 @api_router.post("/progress/reset-all-stars")
 async def reset_all_stars():
     """Reset all stars everywhere - tasks, safe, available, everything"""
     week_start = get_current_week_start()
     
     # Clear all daily stars
-    await db.daily_stars.delete_many({})
+    await db.week_stars.delete_many({})
     
     # Reset all progress data
     progress = WeeklyProgress(
@@ -2474,6 +4860,7 @@ async def reset_all_stars():
         {"is_claimed": True}, 
         {"$set": {"is_claimed": False, "claimed_at": None}}
     )
+    await bump_collection_versions("week_stars", "weekly_progress", "rewards")
     
     return {"message": "All stars reset successfully"}
 
@@ -2482,7 +4869,7 @@ async def reset_weekly_progress():
     week_start = get_current_week_start()
     
     # Clear daily stars for current week
-    await db.daily_stars.delete_many({"week_start": week_start})
+    await db.week_stars.delete_many({"week_start": week_start})
     
     # Reset earned and available stars BUT KEEP SAFE STARS
     progress = await db.weekly_progress.find_one({"week_start": week_start})
@@ -2495,19 +4882,321 @@ async def reset_weekly_progress():
         # stars_in_safe remains unchanged!
         await db.weekly_progress.replace_one({"week_start": week_start}, progress)
     
+    await bump_collection_versions("week_stars", "weekly_progress")
+    
     return {"message": "Weekly progress reset (safe stars preserved)"}
 
+# Server-Sent Events Endpoint
+@api_router.get("/events")
+async def stream_events(request: Request):
+    """Stream star, progress, reward and change events to a connected client, resuming after Last-Event-ID"""
+    last_event_id = request.headers.get("last-event-id")
+    
+    async def event_stream():
+        # Subscribed and read the backlog with no await in between, so no event is missed or sent twice
+        queue = event_bus.subscribe()
+        backlog = event_bus.replay(last_event_id) if last_event_id else []
+        try:
+            # The current sync watermark tells the client where to resync from after a reconnect
+            yield format_sse("hello", {"seq": await current_sync_watermark()})
+            if backlog is None:
+                yield format_sse("resync", {})
+            else:
+                for event_id, event_type, data in backlog:
+                    yield format_sse(event_type, data, event_bus.event_id(event_id))
+                if any(event_type == "changed" and PROGRESS_COLLECTIONS & set(data["collections"]) for _, event_type, data in backlog):
+                    # Totals aren't published while nobody listens, so a replayed gap may lack them
+                    yield format_sse("progress", await load_progress_totals())
+            while True:
+                try:
+                    event_id, event_type, data = await asyncio.wait_for(queue.get(), timeout=SSE_HEARTBEAT_SECONDS)
+                except asyncio.TimeoutError:
+                    if await request.is_disconnected():
+                        break
+                    yield ": keep-alive\n\n"
+                    continue
+                yield format_sse(event_type, data, event_bus.event_id(event_id))
+        finally:
+            event_bus.unsubscribe(queue)
+    
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+# Delta Sync Endpoint
+SYNC_MODELS = {name: BACKUP_MODELS[name] for name in SYNC_COLLECTIONS}
+
+def decode_sync_cursor(cursor: str) -> Tuple[int, str, Optional[str]]:
+    """(seq of the first page, collection to continue in, find_page cursor within it) of a full sync"""
+    try:
+        seq, name, after = json.loads(base64.urlsafe_b64decode(cursor.encode("ascii")))
+        if not isinstance(seq, int) or name not in SYNC_MODELS or not (after is None or isinstance(after, str)):
+            raise ValueError("cursor")
+        return seq, name, after
+    except (ValueError, TypeError, binascii.Error):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+async def full_sync_page(seq: int, limit: Optional[int], cursor: Optional[str]) -> Tuple[Dict[str, List[Dict[str, Any]]], Optional[str]]:
+    """One page of every synced collection in turn, keyset-paged by id like the list endpoints
+
+    Every page reports the seq of the first one: writes made while the client pages are newer than it,
+    so the next incremental sync picks them up.
+    """
+    remaining = max(1, min(limit or DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE))
+    name, after = SYNC_COLLECTIONS[0], None
+    if cursor:
+        _, name, after = decode_sync_cursor(cursor)
+    changes = {collection: [] for collection in SYNC_COLLECTIONS}
+    for collection in SYNC_COLLECTIONS[SYNC_COLLECTIONS.index(name):]:
+        if remaining <= 0:
+            return changes, encode_cursor([seq, collection, None])
+        page = await find_page(db[collection], {}, SYNC_MODELS[collection], ("id",), remaining, after if collection == name else None)
+        changes[collection] = page.items
+        remaining -= len(page.items)
+        if page.next_cursor:
+            return changes, encode_cursor([seq, collection, page.next_cursor])
+    return changes, None
+
+def sync_response(seq: int, full: bool, changes: Dict[str, List[Dict[str, Any]]], deleted: Dict[str, List[str]],
+                  next_cursor: Optional[str] = None) -> Response:
+    """/sync body; the cursor of a paged full sync goes in X-Next-Cursor, as for the list endpoints"""
+    headers = {"X-Next-Cursor": next_cursor} if next_cursor else None
+    return FastJSONResponse(content={"seq": seq, "full": full, "changes": changes, "deleted": deleted}, headers=headers)
+
+@api_router.get("/sync")
+async def sync_changes(since: int = 0, limit: Optional[int] = None, cursor: Optional[str] = None):
+    """Documents written and deleted after `since`; clients pass the returned seq as the next `since`
+
+    A full sync (since 0, or a client that has to start over) is paged: while the response carries
+    X-Next-Cursor, the client asks again with that cursor, and uses the seq once the last page arrived.
+    """
+    if cursor:
+        seq = decode_sync_cursor(cursor)[0]
+        changes, next_cursor = await full_sync_page(seq, limit, cursor)
+        return sync_response(seq, True, changes, {}, next_cursor)
+    
+    seq = await current_sync_watermark()
+    counter = await db.counters.find_one({"_id": "sync_seq"}) or {}
+    if since > counter.get("seq", 0) or since < max(counter.get("reset_seq", 0), counter.get("tombstones_pruned_seq", 0)):
+        # The client is ahead of this database, a restore replaced collections since its last sync,
+        # or tombstones it hasn't seen were pruned: start over
+        since = 0
+    # A watermark held back below the client's by writes in flight has nothing new for it yet
+    seq = max(seq, since)
+    if since <= 0:
+        changes, next_cursor = await full_sync_page(seq, limit, None)
+        return sync_response(seq, True, changes, {}, next_cursor)
+    seq_filter = {"sync_seq": {"$gt": since, "$lte": seq}}
+    
+    results = await asyncio.gather(*[
+        db[name].find(seq_filter, {"_id": 0}).to_list(length=None) for name in SYNC_COLLECTIONS
+    ])
+    changes = dict(zip(SYNC_COLLECTIONS, results))
+    
+    deleted = {}
+    live_ids = {name: {doc.get("id") for doc in docs} for name, docs in changes.items()}
+    tombstones = await db.sync_tombstones.find(
+        {**seq_filter, "collection": {"$in": list(SYNC_COLLECTIONS)}}, {"_id": 0, "collection": 1, "id": 1}
+    ).to_list(length=None)
+    for tombstone in tombstones:
+        # A document that exists again (e.g. re-imported) supersedes its tombstone
+        if tombstone["id"] not in live_ids.get(tombstone["collection"], set()):
+            deleted.setdefault(tombstone["collection"], []).append(tombstone["id"])
+    
+    return sync_response(seq, False, changes, deleted)
+
+# Offline mutation replay
+MUTATION_KEY_TTL_SECONDS = int(os.environ.get('MUTATION_KEY_TTL_SECONDS', str(7 * 24 * 3600)))
+# A pending claim older than this is taken to belong to a request that died and may be retried; keep it above the slowest batch
+MUTATION_CLAIM_LEASE_SECONDS = int(os.environ.get('MUTATION_CLAIM_LEASE_SECONDS', '60'))
+
+async def replay_submit_challenge(payload: Dict[str, Any]):
+    submit = {
+        "math": submit_math_answers,
+        "german": submit_german_answers,
+        "english": submit_english_answers
+    }.get(payload.get("subject"))
+    if submit is None:
+        raise HTTPException(status_code=400, detail=f"Unknown subject: {payload.get('subject')}")
+    answers = {int(index): str(answer) for index, answer in payload.get("answers", {}).items()}
+    return await submit(payload["challenge_id"], answers)
+
+# Replayable mutation types other than set_stars, which is batched separately
+MUTATION_HANDLERS: Dict[str, Callable[[Dict[str, Any]], Awaitable[Any]]] = {
+    "add_to_safe": lambda payload: add_stars_to_safe(AddStarsRequest(**payload)),
+    "move_reward_to_safe": lambda payload: move_reward_stars_to_safe(AddStarsRequest(**payload)),
+    "withdraw_from_safe": lambda payload: withdraw_stars_from_safe(WithdrawStarsRequest(**payload)),
+    "claim_reward": lambda payload: claim_reward(payload["reward_id"]),
+    "submit_challenge": replay_submit_challenge
+}
+
+async def apply_mutations(mutations: List[SyncMutation], results: Dict[str, Dict[str, Any]]):
+    """Apply claimed mutations in order, filling in each one's result"""
+    week_start = get_current_week_start()
+    pending_cells: Dict[Tuple[str, int], int] = {}
+    pending_star_keys: List[str] = []
+    
+    async def flush_star_cells():
+        """Write the star taps collected so far with one bulk write"""
+        if not pending_cells:
+            return
+        try:
+            await write_star_cells(week_start, dict(pending_cells))
+            publish_star_cells(week_start, pending_cells)
+            await load_weekly_progress()  # refresh the earned total the following mutations may depend on
+            await bump_collection_versions("week_stars", "weekly_progress")
+            for key in pending_star_keys:
+                results[key] = {"key": key, "status": "applied", "result": {"message": "Stars updated"}}
+        except Exception as e:
+            logging.error(f"Star replay failed: {e}")
+            for key in pending_star_keys:
+                results[key] = {"key": key, "status": "failed", "error": str(e)}
+        pending_cells.clear()
+        pending_star_keys.clear()
+    
+    for mutation in mutations:
+        try:
+            if mutation.type == "set_stars":
+                cell = StarCellUpdate(**mutation.payload)
+                if cell.stars < 0 or cell.stars > 2:
+                    raise HTTPException(status_code=400, detail="Stars must be between 0 and 2")
+                # Consecutive star taps are batched; last tap on a cell wins
+                pending_cells[(cell.task_id, day_slot(cell.day))] = cell.stars
+                pending_star_keys.append(mutation.key)
+                continue
+            
+            handler = MUTATION_HANDLERS.get(mutation.type)
+            if handler is None:
+                raise HTTPException(status_code=400, detail=f"Unknown mutation type: {mutation.type}")
+            await flush_star_cells()
+            result = await handler(mutation.payload)
+            results[mutation.key] = {"key": mutation.key, "status": "applied", "result": json.loads(dumps_json(result))}
+        except HTTPException as e:
+            status = "rejected" if e.status_code < 500 else "failed"
+            results[mutation.key] = {"key": mutation.key, "status": status, "error": e.detail}
+        except (KeyError, ValueError, TypeError) as e:
+            # Malformed payloads (including validation errors) will never succeed on retry
+            results[mutation.key] = {"key": mutation.key, "status": "rejected", "error": str(e)}
+        except Exception as e:
+            logging.error(f"Mutation {mutation.key} failed: {e}")
+            results[mutation.key] = {"key": mutation.key, "status": "failed", "error": str(e)}
+    await flush_star_cells()
+
+async def record_mutation_outcomes(mutations: List[SyncMutation], results: Dict[str, Dict[str, Any]]):
+    """Store the outcome of each claimed mutation; failed or unfinished ones release their key so the client can retry them"""
+    if not mutations:
+        return
+    finished = [results[mutation.key] for mutation in mutations if results.get(mutation.key, {}).get("status", "failed") != "failed"]
+    records = [
+        UpdateOne(
+            {"_id": result["key"]},
+            {"$set": {"status": result["status"], "result": result.get("result"), "error": result.get("error")}}
+        )
+        for result in finished
+    ]
+    if records:
+        await db.mutation_keys.bulk_write(records, ordered=False)
+    released = list({mutation.key for mutation in mutations} - {result["key"] for result in finished})
+    if released:
+        await db.mutation_keys.delete_many({"_id": {"$in": released}, "status": "pending"})
+
+@api_router.post("/sync/mutations")
+async def replay_mutations(batch: SyncMutationBatch):
+    """Apply an ordered batch of offline mutations once each; retried keys return their stored result"""
+    keys = [mutation.key for mutation in batch.mutations]
+    if len(set(keys)) != len(keys):
+        raise HTTPException(status_code=400, detail="Mutation keys must be unique within a batch")
+    
+    results: Dict[str, Dict[str, Any]] = {}
+    now = datetime.utcnow()
+    lease_expired = now - timedelta(seconds=MUTATION_CLAIM_LEASE_SECONDS)
+    taken_over = set()
+    
+    # Keys seen before are no-ops: answer with what was recorded for them
+    if keys:
+        seen = await db.mutation_keys.find({"_id": {"$in": keys}}).to_list(length=None)
+        for record in seen:
+            if record["status"] == "pending":
+                # A claim whose lease ran out belongs to a request that died; take it over, guarded by the old lease
+                claimed_at = record.get("claimed_at")
+                if (claimed_at or record["created_at"]) < lease_expired:
+                    takeover = await db.mutation_keys.update_one(
+                        {"_id": record["_id"], "status": "pending", "claimed_at": claimed_at},
+                        {"$set": {"claimed_at": now}}
+                    )
+                    if takeover.modified_count:
+                        taken_over.add(record["_id"])
+                        continue
+                results[record["_id"]] = {"key": record["_id"], "status": "pending"}
+            else:
+                results[record["_id"]] = {"key": record["_id"], "status": "duplicate", "result": record.get("result"), "error": record.get("error")}
+    
+    # Claim the new keys, so a concurrent retry of the same batch can't apply them twice
+    new_mutations = [mutation for mutation in batch.mutations if mutation.key not in results]
+    unclaimed = [mutation for mutation in new_mutations if mutation.key not in taken_over]
+    if unclaimed:
+        try:
+            await db.mutation_keys.insert_many(
+                [{"_id": mutation.key, "type": mutation.type, "status": "pending", "created_at": now, "claimed_at": now} for mutation in unclaimed],
+                ordered=False
+            )
+        except BulkWriteError as e:
+            for error in e.details.get("writeErrors", []):
+                key = unclaimed[error["index"]].key
+                results[key] = {"key": key, "status": "pending"}
+            new_mutations = [mutation for mutation in new_mutations if mutation.key not in results]
+    
+    try:
+        await apply_mutations(new_mutations, results)
+    finally:
+        # Also runs on errors and cancellation, so no claim outlives this request
+        await record_mutation_outcomes(new_mutations, results)
+    
+    return {"results": [results[key] for key in keys]}
+
 # Rewards Endpoints
 @api_router.post("/rewards", response_model=Reward)
 async def create_reward(reward_data: RewardCreate):
     reward = Reward(name=reward_data.name, required_stars=reward_data.required_stars)
     await db.rewards.insert_one(reward.dict())
+    await bump_collection_versions("rewards")
     return reward
 
 @api_router.get("/rewards", response_model=List[Reward])
-async def get_rewards():
-    rewards = await db.rewards.find().to_list(1000)
-    return [Reward(**reward) for reward in rewards]
+async def get_rewards(request: Request, limit: Optional[int] = None, cursor: Optional[str] = None, fields: Optional[str] = None):
+    return await versioned_json_response(request, ["rewards"], lambda: load_rewards(limit, cursor, fields))
+
+async def load_rewards(limit: Optional[int] = None, cursor: Optional[str] = None, fields: Optional[str] = None) -> Page:
+    return await find_page(db.rewards, {}, Reward, ("created_at", "id"), limit, cursor, fields)
+
+# Dashboard Endpoint
+@api_router.get("/dashboard")
+async def get_dashboard(request: Request):
+    """Tasks, current week stars, progress and rewards in one round trip"""
+    async def load_dashboard():
+        tasks, stars, progress, rewards = await asyncio.gather(
+            load_tasks(),
+            load_current_week_stars(),
+            load_weekly_progress(),
+            load_rewards()
+        )
+        return {
+            "tasks": tasks.items,
+            "stars": stars.items,
+            "progress": progress,
+            "rewards": rewards.items,
+            # Lists longer than one page continue through their own endpoints
+            "next_cursors": {
+                name: page.next_cursor for name, page in [("tasks", tasks), ("stars", stars), ("rewards", rewards)]
+                if page.next_cursor
+            }
+        }
+    
+    return await versioned_json_response(
+        request, ["tasks", "week_stars", "weekly_progress", "rewards"], load_dashboard, week_scoped=True
+    )
 
 @api_router.post("/rewards/{reward_id}/claim")
 async def claim_reward(reward_id: str):
@@ -2531,6 +5220,8 @@ async def claim_reward(reward_id: str):
     
     await db.weekly_progress.replace_one({"week_start": week_start}, progress)
     await db.rewards.replace_one({"id": reward_id}, reward)
+    event_bus.publish("reward_claimed", {"reward_id": reward_id, "name": reward["name"], "required_stars": reward["required_stars"]})
+    await bump_collection_versions("weekly_progress", "rewards")
     
     return Reward(**reward)
 
@@ -2539,6 +5230,7 @@ async def delete_reward(reward_id: str):
     result = await db.rewards.delete_one({"id": reward_id})
     if result.deleted_count == 0:
         raise HTTPException(status_code=404, detail="Reward not found")
+    await bump_collection_versions("rewards")
     return {"message": "Reward deleted"}
 
 # Math Challenge Endpoints
@@ -2554,33 +5246,14 @@ async def create_math_challenge(grade: int):
         settings = MathSettings(**settings_doc) if settings_doc else MathSettings()
         
         # Generate problems for enabled problem types
-        problems = []
-        enabled_types = [k for k, v in settings.problem_types.items() if v]
-        if not enabled_types:
-            enabled_types = ["addition", "subtraction", "multiplication"]  # fallback
-        
-        problems_per_type = max(1, settings.problem_count // len(enabled_types))
-        
-        for problem_type in enabled_types:
-            try:
-                type_problems = await generate_math_problems(problem_type, grade, problems_per_type, settings)
-                problems.extend(type_problems)
-            except Exception as e:
-                print(f"⚠️  Warning: Failed to generate {problem_type} problems: {e}")
-                # Add fallback problems
-                fallback_problems = await generate_math_problems("addition", grade, 5, settings)
-                problems.extend(fallback_problems)
+        problems = await generate_planned_problems("math", grade, settings.problem_count, settings)
         
         if not problems:
             # Emergency fallback
-            problems = await generate_math_problems("addition", grade, 10, settings)
-        
-        # Shuffle and limit to requested count
-        random.shuffle(problems)
-        problems = problems[:settings.problem_count]
+            problems = await generate_math_problems("addition", grade, settings.problem_count, settings)
         
-        challenge = MathChallenge(grade=grade, problems=problems)
-        await db.math_challenges.insert_one(challenge.dict())
+        challenge = build_challenge_document("math", grade, problems)
+        await db.math_challenges.insert_one(dict(challenge))
         
         return {
             "challenge": challenge,
@@ -2597,19 +5270,10 @@ async def create_math_challenge(grade: int):
             detail="Failed to create math challenge. Please try again."
         )
 
-@api_router.post("/math/challenge/{challenge_id}/submit")
-async def submit_math_answers(challenge_id: str, answers: Dict[int, str]):
-    challenge = await db.math_challenges.find_one({"id": challenge_id})
-    if not challenge:
-        raise HTTPException(status_code=404, detail="Challenge not found")
-    
-    challenge_obj = MathChallenge(**challenge)
-    
+def grade_math_answers(problems: List[MathProblem], answers: Dict[int, str]) -> int:
+    """Mark each answered problem correct or not, returning the number of correct answers"""
     correct_count = 0
-    total_problems = len(challenge_obj.problems)
-    
-    # Grade the answers
-    for i, problem in enumerate(challenge_obj.problems):
+    for i, problem in enumerate(problems):
         if i in answers:
             user_answer = str(answers[i]).strip().lower()
             problem.user_answer = user_answer
@@ -2631,6 +5295,18 @@ async def submit_math_answers(challenge_id: str, answers: Dict[int, str]):
             
             if problem.is_correct:
                 correct_count += 1
+    return correct_count
+
+@api_router.post("/math/challenge/{challenge_id}/submit")
+async def submit_math_answers(challenge_id: str, answers: Dict[int, str]):
+    challenge = await db.math_challenges.find_one({"id": challenge_id})
+    if not challenge:
+        raise HTTPException(status_code=404, detail="Challenge not found")
+    
+    challenge_obj = construct_trusted_challenge(MathChallenge, MathProblem, challenge)
+    
+    total_problems = len(challenge_obj.problems)
+    correct_count = grade_math_answers(challenge_obj.problems, answers)
     
     # Calculate percentage and stars earned
     percentage = (correct_count / total_problems) * 100
@@ -2674,6 +5350,7 @@ async def submit_math_answers(challenge_id: str, answers: Dict[int, str]):
     
     await db.weekly_progress.replace_one({"week_start": week_start}, progress, upsert=True)
     await db.math_challenges.replace_one({"id": challenge_id}, challenge_obj.dict())
+    await bump_collection_versions("weekly_progress")
     
     return {
         "challenge": challenge_obj,
@@ -2735,7 +5412,10 @@ async def update_math_statistics(grade: int, correct: int, total: int, percentag
     await db.math_statistics.replace_one({}, stats, upsert=True)
 
 @api_router.get("/math/settings")
-async def get_math_settings():
+async def get_math_settings(request: Request):
+    return await versioned_json_response(request, ["math_settings"], load_math_settings)
+
+async def load_math_settings() -> MathSettings:
     settings = await db.math_settings.find_one()
     if not settings:
         settings = MathSettings()
@@ -2746,6 +5426,7 @@ async def get_math_settings():
 @api_router.put("/math/settings")
 async def update_math_settings(settings: MathSettings):
     await db.math_settings.replace_one({}, settings.dict(), upsert=True)
+    await bump_collection_versions("math_settings")
     return settings
 
 @api_router.get("/math/statistics")
@@ -2775,33 +5456,40 @@ async def create_german_challenge(grade: int):
     problem_count = settings_doc.get("problem_count", 20) if settings_doc else 20
     
     problems = await generate_german_problems(grade, problem_count)
-    challenge = GermanChallenge(grade=grade, problems=problems)
+    challenge = build_challenge_document("german", grade, problems)
     
-    await db.german_challenges.insert_one(challenge.dict())
+    await db.german_challenges.insert_one(dict(challenge))
     return challenge
 
-@api_router.post("/german/challenge/{challenge_id}/submit")
-async def submit_german_answers(challenge_id: str, answers: Dict[int, str]):
-    challenge = await db.german_challenges.find_one({"id": challenge_id})
-    if not challenge:
-        raise HTTPException(status_code=404, detail="Challenge not found")
-    
-    challenge_obj = GermanChallenge(**challenge)
-    
+def grade_german_answers(problems: List[GermanProblem], answers: Dict[int, str]) -> int:
+    """Mark each answered problem correct or not, returning the number of correct answers"""
     correct_count = 0
-    total_problems = len(challenge_obj.problems)
-    
-    # Grade the answers
-    for i, problem in enumerate(challenge_obj.problems):
+    for i, problem in enumerate(problems):
         if i in answers:
             user_answer = str(answers[i]).strip()
             problem.user_answer = user_answer
             
-            # Direct string comparison for German problems
-            problem.is_correct = problem.correct_answer.lower().strip() == user_answer.lower().strip()
+            if problem.question_type == "sentence_order":
+                # Word order matters, whitespace, case and punctuation do not
+                problem.is_correct = normalize_sentence_answer(problem.correct_answer) == normalize_sentence_answer(user_answer)
+            else:
+                # Direct string comparison for German problems
+                problem.is_correct = problem.correct_answer.lower().strip() == user_answer.lower().strip()
             
             if problem.is_correct:
                 correct_count += 1
+    return correct_count
+
+@api_router.post("/german/challenge/{challenge_id}/submit")
+async def submit_german_answers(challenge_id: str, answers: Dict[int, str]):
+    challenge = await db.german_challenges.find_one({"id": challenge_id})
+    if not challenge:
+        raise HTTPException(status_code=404, detail="Challenge not found")
+    
+    challenge_obj = construct_trusted_challenge(GermanChallenge, GermanProblem, challenge)
+    
+    total_problems = len(challenge_obj.problems)
+    correct_count = grade_german_answers(challenge_obj.problems, answers)
     
     # Calculate percentage and stars earned
     percentage = (correct_count / total_problems) * 100
@@ -2845,6 +5533,7 @@ async def submit_german_answers(challenge_id: str, answers: Dict[int, str]):
     
     await db.weekly_progress.replace_one({"week_start": week_start}, progress, upsert=True)
     await db.german_challenges.replace_one({"id": challenge_id}, challenge_obj.dict())
+    await bump_collection_versions("weekly_progress")
     
     return {
         "challenge": challenge_obj,
@@ -2902,7 +5591,10 @@ async def update_german_statistics(grade: int, correct: int, total: int, percent
     await db.german_statistics.replace_one({}, stats, upsert=True)
 
 @api_router.get("/german/settings")
-async def get_german_settings():
+async def get_german_settings(request: Request):
+    return await versioned_json_response(request, ["german_settings"], load_german_settings)
+
+async def load_german_settings() -> GermanSettings:
     settings = await db.german_settings.find_one()
     if not settings:
         settings = GermanSettings()
@@ -2913,6 +5605,7 @@ async def get_german_settings():
 @api_router.put("/german/settings")
 async def update_german_settings(settings: GermanSettings):
     await db.german_settings.replace_one({}, settings.dict(), upsert=True)
+    await bump_collection_versions("german_settings")
     return settings
 
 @api_router.get("/german/statistics")
@@ -2942,24 +5635,15 @@ async def create_english_challenge(grade: int):
     problem_count = settings_doc.get("problem_count", 15) if settings_doc else 15
     
     problems = await generate_english_problems(grade, problem_count)
-    challenge = EnglishChallenge(grade=grade, problems=problems)
+    challenge = build_challenge_document("english", grade, problems)
     
-    await db.english_challenges.insert_one(challenge.dict())
+    await db.english_challenges.insert_one(dict(challenge))
     return challenge
 
-@api_router.post("/english/challenge/{challenge_id}/submit")
-async def submit_english_answers(challenge_id: str, answers: Dict[int, str]):
-    challenge = await db.english_challenges.find_one({"id": challenge_id})
-    if not challenge:
-        raise HTTPException(status_code=404, detail="Challenge not found")
-    
-    challenge_obj = EnglishChallenge(**challenge)
-    
+def grade_english_answers(problems: List[EnglishProblem], answers: Dict[int, str]) -> int:
+    """Mark each answered problem correct or not, returning the number of correct answers"""
     correct_count = 0
-    total_problems = len(challenge_obj.problems)
-    
-    # Grade the answers
-    for i, problem in enumerate(challenge_obj.problems):
+    for i, problem in enumerate(problems):
         if i in answers:
             user_answer = str(answers[i]).strip()
             problem.user_answer = user_answer
@@ -2969,6 +5653,18 @@ async def submit_english_answers(challenge_id: str, answers: Dict[int, str]):
             
             if problem.is_correct:
                 correct_count += 1
+    return correct_count
+
+@api_router.post("/english/challenge/{challenge_id}/submit")
+async def submit_english_answers(challenge_id: str, answers: Dict[int, str]):
+    challenge = await db.english_challenges.find_one({"id": challenge_id})
+    if not challenge:
+        raise HTTPException(status_code=404, detail="Challenge not found")
+    
+    challenge_obj = construct_trusted_challenge(EnglishChallenge, EnglishProblem, challenge)
+    
+    total_problems = len(challenge_obj.problems)
+    correct_count = grade_english_answers(challenge_obj.problems, answers)
     
     # Calculate percentage and stars earned
     percentage = (correct_count / total_problems) * 100
@@ -3012,6 +5708,7 @@ async def submit_english_answers(challenge_id: str, answers: Dict[int, str]):
     
     await db.weekly_progress.replace_one({"week_start": week_start}, progress, upsert=True)
     await db.english_challenges.replace_one({"id": challenge_id}, challenge_obj.dict())
+    await bump_collection_versions("weekly_progress")
     
     return {
         "challenge": challenge_obj,
@@ -3069,7 +5766,10 @@ async def update_english_statistics(grade: int, correct: int, total: int, percen
     await db.english_statistics.replace_one({}, stats, upsert=True)
 
 @api_router.get("/english/settings")
-async def get_english_settings():
+async def get_english_settings(request: Request):
+    return await versioned_json_response(request, ["english_settings"], load_english_settings)
+
+async def load_english_settings() -> EnglishSettings:
     settings = await db.english_settings.find_one()
     if not settings:
         settings = EnglishSettings()
@@ -3080,6 +5780,7 @@ async def get_english_settings():
 @api_router.put("/english/settings")
 async def update_english_settings(settings: EnglishSettings):
     await db.english_settings.replace_one({}, settings.dict(), upsert=True)
+    await bump_collection_versions("english_settings")
     return settings
 
 @api_router.get("/english/statistics")
@@ -3098,71 +5799,62 @@ async def reset_english_statistics():
     await db.english_statistics.replace_one({}, stats.dict(), upsert=True)
     return {"message": "English statistics reset successfully"}
 
+# Offline preload bundle: built from the stored settings in the background, served precompressed from memory
+PRELOAD_REFRESH_SECONDS = float(os.environ.get('PRELOAD_REFRESH_SECONDS', '300'))
+PRELOAD_SETTINGS_COLLECTIONS = ["math_settings", "german_settings", "english_settings"]
+PRELOAD_GRADES = [2, 3]
+PRELOAD_PROBLEMS_PER_TYPE = 10
+_preload_payload: Optional[PrecompressedPayload] = None
+_preload_versions: Optional[Dict[str, int]] = None
+_preload_lock = asyncio.Lock()
+_preload_build: Optional[asyncio.Task] = None
+_preload_task: Optional[asyncio.Task] = None
+
+async def refresh_preload_payload() -> PrecompressedPayload:
+    """Build the bundle from the current settings and swap it in"""
+    global _preload_payload, _preload_versions
+    async with _preload_lock:
+        versions = await get_collection_versions(PRELOAD_SETTINGS_COLLECTIONS)
+        bundle = await build_preload_bundle()
+        # Max-level gzip/brotli of the whole bundle is CPU-heavy, keep it off the event loop
+        version = "s" + ".".join(str(versions[name]) for name in PRELOAD_SETTINGS_COLLECTIONS) + "-"
+        _preload_payload = await asyncio.to_thread(PrecompressedPayload, bundle, version)
+        _preload_versions = versions
+        return _preload_payload
+
+def schedule_preload_refresh() -> asyncio.Task:
+    """Rebuild the bundle in the background, sharing a rebuild that is already running"""
+    global _preload_build
+    if _preload_build is None or _preload_build.done():
+        _preload_build = asyncio.create_task(refresh_preload_payload())
+    return _preload_build
+
+async def get_preload_payload() -> PrecompressedPayload:
+    """Current bundle; only a cold start waits for generation, settings changes are picked up in the background"""
+    if _preload_payload is None:
+        cache_requests_total.inc("preload_bundle", "miss")
+        return await asyncio.shield(schedule_preload_refresh())
+    cache_requests_total.inc("preload_bundle", "hit")
+    if await get_collection_versions(PRELOAD_SETTINGS_COLLECTIONS) != _preload_versions:
+        # Settings were changed (possibly by another process): serve the current bundle until the new one is ready
+        schedule_preload_refresh()
+    return _preload_payload
+
+async def run_preload_refresher():
+    """Regenerate the bundle every PRELOAD_REFRESH_SECONDS so clients get fresh problems"""
+    while True:
+        try:
+            await asyncio.shield(schedule_preload_refresh())
+        except Exception as e:
+            print(f"⚠️ Preload refresh failed: {e}")
+        await asyncio.sleep(PRELOAD_REFRESH_SECONDS)
+
 @api_router.get("/cache/preload")
-async def preload_challenges():
+async def preload_challenges(request: Request):
     """Preload challenges for offline usage"""
     try:
-        cached_challenges = {
-            "math": {},
-            "german": {},
-            "english": {},
-            "timestamp": datetime.utcnow().isoformat()
-        }
-        
-        # Cache Math challenges for both grades
-        for grade in [2, 3]:
-            cached_challenges["math"][f"grade_{grade}"] = {
-                "addition": await generate_math_problems("addition", grade, 10, MathSettings()),
-                "subtraction": await generate_math_problems("subtraction", grade, 10, MathSettings()),
-                "multiplication": await generate_math_problems("multiplication", grade, 10, MathSettings()),
-                "word_problems": await generate_math_problems("word_problems", grade, 5, MathSettings())
-            }
-        
-        # Cache German challenges  
-        for grade in [2, 3]:
-            cached_challenges["german"][f"grade_{grade}"] = {
-                "spelling": await generate_spelling_problems(10, grade, GermanSettings()),
-                "word_types": await generate_word_type_problems(8, grade, GermanSettings()),
-                "fill_blank": await generate_fill_blank_problems(8, grade, GermanSettings())
-            }
-        
-        # Cache English challenges
-        for grade in [2, 3]:
-            cached_challenges["english"][f"grade_{grade}"] = {
-                "vocabulary_de_en": await generate_vocabulary_de_en_problems(10, grade, EnglishSettings()),
-                "vocabulary_en_de": await generate_vocabulary_en_de_problems(10, grade, EnglishSettings()),
-                "simple_sentences": await generate_simple_sentence_problems(8, grade, EnglishSettings())
-            }
-        
-        # Convert MathProblem, GermanProblem, EnglishProblem objects to dicts for JSON serialization
-        def serialize_problems(obj):
-            if hasattr(obj, 'dict'):
-                return obj.dict()
-            elif isinstance(obj, list):
-                return [serialize_problems(item) for item in obj]
-            elif isinstance(obj, dict):
-                return {k: serialize_problems(v) for k, v in obj.items()}
-            else:
-                return obj
-        
-        cached_challenges = serialize_problems(cached_challenges)
-        
-        return {
-            "success": True,
-            "cached_challenges": cached_challenges,
-            "total_problems": sum([
-                len(problems) for grade_data in cached_challenges["math"].values() 
-                for problems in grade_data.values() if isinstance(problems, list)
-            ]) + sum([
-                len(problems) for grade_data in cached_challenges["german"].values()
-                for problems in grade_data.values() if isinstance(problems, list)
-            ]) + sum([
-                len(problems) for grade_data in cached_challenges["english"].values()
-                for problems in grade_data.values() if isinstance(problems, list)
-            ]),
-            "message": "Challenges preloaded successfully for offline usage"
-        }
-        
+        payload = await get_preload_payload()
+        return payload.response(request)
     except Exception as e:
         return {
             "success": False,
@@ -3170,6 +5862,248 @@ async def preload_challenges():
             "message": "Failed to preload challenges"
         }
 
+async def build_preload_bundle() -> Dict[str, Any]:
+    """Generate the offline challenge bundle from the stored settings: every enabled problem type per grade"""
+    settings_by_subject = {
+        "math": await load_math_settings(),
+        "german": await load_german_settings(),
+        "english": await load_english_settings()
+    }
+    cached_challenges = {
+        "math": {},
+        "german": {},
+        "english": {},
+        "timestamp": datetime.utcnow().isoformat()
+    }
+    
+    for subject, settings in settings_by_subject.items():
+        registry = PROBLEM_GENERATORS[subject]
+        fields = PROBLEM_FIELDS[subject]
+        problem_types = [t for t, enabled in settings.problem_types.items() if enabled and t in registry]
+        problem_types = problem_types or DEFAULT_PROBLEM_TYPES[subject]
+        for grade in PRELOAD_GRADES:
+            grade_data = {}
+            for problem_type in problem_types:
+                count = min(PRELOAD_PROBLEMS_PER_TYPE, registry[problem_type].capacity(grade, settings) or PRELOAD_PROBLEMS_PER_TYPE)
+                try:
+                    result = await run_problem_generator(registry[problem_type], count, grade, settings)
+                except Exception as e:
+                    print(f"⚠️  Warning: Failed to preload {subject} {problem_type} problems: {e}")
+                    continue
+                # Problem records as dicts in the shape of their subject's API model
+                grade_data[problem_type] = [problem.to_dict(index, fields) for index, problem in enumerate(result)]
+            cached_challenges[subject][f"grade_{grade}"] = grade_data
+    
+    # Signed packs are not part of this shared bundle: each pack id can be redeemed once, so every device
+    # fetches its own from /challenge-packs
+    return {
+        "success": True,
+        "cached_challenges": cached_challenges,
+        "settings": {
+            subject: {"problem_count": settings.problem_count, "star_tiers": settings.star_tiers}
+            for subject, settings in settings_by_subject.items()
+        },
+        "total_problems": sum(
+            len(problems) for subject in settings_by_subject
+            for grade_data in cached_challenges[subject].values() for problems in grade_data.values()
+        ),
+        "message": "Challenges preloaded successfully for offline usage"
+    }
+
+# Offline challenge packs: problems carry salted answer hashes so clients grade locally, results are redeemed later
+CHALLENGE_PACK_TTL_SECONDS = int(os.environ.get('CHALLENGE_PACK_TTL_SECONDS', str(14 * 24 * 3600)))
+PACK_HIDDEN_FIELDS = ("correct_answer", "user_answer", "is_correct")
+_challenge_pack_secret: Optional[bytes] = None
+
+async def get_challenge_pack_secret() -> bytes:
+    """HMAC key for packs: CHALLENGE_PACK_SECRET, or a key generated once and kept in Mongo so every process shares it"""
+    global _challenge_pack_secret
+    if _challenge_pack_secret is None:
+        configured = os.environ.get('CHALLENGE_PACK_SECRET')
+        if configured:
+            _challenge_pack_secret = configured.encode("utf-8")
+        else:
+            doc = await db.app_secrets.find_one_and_update(
+                {"_id": "challenge_pack"}, {"$setOnInsert": {"secret": secrets.token_hex(32)}},
+                upsert=True, return_document=ReturnDocument.AFTER
+            )
+            _challenge_pack_secret = doc["secret"].encode("utf-8")
+    return _challenge_pack_secret
+
+def answer_key(subject: str, question_type: str, answer: str) -> str:
+    """Canonical form of an answer: two answers the submit endpoints grade alike have the same key"""
+    answer = str(answer).strip().lower()
+    if subject == "math" and question_type == "currency":
+        return answer.replace(",", ".")
+    if subject == "math" and question_type == "clock":
+        try:
+            return normalize_time_answer(answer)
+        except ValueError:
+            return answer
+    if subject == "german" and question_type == "sentence_order":
+        return " ".join(normalize_sentence_answer(answer))
+    return answer
+
+def answer_hash(salt: str, key: str) -> str:
+    return hashlib.sha256(f"{salt}:{key}".encode("utf-8")).hexdigest()
+
+def sign_pack(pack: Dict[str, Any], secret: bytes) -> str:
+    """HMAC over the pack's identity, validity and every problem's type, salt and answer hash"""
+    parts = [pack["id"], pack["subject"], str(pack["grade"]), pack["issued_at"], pack["expires_at"]]
+    parts += [
+        f'{problem["id"]}:{problem["question_type"]}:{problem["answer_salt"]}:{problem["answer_hash"]}'
+        for problem in pack["problems"]
+    ]
+    return hmac.new(secret, "\n".join(parts).encode("utf-8"), hashlib.sha256).hexdigest()
+
+async def build_challenge_pack(subject: str, grade: int, settings) -> Dict[str, Any]:
+    """A signed challenge with the answers replaced by salted hashes"""
+    problems = await generate_planned_problems(subject, grade, settings.problem_count, settings)
+    fields = tuple(field for field in PROBLEM_FIELDS[subject] if field not in PACK_HIDDEN_FIELDS)
+    pack_problems = []
+    for index, problem in enumerate(problems):
+        doc = problem.to_dict(index, fields)
+        doc["answer_salt"] = secrets.token_hex(8)
+        doc["answer_hash"] = answer_hash(doc["answer_salt"], answer_key(subject, problem.question_type, problem.correct_answer))
+        pack_problems.append(doc)
+    
+    issued_at = datetime.utcnow()
+    pack = {
+        "id": str(uuid.uuid4()),
+        "subject": subject,
+        "grade": grade,
+        "issued_at": issued_at.isoformat(),
+        "expires_at": (issued_at + timedelta(seconds=CHALLENGE_PACK_TTL_SECONDS)).isoformat(),
+        "star_tiers": settings.star_tiers,
+        "problems": pack_problems
+    }
+    pack["signature"] = sign_pack(pack, await get_challenge_pack_secret())
+    return pack
+
+def grade_challenge_pack(completed: CompletedPack, secret: bytes) -> List[Tuple[str, bool]]:
+    """Check a completed pack's signature and expiry, then grade its answers as (question_type, is_correct)"""
+    pack = completed.pack
+    try:
+        signature = sign_pack(pack, secret)
+    except (KeyError, TypeError):
+        raise ValueError("Malformed pack")
+    if not hmac.compare_digest(signature, str(pack.get("signature", ""))):
+        raise ValueError("Invalid signature")
+    if datetime.fromisoformat(pack["expires_at"]) < datetime.utcnow():
+        raise ValueError("Pack expired")
+    
+    graded = []
+    for index, problem in enumerate(pack["problems"]):
+        answer = completed.answers.get(index)
+        is_correct = answer is not None and hmac.compare_digest(
+            answer_hash(problem["answer_salt"], answer_key(pack["subject"], problem["question_type"], answer)),
+            problem["answer_hash"]
+        )
+        graded.append((problem["question_type"], is_correct))
+    return graded
+
+def stars_for_score(percentage: float, star_tiers: Dict[str, int]) -> int:
+    for threshold, stars in sorted([(int(k), v) for k, v in star_tiers.items()], reverse=True):
+        if percentage >= threshold:
+            return stars
+    return 0
+
+async def claim_challenge_packs(pack_ids: List[str]) -> set:
+    """Record packs as redeemed; returns the ids this call claimed (others were redeemed before)"""
+    if not pack_ids:
+        return set()
+    redeemed_at = datetime.utcnow()
+    try:
+        await db.redeemed_packs.insert_many([{"_id": pack_id, "redeemed_at": redeemed_at} for pack_id in pack_ids], ordered=False)
+        return set(pack_ids)
+    except BulkWriteError as e:
+        taken = {error["op"]["_id"] for error in e.details.get("writeErrors", []) if error.get("code") == 11000}
+        return set(pack_ids) - taken
+
+@api_router.get("/challenge-packs/{subject}/{grade}")
+async def get_challenge_packs(subject: str, grade: int, count: int = 1):
+    """Fresh signed packs for one device's offline use, built from the stored settings (never shared or cached)"""
+    if subject not in PROBLEM_FIELDS:
+        raise HTTPException(status_code=400, detail=f"Unknown subject: {subject}")
+    if grade not in PRELOAD_GRADES:
+        raise HTTPException(status_code=400, detail="Grade must be 2 or 3")
+    settings = await {"math": load_math_settings, "german": load_german_settings, "english": load_english_settings}[subject]()
+    packs = [await build_challenge_pack(subject, grade, settings) for _ in range(max(1, min(count, 10)))]
+    return FastJSONResponse(content={"packs": packs}, headers={"Cache-Control": "no-store"})
+
+@api_router.post("/challenge-packs/redeem")
+async def redeem_challenge_packs(redemption: PackRedemption):
+    """Verify completed offline packs in bulk and credit their stars once per pack"""
+    secret = await get_challenge_pack_secret()
+    results: List[Optional[Dict[str, Any]]] = [None] * len(redemption.packs)
+    graded = {}
+    for index, completed in enumerate(redemption.packs):
+        pack_id = str(completed.pack.get("id"))
+        try:
+            graded[index] = grade_challenge_pack(completed, secret)
+        except (ValueError, KeyError, TypeError) as e:
+            results[index] = {"pack_id": pack_id, "status": "rejected", "error": str(e)}
+    
+    claimed = await claim_challenge_packs(list({redemption.packs[index].pack["id"]: None for index in graded}))
+    
+    settings = {
+        "math": await load_math_settings(),
+        "german": await load_german_settings(),
+        "english": await load_english_settings()
+    }
+    problem_models = {"math": MathProblem, "german": GermanProblem, "english": EnglishProblem}
+    total_stars = 0
+    for index, problems in graded.items():
+        pack = redemption.packs[index].pack
+        if pack["id"] not in claimed:
+            results[index] = {"pack_id": pack["id"], "status": "duplicate"}
+            continue
+        claimed.discard(pack["id"])  # the same pack twice in one upload counts once
+        
+        subject, grade = pack["subject"], pack["grade"]
+        correct_count = sum(1 for _, is_correct in problems if is_correct)
+        total_problems = len(problems)
+        percentage = (correct_count / total_problems) * 100 if total_problems else 0
+        stars_earned = stars_for_score(percentage, settings[subject].star_tiers)
+        try:
+            if subject == "math":
+                await update_math_statistics(grade, correct_count, total_problems, percentage, stars_earned)
+            else:
+                graded_problems = [
+                    problem_models[subject].model_construct(question_type=question_type, is_correct=is_correct)
+                    for question_type, is_correct in problems
+                ]
+                update = update_german_statistics if subject == "german" else update_english_statistics
+                await update(grade, correct_count, total_problems, percentage, stars_earned, graded_problems)
+        except Exception as e:
+            # Release the claim so the client can retry the pack
+            await db.redeemed_packs.delete_one({"_id": pack["id"]})
+            results[index] = {"pack_id": pack["id"], "status": "failed", "error": str(e)}
+            continue
+        
+        total_stars += stars_earned
+        results[index] = {
+            "pack_id": pack["id"],
+            "status": "credited",
+            "correct_answers": correct_count,
+            "total_problems": total_problems,
+            "percentage": percentage,
+            "stars_earned": stars_earned
+        }
+    
+    if total_stars:
+        # Earned stars become available stars for rewards, as with submitted challenges
+        week_start = get_current_week_start()
+        defaults = {key: value for key, value in WeeklyProgress(week_start=week_start).dict().items() if key not in ("week_start", "available_stars")}
+        await db.weekly_progress.update_one(
+            {"week_start": week_start},
+            {"$inc": {"available_stars": total_stars}, "$setOnInsert": defaults},
+            upsert=True
+        )
+        await bump_collection_versions("weekly_progress")
+    
+    return {"results": results, "stars_earned": total_stars}
+
 # Basic status endpoints
 @api_router.get("/debug/stars-state")
 async def get_stars_debug():
@@ -3188,7 +6122,7 @@ async def get_stars_debug():
     unspent_earned = total_earned - total_used
     total_available_for_safe = unspent_earned + available_reward_stars
     
-    return {
+    return FastJSONResponse(content={
         "raw_progress": progress,
         "calculations": {
             "total_stars_earned": total_earned,
@@ -3203,7 +6137,7 @@ async def get_stars_debug():
             "available_stars": available_reward_stars,  # What frontend shows as "reward stars"
             "stars_in_safe": stars_in_safe
         }
-    }
+    })
 
 @api_router.get("/")
 async def root():
@@ -3214,12 +6148,93 @@ async def root():
     """Root endpoint for health check"""
     return {"message": "Weekly Star Tracker Backend is running!", "status": "healthy", "api": "/api/"}
 
+@app.get("/metrics", include_in_schema=False)
+async def metrics(request: Request):
+    """Request, generator, database and cache metrics in the Prometheus text format"""
+    if not METRICS_TOKEN:
+        raise HTTPException(status_code=404, detail="Not Found")
+    scheme, _, token = request.headers.get("authorization", "").partition(" ")
+    if scheme.lower() != "bearer" or not hmac.compare_digest(token.encode("utf-8"), METRICS_TOKEN.encode("utf-8")):
+        raise HTTPException(status_code=401, detail="Metrics token required", headers={"WWW-Authenticate": "Bearer"})
+    return Response(content=render_metrics(), media_type="text/plain; version=0.0.4; charset=utf-8")
+
 # Include the router
 app.include_router(api_router)
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# Indexes per collection, also built on staging collections before they are swapped in
+COLLECTION_INDEXES = {
+    "week_stars": [([("week_start", 1), ("task_id", 1)], {"unique": True})],
+    "tasks": [([("created_at", 1), ("id", 1)], {})],
+    "rewards": [([("created_at", 1), ("id", 1)], {})]
+}
+
+async def create_collection_indexes(name: str, collection=None):
+    """Create the indexes `name` needs, on `collection` (defaults to the live one)"""
+    collection = collection if collection is not None else db[name]
+    for keys, options in COLLECTION_INDEXES.get(name, []):
+        await collection.create_index(keys, **options)
+    if name in SYNC_COLLECTIONS:
+        await collection.create_index("sync_seq")
+    if name in STAMPED_COLLECTIONS:
+        await collection.create_index("updated_at")
+
+async def backfill_reward_created_at():
+    """Rewards created before they carried created_at get their insertion time, for keyset paging"""
+    rewards = await db.rewards.find({"created_at": {"$exists": False}}, {"_id": 1}).to_list(length=None)
+    if rewards:
+        await db.rewards.bulk_write([
+            UpdateOne(
+                {"_id": reward["_id"]},
+                {"$set": {"created_at": reward["_id"].generation_time.replace(tzinfo=None) if isinstance(reward["_id"], ObjectId) else datetime(1970, 1, 1)}}
+            )
+            for reward in rewards
+        ], ordered=False)
+        await bump_collection_versions("rewards")
+
+async def backfill_updated_at():
+    """Documents written before writes carried updated_at count as changed now, so the next incremental backup has them"""
+    for name in STAMPED_COLLECTIONS:
+        if await db[name].find_one({"updated_at": {"$exists": False}}, {"_id": 1}):
+            await db[name].update_many({"updated_at": {"$exists": False}}, {"$set": {}})
+
+@app.on_event("startup")
+async def prepare_database():
+    """Create indexes and migrate data written by earlier versions"""
+    try:
+        for name in set(COLLECTION_INDEXES) | set(STAMPED_COLLECTIONS):
+            await create_collection_indexes(name)
+        await db.sync_tombstones.create_index("sync_seq")
+        await db.sync_tombstones.create_index("deleted_at")
+        await db.mutation_keys.create_index("created_at", expireAfterSeconds=MUTATION_KEY_TTL_SECONDS)
+        # Expired packs are rejected anyway, so their redemption records can go a day later
+        await db.redeemed_packs.create_index("redeemed_at", expireAfterSeconds=CHALLENGE_PACK_TTL_SECONDS + 24 * 3600)
+        await backfill_reward_created_at()
+        await backfill_updated_at()
+        await migrate_daily_stars_to_week_rows()
+        await current_sync_watermark()  # seeds the floor used for seqs still being allocated
+        await prune_sync_tombstones()
+    except Exception as e:
+        print(f"⚠️ Database preparation failed: {e}")
+
+@app.on_event("startup")
+async def start_preload_refresher():
+    """Build the preload bundle in the background and keep it fresh"""
+    global _preload_task
+    _preload_task = asyncio.create_task(run_preload_refresher())
+
+@app.on_event("startup")
+async def start_snapshot_scheduler():
+    """Run scheduled snapshots in the background"""
+    global _snapshot_task
+    if SNAPSHOTS_ENABLED:
+        _snapshot_task = asyncio.create_task(run_snapshot_scheduler())
+
 @app.on_event("shutdown")
 async def shutdown_db_client():
+    for task in (_preload_task, _snapshot_task):
+        if task is not None:
+            task.cancel()
     client.close()
\ No newline at end of file
@@ -37,7 +37,8 @@ self.addEventListener('install', (event) => {
         }),
       
       // Preload challenges for offline usage
-      preloadChallenges()
+      preloadChallenges(),
+      refillChallengePacks()
     ]).then(() => {
       console.log('✅ Service Worker v3 installed successfully');
       self.skipWaiting();
@@ -95,7 +96,11 @@ self.addEventListener('activate', (event) => {
       }),
       
       // Take control of all clients
-      self.clients.claim()
+      self.clients.claim(),
+      
+      // Upload offline results left over from the last session
+      redeemPendingPacks(),
+      refillChallengePacks()
     ])
   );
 });
@@ -104,7 +109,12 @@ self.addEventListener('activate', (event) => {
 self.addEventListener('fetch', (event) => {
   const { request } = event;
   const url = new URL(request.url);
-  
+
+  // Server-sent event stream: never cache, let the browser handle it directly
+  if (url.pathname.endsWith('/api/events')) {
+    return;
+  }
+
   // Handle API requests
   if (url.pathname.startsWith('/api/')) {
     event.respondWith(handleApiRequest(request));
@@ -119,6 +129,11 @@ self.addEventListener('fetch', (event) => {
 async function handleApiRequest(request) {
   const url = new URL(request.url);
   
+  // Answers to an offline pack are graded right here and redeemed with the server later
+  if (request.method === 'POST' && url.pathname.includes('/challenge/offline-') && url.pathname.endsWith('/submit')) {
+    return await gradeOfflineChallenge(request, url);
+  }
+  
   // Handle challenge creation with offline fallback
   if (url.pathname.includes('/challenge/') && request.method === 'POST') {
     try {
@@ -142,6 +157,9 @@ async function handleApiRequest(request) {
         // Cache successful responses
         const cache = await caches.open(API_CACHE_NAME);
         cache.put(request, networkResponse.clone());
+        // Back online: upload queued offline results and top up this device's packs
+        redeemPendingPacks();
+        refillChallengePacks();
         return networkResponse;
       }
       throw new Error('Network response not ok');
@@ -177,6 +195,35 @@ async function handleApiRequest(request) {
 async function serveCachedChallenge(url) {
   try {
     const cache = await caches.open(CHALLENGES_CACHE_NAME);
+    
+    // Extract challenge type and grade from URL
+    const pathParts = url.pathname.split('/');
+    const challengeType = pathParts[2]; // math, german, english
+    const grade = pathParts[4]; // grade number
+    
+    // Prefer a signed pack: it can be graded offline and its stars are credited once back online
+    const pack = await takeChallengePack(challengeType, grade);
+    if (pack) {
+      const challengeId = `offline-${pack.id}`;
+      await cache.put(`/offline-pack/${challengeId}`, new Response(JSON.stringify(pack)));
+      
+      return new Response(JSON.stringify({
+        challenge: {
+          id: challengeId,
+          grade: parseInt(grade),
+          problems: pack.problems,
+          created_at: new Date().toISOString(),
+          offline: true
+        },
+        success: true,
+        message: `Offline ${challengeType} challenge loaded with ${pack.problems.length} problems`,
+        offline: true
+      }), {
+        status: 200,
+        headers: { 'Content-Type': 'application/json' }
+      });
+    }
+    
     const cachedData = await cache.match('/offline-challenges');
     
     if (!cachedData) {
@@ -197,11 +244,6 @@ async function serveCachedChallenge(url) {
       console.warn('⚠️  Cached challenges expired, but serving anyway due to offline mode');
     }
     
-    // Extract challenge type and grade from URL
-    const pathParts = url.pathname.split('/');
-    const challengeType = pathParts[2]; // math, german, english
-    const grade = pathParts[4]; // grade number
-    
     let problems = [];
     
     if (challengeType === 'math' && challengeData.math && challengeData.math[`grade_${grade}`]) {
@@ -271,6 +313,229 @@ async function serveCachedChallenge(url) {
   }
 }
 
+// Offline challenge packs: each problem carries a salted hash of its answer
+const PENDING_PACK_RESULTS_URL = '/pending-pack-results';
+// Packs are fetched per device and served once: the server credits each pack id a single time
+const PACK_STORE_URL = '/offline-packs';
+const PACK_SUBJECTS = ['math', 'german', 'english'];
+const PACK_GRADES = [2, 3];
+const PACKS_PER_GRADE = 3;
+let packStoreQueue = Promise.resolve();
+let packRefill = null;
+
+// Read-modify-write of the stored packs, one at a time so a refill can't resurrect a pack that was just served
+function withPackStore(update) {
+  const result = packStoreQueue.then(async () => {
+    const cache = await caches.open(CHALLENGES_CACHE_NAME);
+    const stored = await cache.match(PACK_STORE_URL);
+    const store = stored ? await stored.json() : {};
+    const value = update(store);
+    await cache.put(PACK_STORE_URL, new Response(JSON.stringify(store)));
+    return value;
+  });
+  packStoreQueue = result.catch(() => {});
+  return result;
+}
+
+// Remove and return the next unexpired pack for a subject and grade
+function takeChallengePack(subject, grade) {
+  return withPackStore((store) => {
+    const packs = (store[subject] || {})[`grade_${grade}`] || [];
+    const now = new Date();
+    while (packs.length > 0) {
+      const pack = packs.shift();
+      if (new Date(pack.expires_at) > now) {
+        return pack;
+      }
+    }
+    return null;
+  });
+}
+
+// Drop expired packs and fetch new ones until every subject and grade has PACKS_PER_GRADE
+function refillChallengePacks() {
+  if (packRefill) {
+    return packRefill;
+  }
+  packRefill = (async () => {
+    const missing = await withPackStore((store) => {
+      const now = new Date();
+      const wanted = [];
+      for (const subject of PACK_SUBJECTS) {
+        store[subject] = store[subject] || {};
+        for (const grade of PACK_GRADES) {
+          const key = `grade_${grade}`;
+          store[subject][key] = (store[subject][key] || []).filter((pack) => new Date(pack.expires_at) > now);
+          if (store[subject][key].length < PACKS_PER_GRADE) {
+            wanted.push([subject, grade, PACKS_PER_GRADE - store[subject][key].length]);
+          }
+        }
+      }
+      return wanted;
+    });
+    for (const [subject, grade, count] of missing) {
+      const response = await fetch(`/api/challenge-packs/${subject}/${grade}?count=${count}`, { credentials: 'same-origin' });
+      if (!response.ok) {
+        continue;
+      }
+      const data = await response.json();
+      await withPackStore((store) => {
+        store[subject] = store[subject] || {};
+        store[subject][`grade_${grade}`] = [...(store[subject][`grade_${grade}`] || []), ...data.packs].slice(0, PACKS_PER_GRADE);
+      });
+    }
+  })().catch(() => {
+    console.log('🔄 Offline challenge packs will be refilled when the connection is back');
+  }).finally(() => {
+    packRefill = null;
+  });
+  return packRefill;
+}
+
+async function sha256Hex(text) {
+  const digest = await crypto.subtle.digest('SHA-256', new TextEncoder().encode(text));
+  return Array.from(new Uint8Array(digest)).map((byte) => byte.toString(16).padStart(2, '0')).join('');
+}
+
+function normalizeTimeAnswer(value) {
+  const time = value.replace(/ /g, '').replace(/uhr/g, '');
+  const isNumber = (part) => /^\d+$/.test(part);
+  const parts = time.includes(':') ? time.split(':') : time.includes('.') ? time.split('.') : null;
+  if (parts === null) {
+    return isNumber(time) ? `${parseInt(time, 10)}:00` : value;
+  }
+  if (parts.length === 2) {
+    if (!isNumber(parts[0]) || !isNumber(parts[1])) {
+      return value;
+    }
+    let hours = parseInt(parts[0], 10);
+    const minutes = parseInt(parts[1], 10);
+    if (hours > 12) {
+      hours -= 12;
+    }
+    return `${hours}:${String(minutes).padStart(2, '0')}`;
+  }
+  return time;
+}
+
+// Mirrors answer_key() in the backend: answers graded alike hash alike
+function answerKey(subject, questionType, answer) {
+  const value = String(answer).trim().toLowerCase();
+  if (subject === 'math' && questionType === 'currency') {
+    return value.replace(/,/g, '.');
+  }
+  if (subject === 'math' && questionType === 'clock') {
+    return normalizeTimeAnswer(value);
+  }
+  if (subject === 'german' && questionType === 'sentence_order') {
+    const tokens = value.match(/[\p{L}\p{N}]+(?:-[\p{L}\p{N}]+)*/gu) || [];
+    return tokens.map((token) => token.replace(/ß/g, 'ss')).join(' ');
+  }
+  return value;
+}
+
+async function readPendingPackResults() {
+  const cache = await caches.open(CHALLENGES_CACHE_NAME);
+  const stored = await cache.match(PENDING_PACK_RESULTS_URL);
+  return stored ? await stored.json() : [];
+}
+
+async function writePendingPackResults(results) {
+  const cache = await caches.open(CHALLENGES_CACHE_NAME);
+  await cache.put(PENDING_PACK_RESULTS_URL, new Response(JSON.stringify(results)));
+}
+
+// Grade a submitted offline challenge against its pack and queue the result for redemption
+async function gradeOfflineChallenge(request, url) {
+  const challengeId = url.pathname.split('/')[4];
+  const cache = await caches.open(CHALLENGES_CACHE_NAME);
+  const stored = await cache.match(`/offline-pack/${challengeId}`);
+  if (!stored) {
+    return new Response(JSON.stringify({ detail: 'Challenge not found' }), {
+      status: 404,
+      headers: { 'Content-Type': 'application/json' }
+    });
+  }
+  
+  const pack = await stored.json();
+  const answers = await request.json();
+  let correctCount = 0;
+  const problems = [];
+  for (const [index, problem] of pack.problems.entries()) {
+    const answer = answers[index];
+    const isCorrect = answer !== undefined && answer !== null &&
+      await sha256Hex(`${problem.answer_salt}:${answerKey(pack.subject, problem.question_type, answer)}`) === problem.answer_hash;
+    if (isCorrect) {
+      correctCount++;
+    }
+    problems.push({ ...problem, user_answer: answer ?? null, is_correct: isCorrect });
+  }
+  
+  const percentage = pack.problems.length ? (correctCount / pack.problems.length) * 100 : 0;
+  let starsEarned = 0;
+  const tiers = Object.entries(pack.star_tiers || {}).map(([threshold, stars]) => [parseInt(threshold), stars]);
+  for (const [threshold, stars] of tiers.sort((a, b) => b[0] - a[0])) {
+    if (percentage >= threshold) {
+      starsEarned = stars;
+      break;
+    }
+  }
+  
+  const pending = await readPendingPackResults();
+  pending.push({ pack, answers });
+  await writePendingPackResults(pending);
+  await cache.delete(`/offline-pack/${challengeId}`);
+  redeemPendingPacks();
+  
+  return new Response(JSON.stringify({
+    challenge: {
+      id: challengeId,
+      grade: pack.grade,
+      problems,
+      completed: true,
+      score: percentage,
+      stars_earned: starsEarned
+    },
+    correct_answers: correctCount,
+    total_problems: pack.problems.length,
+    percentage,
+    stars_earned: starsEarned,
+    offline: true
+  }), {
+    status: 200,
+    headers: { 'Content-Type': 'application/json' }
+  });
+}
+
+// Upload queued pack results; the server verifies them and credits each pack's stars once
+async function redeemPendingPacks() {
+  const pending = await readPendingPackResults();
+  if (pending.length === 0) {
+    return;
+  }
+  
+  try {
+    const response = await fetch('/api/challenge-packs/redeem', {
+      method: 'POST',
+      credentials: 'same-origin',
+      headers: { 'Content-Type': 'application/json' },
+      body: JSON.stringify({ packs: pending })
+    });
+    if (!response.ok) {
+      return;
+    }
+    const data = await response.json();
+    
+    // Credited, duplicate and rejected packs are settled; failed ones stay queued for the next attempt
+    const settled = new Set(data.results.filter((result) => result.status !== 'failed').map((result) => result.pack_id));
+    const current = await readPendingPackResults();
+    await writePendingPackResults(current.filter((result) => !settled.has(result.pack.id)));
+    console.log(`⭐ Redeemed offline challenges: ${data.stars_earned} stars credited`);
+  } catch (error) {
+    console.log('🔄 Offline challenge results stay queued until the connection is back');
+  }
+}
+
 // Handle static requests with cache-first strategy
 async function handleStaticRequest(request) {
   // Try cache first
@@ -373,7 +638,8 @@ self.addEventListener('sync', (event) => {
 
 async function doBackgroundSync() {
   console.log('📡 Attempting background sync...');
-  // Here you could implement queued actions that should be synced when online
+  await redeemPendingPacks();
+  await refillChallengePacks();
 }
 
 // Handle push notifications (for future use)
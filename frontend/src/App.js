@@ -2678,6 +2678,9 @@ const MathChallenge = ({ onClose, onComplete }) => {
   );
 };
 
+// Collections kept current by star and progress events
+const LIVE_COLLECTIONS = ['week_stars', 'weekly_progress'];
+
 // Main App Component
 function App() {
   const [tasks, setTasks] = useState([]);
@@ -2703,6 +2706,42 @@ function App() {
     loadData();
   }, []);
 
+  // Live updates from other devices via server-sent events
+  useEffect(() => {
+    if (isMockMode() || typeof EventSource === 'undefined') {
+      return undefined;
+    }
+    const events = new EventSource(`${API}/events`);
+    let refreshTimer = null;
+    const scheduleRefresh = () => {
+      clearTimeout(refreshTimer);
+      refreshTimer = setTimeout(loadData, 300);
+    };
+    // Stars and totals arrive as star and progress events; other changes need a refetch
+    events.addEventListener('changed', (event) => {
+      const { collections = [] } = JSON.parse(event.data);
+      if (collections.some((name) => !LIVE_COLLECTIONS.includes(name))) {
+        scheduleRefresh();
+      }
+    });
+    events.addEventListener('star', (event) => {
+      const cell = JSON.parse(event.data);
+      setWeekStars((cells) => {
+        const others = cells.filter((s) => !(s.task_id === cell.task_id && s.day === cell.day));
+        return cell.stars ? [...others, { id: `${cell.task_id}-${cell.day}`, ...cell }] : others;
+      });
+    });
+    events.addEventListener('progress', (event) => {
+      const totals = JSON.parse(event.data);
+      setProgress((current) => ({ ...current, ...totals }));
+    });
+    events.addEventListener('resync', scheduleRefresh);
+    return () => {
+      clearTimeout(refreshTimer);
+      events.close();
+    };
+  }, []);
+
   const loadData = async () => {
     try {
       if (isMockMode()) {
@@ -2720,18 +2759,13 @@ function App() {
         console.log('📊 Demo Mode: Data loaded from mock API');
         console.log('📊 Progress object:', progress);
       } else {
-        // Use real API
-        const [tasksRes, starsRes, progressRes, rewardsRes] = await Promise.all([
-          axios.get(`${API}/tasks`),
-          axios.get(`${API}/stars`),
-          axios.get(`${API}/progress`),
-          axios.get(`${API}/rewards`)
-        ]);
+        // Use real API (one aggregated request, revalidated via ETag)
+        const dashboardRes = await axios.get(`${API}/dashboard`);
         
-        setTasks(tasksRes.data);
-        setWeekStars(starsRes.data);
-        setProgress(progressRes.data);
-        setRewards(rewardsRes.data);
+        setTasks(dashboardRes.data.tasks);
+        setWeekStars(dashboardRes.data.stars);
+        setProgress(dashboardRes.data.progress);
+        setRewards(dashboardRes.data.rewards);
       }
     } catch (error) {
       console.error('Fehler beim Laden der Daten:', error);
@@ -3118,16 +3152,16 @@ function App() {
   // Export/Import Functions
   const exportData = async () => {
     try {
-      const response = await axios.get(`${API}/backup/export`);
-      const data = response.data;
+      // Binary export: compressed BSON sections with checksums, saved as-is
+      const response = await axios.get(`${API}/backup/export/binary`, { responseType: 'blob' });
       
       // Create filename with current date
       const now = new Date();
       const dateStr = now.toISOString().split('T')[0]; // YYYY-MM-DD
-      const filename = `weekly-star-tracker-backup-${dateStr}.json`;
+      const filename = `weekly-star-tracker-backup-${dateStr}.wstb`;
       
       // Create and download file
-      const blob = new Blob([JSON.stringify(data, null, 2)], { type: 'application/json' });
+      const blob = new Blob([response.data], { type: 'application/vnd.weekly-star-tracker.backup' });
       const url = URL.createObjectURL(blob);
       const link = document.createElement('a');
       link.href = url;
@@ -3146,15 +3180,28 @@ function App() {
 
   const importData = async (file) => {
     try {
-      const text = await file.text();
-      const backupData = JSON.parse(text);
-      
-      // Validate backup
-      if (!backupData.data || !backupData.app_version) {
-        throw new Error('Ungültiges Backup-Format');
+      let response;
+      if (file.name.endsWith('.wstb')) {
+        // Binary backup: upload the file unchanged, the server checks each section's checksum
+        response = await axios.post(`${API}/backup/import`, file, {
+          headers: { 'Content-Type': 'application/vnd.weekly-star-tracker.backup' }
+        });
+      } else if (file.name.endsWith('.gz') || file.name.endsWith('.ndjson')) {
+        // Streaming backup: upload the file unchanged, the server restores it section by section
+        response = await axios.post(`${API}/backup/import`, file, {
+          headers: { 'Content-Type': file.name.endsWith('.gz') ? 'application/gzip' : 'application/x-ndjson' }
+        });
+      } else {
+        const text = await file.text();
+        const backupData = JSON.parse(text);
+        
+        // Validate backup
+        if (!backupData.data || !backupData.app_version) {
+          throw new Error('Ungültiges Backup-Format');
+        }
+        
+        response = await axios.post(`${API}/backup/import`, backupData);
       }
-      
-      const response = await axios.post(`${API}/backup/import`, backupData);
       const results = response.data.results;
       
       // Show import results
@@ -3189,7 +3236,8 @@ function App() {
   const handleFileImport = (event) => {
     const file = event.target.files[0];
     if (file) {
-      if (file.type === 'application/json' || file.name.endsWith('.json')) {
+      if (file.type === 'application/json' || file.name.endsWith('.json') ||
+          file.name.endsWith('.ndjson') || file.name.endsWith('.gz') || file.name.endsWith('.wstb')) {
         const confirmMsg = '⚠️ ACHTUNG: Import überschreibt alle aktuellen Daten!\n\n' +
                           'Möchten Sie zuerst ein Backup Ihrer aktuellen Daten erstellen?\n\n' +
                           'Klicken Sie "Abbrechen" um zuerst zu exportieren, oder "OK" um fortzufahren.';
@@ -3198,7 +3246,7 @@ function App() {
           importData(file);
         }
       } else {
-        alert('❌ Bitte wählen Sie eine JSON-Datei aus!');
+        alert('❌ Bitte wählen Sie eine Backup-Datei (.wstb, .json oder .ndjson.gz) aus!');
       }
     }
     // Reset file input
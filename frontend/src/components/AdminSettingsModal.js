@@ -54,7 +54,7 @@ const AdminSettingsModal = ({
   const handleFileUpload = () => {
     const input = document.createElement('input');
     input.type = 'file';
-    input.accept = '.json';
+    input.accept = '.wstb,.json,.ndjson,.gz';
     input.onchange = onImportData;
     input.click();
   };
@@ -0,0 +1,210 @@
+#!/usr/bin/env python3
+"""
+Generator Benchmark for Weekly Star Tracker
+Times every registered problem generator (per grade and difficulty), planned mixes of 10/100/1000 problems
+and the grading loops of the submit endpoints, then compares the medians with a stored baseline.
+
+    python generator_benchmark.py                      # compare with generator_benchmark_baseline.json
+    python generator_benchmark.py --update-baseline    # store this run as the new baseline
+    python generator_benchmark.py --output run.json --threshold 0.5 --filter german
+
+Exits with status 1 when a benchmark's median is slower than the baseline by more than the threshold.
+Timings depend on the machine, so refresh the baseline on the machine that runs the comparison.
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import platform
+import statistics
+import sys
+import time
+from datetime import datetime
+
+ROOT_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(ROOT_DIR, "backend"))
+os.environ.setdefault("MONGO_URL", "mongodb://localhost:27017")
+os.environ["OPENAI_API_KEY"] = ""  # keep generators on the static content path
+
+import server  # noqa: E402
+
+DEFAULT_BASELINE = os.path.join(ROOT_DIR, "generator_benchmark_baseline.json")
+DEFAULT_THRESHOLD = float(os.environ.get("BENCHMARK_THRESHOLD", "0.25"))
+MAX_ROUNDS = 200
+MIN_ROUNDS = 5
+TIME_BUDGET_SECONDS = 0.25  # per benchmark, after the warm-up call
+GRADES = [2, 3]
+GENERATOR_COUNT = 10
+MIX_COUNTS = [10, 100, 1000]
+GRADING_COUNT = 100
+
+GERMAN_DIFFICULTIES = {
+    "easy": {"spelling_difficulty": "easy", "word_types_include_adjectives": False, "fill_blank_context_length": "short"},
+    "medium": {"spelling_difficulty": "medium", "word_types_include_adjectives": True, "fill_blank_context_length": "medium"},
+    "hard": {"spelling_difficulty": "hard", "word_types_include_adjectives": True, "fill_blank_context_length": "long"}
+}
+ENGLISH_DIFFICULTIES = {
+    "basic": {"vocabulary_level": "basic", "include_articles": False, "sentence_complexity": "simple"},
+    "intermediate": {"vocabulary_level": "intermediate", "include_articles": True, "sentence_complexity": "medium"}
+}
+SETTINGS_MODELS = {"math": server.MathSettings, "german": server.GermanSettings, "english": server.EnglishSettings}
+GRADING = {
+    "math": (server.MathChallenge, server.MathProblem, server.grade_math_answers),
+    "german": (server.GermanChallenge, server.GermanProblem, server.grade_german_answers),
+    "english": (server.EnglishChallenge, server.EnglishProblem, server.grade_english_answers)
+}
+
+def all_types_settings(subject, **overrides):
+    """Settings with every registered problem type enabled"""
+    problem_types = {problem_type: True for problem_type in server.PROBLEM_GENERATORS[subject]}
+    return SETTINGS_MODELS[subject](problem_types=problem_types, **overrides)
+
+def generator_cases():
+    """(name, async callable) for each generator, grade and difficulty"""
+    cases = []
+    math_settings = server.MathSettings()
+    for problem_type in server.PROBLEM_GENERATORS["math"]:
+        for grade in GRADES:
+            cases.append((
+                f"generate/math/{problem_type}/grade{grade}",
+                lambda t=problem_type, g=grade: server.generate_math_problems(t, g, GENERATOR_COUNT, math_settings)
+            ))
+    for subject, difficulties in (("german", GERMAN_DIFFICULTIES), ("english", ENGLISH_DIFFICULTIES)):
+        for level, difficulty_settings in difficulties.items():
+            settings = SETTINGS_MODELS[subject](difficulty_settings=difficulty_settings)
+            for problem_type, generator in server.PROBLEM_GENERATORS[subject].items():
+                for grade in GRADES:
+                    cases.append((
+                        f"generate/{subject}/{problem_type}/grade{grade}/{level}",
+                        lambda gen=generator, g=grade, s=settings: gen.generate(GENERATOR_COUNT, g, s)
+                    ))
+    return cases
+
+def mix_cases():
+    """Planned mixes over every problem type, as the challenge endpoints generate them"""
+    cases = []
+    for subject in server.PROBLEM_GENERATORS:
+        settings = all_types_settings(subject)
+        for grade in GRADES:
+            for count in MIX_COUNTS:
+                cases.append((
+                    f"mix/{subject}/grade{grade}/{count}",
+                    lambda sub=subject, g=grade, n=count, s=settings: server.generate_planned_problems(sub, g, n, s)
+                ))
+    return cases
+
+async def grading_cases():
+    """Grading loops of the submit endpoints over a stored-shape challenge, every other answer correct"""
+    cases = []
+    for subject, (challenge_model, problem_model, grade_answers) in GRADING.items():
+        for grade in GRADES:
+            records = await server.generate_planned_problems(subject, grade, GRADING_COUNT, all_types_settings(subject))
+            doc = server.build_challenge_document(subject, grade, records)
+            challenge = server.construct_trusted_challenge(challenge_model, problem_model, doc)
+            answers = {
+                i: problem.correct_answer if i % 2 == 0 else "0"
+                for i, problem in enumerate(challenge.problems)
+            }
+
+            async def run(problems=challenge.problems, answers=answers, grade_answers=grade_answers):
+                return grade_answers(problems, answers)
+            cases.append((f"grade/{subject}/grade{grade}/{len(challenge.problems)}", run))
+    return cases
+
+async def measure(func):
+    """Per-call timings: one warm-up call, then as many rounds as fit the time budget"""
+    start = time.perf_counter()
+    await func()
+    warmup = time.perf_counter() - start
+    rounds = max(MIN_ROUNDS, min(MAX_ROUNDS, int(TIME_BUDGET_SECONDS / max(warmup, 1e-6))))
+    timings = []
+    for _ in range(rounds):
+        start = time.perf_counter()
+        await func()
+        timings.append(time.perf_counter() - start)
+    return {
+        "rounds": rounds,
+        "median_ms": statistics.median(timings) * 1000,
+        "mean_ms": statistics.fmean(timings) * 1000,
+        "min_ms": min(timings) * 1000
+    }
+
+def load_baseline(path):
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            return json.load(f)["results"]
+    except FileNotFoundError:
+        return None
+
+def compare(results, baseline, threshold):
+    """Print each benchmark next to its baseline; returns the names that regressed beyond the threshold"""
+    regressions = []
+    for name, result in results.items():
+        base = (baseline or {}).get(name)
+        line = f"{name:<52} {result['median_ms']:10.3f} ms"
+        if base:
+            ratio = result["median_ms"] / max(base["median_ms"], 1e-9)
+            flag = ""
+            if ratio > 1 + threshold:
+                regressions.append(name)
+                flag = "   ❌ REGRESSION"
+            line += f"   baseline {base['median_ms']:10.3f} ms   {ratio:5.2f}x{flag}"
+        elif baseline is not None:
+            line += "   (new)"
+        print(line)
+    return regressions
+
+async def main():
+    parser = argparse.ArgumentParser(description="Benchmark problem generators and grading")
+    parser.add_argument("--baseline", default=DEFAULT_BASELINE, help="baseline results to compare with")
+    parser.add_argument("--update-baseline", action="store_true", help="store this run as the baseline")
+    parser.add_argument("--threshold", type=float, default=DEFAULT_THRESHOLD,
+                        help="allowed slowdown of a median before failing (0.25 = 25%%)")
+    parser.add_argument("--output", help="write this run's results as JSON")
+    parser.add_argument("--filter", default="", help="only run benchmarks whose name contains this text")
+    args = parser.parse_args()
+
+    print("📊 GENERATOR BENCHMARK")
+    print("=" * 60)
+    print(f"Benchmark time: {datetime.now().isoformat()}")
+    print(f"Regression threshold: {args.threshold:.0%}")
+    print()
+
+    cases = generator_cases() + mix_cases() + await grading_cases()
+    results = {}
+    for name, func in cases:
+        if args.filter in name:
+            results[name] = await measure(func)
+
+    run = {
+        "benchmark_time": datetime.now().isoformat(),
+        "python": platform.python_version(),
+        "machine": platform.machine(),
+        "results": results
+    }
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(run, f, indent=2)
+
+    if args.update_baseline:
+        compare(results, None, args.threshold)
+        with open(args.baseline, "w", encoding="utf-8") as f:
+            json.dump(run, f, indent=2)
+        print(f"\n✅ Baseline written to {args.baseline}")
+        return 0
+
+    baseline = load_baseline(args.baseline)
+    regressions = compare(results, baseline, args.threshold)
+    print()
+    if baseline is None:
+        print(f"⚠️  No baseline at {args.baseline}, run with --update-baseline to store one")
+        return 0
+    if regressions:
+        print(f"❌ {len(regressions)} benchmark(s) slower than the baseline by more than {args.threshold:.0%}")
+        return 1
+    print("✅ No regressions")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(asyncio.run(main()))
@@ -0,0 +1,225 @@
+#!/usr/bin/env python3
+"""
+Load Test for Weekly Star Tracker
+Concurrent virtual users replaying real sessions (dashboard loads, star taps, safe transfers,
+challenge create/submit, reward claims) against the app, reporting throughput, latency percentiles
+and error rates per scenario.
+
+    python load_test.py                                   # in process, in-memory database (mongomock-motor)
+    python load_test.py --database mongo                  # in process, throwaway database on MONGO_URL
+    python load_test.py --url http://localhost:8001       # a server already running on this machine
+
+In process, no network is needed: requests go straight to the ASGI app. The script needs httpx, and
+mongomock-motor for the in-memory database: pip install -r backend/requirements-dev.txt
+"""
+
+import argparse
+import asyncio
+import os
+import random
+import statistics
+import sys
+import time
+import uuid
+from datetime import datetime
+
+import httpx
+
+ROOT_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(ROOT_DIR, "backend"))
+
+try:
+    from mongomock_motor import AsyncMongoMockClient
+except ImportError:
+    AsyncMongoMockClient = None
+
+DAYS = ["monday", "tuesday", "wednesday", "thursday", "friday", "saturday", "sunday"]
+SUBJECTS = ["math", "german", "english"]
+SEED_TASKS = 6
+SEED_REWARDS = 4
+CORRECT_ANSWER_RATE = 0.85  # share of challenge answers a virtual user gets right
+
+class ScenarioStats:
+    """Session latencies and request outcomes of one scenario"""
+    def __init__(self):
+        self.latencies = []
+        self.requests = 0
+        self.rejected = 0  # 4xx: business rules such as "not enough stars"
+        self.errors = 0  # 5xx and transport failures
+
+def percentile(values, fraction):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))]
+
+class VirtualUser:
+    """One simulated family member; keeps its own ETags like the frontend does"""
+    def __init__(self, client, stats, task_ids):
+        self.client = client
+        self.stats = stats
+        self.task_ids = task_ids
+        self.etags = {}
+
+    async def request(self, scenario, method, url, **kwargs):
+        stats = self.stats[scenario]
+        stats.requests += 1
+        try:
+            response = await self.client.request(method, url, **kwargs)
+        except httpx.HTTPError:
+            stats.errors += 1
+            return None
+        if response.status_code >= 500:
+            stats.errors += 1
+        elif response.status_code >= 400:
+            stats.rejected += 1
+        return response
+
+    async def get_cached(self, scenario, url):
+        """Conditional GET with the ETag of this user's last copy"""
+        headers = {"If-None-Match": self.etags[url]} if url in self.etags else {}
+        response = await self.request(scenario, "GET", url, headers=headers)
+        if response is not None and "etag" in response.headers:
+            self.etags[url] = response.headers["etag"]
+        return response
+
+    async def dashboard(self):
+        await self.get_cached("dashboard", "/api/dashboard")
+        await self.get_cached("dashboard", "/api/progress")
+
+    async def star_taps(self):
+        for _ in range(random.randint(1, 4)):
+            task_id = random.choice(self.task_ids)
+            day = random.choice(DAYS)
+            await self.request("star_taps", "POST", f"/api/stars/{task_id}/{day}", params={"stars": random.randint(0, 2)})
+        await self.get_cached("star_taps", "/api/progress")
+
+    async def safe_transfer(self):
+        stars = random.randint(1, 3)
+        await self.request("safe_transfer", "POST", "/api/progress/add-to-safe", json={"stars": stars})
+        await self.request("safe_transfer", "POST", "/api/progress/withdraw-from-safe", json={"stars": stars})
+
+    async def challenge(self):
+        subject = random.choice(SUBJECTS)
+        response = await self.request("challenge", "POST", f"/api/{subject}/challenge/{random.choice([2, 3])}")
+        if response is None or response.status_code != 200:
+            return
+        challenge = response.json()
+        challenge = challenge.get("challenge", challenge)
+        answers = {
+            str(i): problem["correct_answer"] if random.random() < CORRECT_ANSWER_RATE else "0"
+            for i, problem in enumerate(challenge["problems"])
+        }
+        await self.request("challenge", "POST", f"/api/{subject}/challenge/{challenge['id']}/submit", json=answers)
+
+    async def reward_claim(self):
+        response = await self.get_cached("reward_claim", "/api/rewards")
+        if response is None or response.status_code != 200:
+            return
+        open_rewards = [reward for reward in response.json() if not reward.get("is_claimed")]
+        if open_rewards:
+            reward = random.choice(open_rewards)
+            await self.request("reward_claim", "POST", f"/api/rewards/{reward['id']}/claim")
+
+SCENARIOS = {
+    "dashboard": (VirtualUser.dashboard, 40),
+    "star_taps": (VirtualUser.star_taps, 30),
+    "safe_transfer": (VirtualUser.safe_transfer, 10),
+    "challenge": (VirtualUser.challenge, 15),
+    "reward_claim": (VirtualUser.reward_claim, 5)
+}
+
+async def run_user(user, deadline, think_time):
+    names = list(SCENARIOS)
+    weights = [SCENARIOS[name][1] for name in names]
+    while time.perf_counter() < deadline:
+        name = random.choices(names, weights)[0]
+        start = time.perf_counter()
+        await SCENARIOS[name][0](user)
+        user.stats[name].latencies.append(time.perf_counter() - start)
+        if think_time:
+            await asyncio.sleep(random.uniform(0, think_time))
+
+async def seed(client):
+    """Tasks and rewards for the virtual users to work with"""
+    task_ids = []
+    for i in range(SEED_TASKS):
+        response = await client.post("/api/tasks", json={"name": f"Load test task {i + 1}"})
+        response.raise_for_status()
+        task_ids.append(response.json()["id"])
+    for i in range(SEED_REWARDS):
+        response = await client.post("/api/rewards", json={"name": f"Load test reward {i + 1}", "required_stars": 2 + i})
+        response.raise_for_status()
+    return task_ids
+
+def report(stats, elapsed):
+    print(f"{'scenario':<14} {'sessions':>8} {'per sec':>8} {'requests':>8} {'p50 ms':>8} {'p90 ms':>8} {'p99 ms':>8} {'max ms':>8} {'4xx':>6} {'errors':>7}")
+    total_requests = total_errors = 0
+    for name, scenario in stats.items():
+        total_requests += scenario.requests
+        total_errors += scenario.errors
+        if not scenario.latencies:
+            print(f"{name:<14} {0:>8}")
+            continue
+        ms = [latency * 1000 for latency in scenario.latencies]
+        print(
+            f"{name:<14} {len(ms):>8} {len(ms) / elapsed:>8.1f} {scenario.requests:>8} "
+            f"{statistics.median(ms):>8.1f} {percentile(ms, 0.9):>8.1f} {percentile(ms, 0.99):>8.1f} {max(ms):>8.1f} "
+            f"{scenario.rejected / max(1, scenario.requests):>6.1%} {scenario.errors / max(1, scenario.requests):>7.1%}"
+        )
+    print()
+    print(f"Throughput: {total_requests / elapsed:.1f} requests/s over {elapsed:.1f} s")
+    print(f"Error rate: {total_errors / max(1, total_requests):.2%} ({total_errors} of {total_requests} requests)")
+    return total_errors
+
+async def main():
+    parser = argparse.ArgumentParser(description="Concurrent load test of the Weekly Star Tracker API")
+    parser.add_argument("--url", help="base URL of a running server (default: drive the app in process)")
+    parser.add_argument("--database", choices=["memory", "mongo"], default="memory",
+                        help="in process: in-memory stand-in or a throwaway database on MONGO_URL")
+    parser.add_argument("--users", type=int, default=50, help="concurrent virtual users")
+    parser.add_argument("--duration", type=float, default=20, help="seconds to run")
+    parser.add_argument("--think-time", type=float, default=0.0, help="max pause between a user's sessions, seconds")
+    args = parser.parse_args()
+
+    server = None
+    if args.url:
+        client = httpx.AsyncClient(base_url=args.url, timeout=30)
+    else:
+        os.environ.setdefault("MONGO_URL", "mongodb://localhost:27017")
+        os.environ["DB_NAME"] = f"load_test_{uuid.uuid4().hex[:8]}"
+        os.environ["SNAPSHOTS_ENABLED"] = "false"
+        os.environ["OPENAI_API_KEY"] = ""  # keep generators on the static content path
+        import server
+        if args.database == "memory":
+            if AsyncMongoMockClient is None:
+                print("❌ The in-memory database needs mongomock-motor (pip install -r backend/requirements-dev.txt), or use --database mongo")
+                return 1
+            server.db = server.SyncStampedDatabase(AsyncMongoMockClient()[os.environ["DB_NAME"]])
+        await server.app.router.startup()
+        client = httpx.AsyncClient(transport=httpx.ASGITransport(app=server.app), base_url="http://load-test", timeout=30)
+
+    print("🚦 LOAD TEST")
+    print("=" * 60)
+    print(f"Test time: {datetime.now().isoformat()}")
+    print(f"Target: {args.url or f'in process ({args.database} database)'}")
+    print(f"Virtual users: {args.users}, duration: {args.duration:.0f} s")
+    print()
+
+    try:
+        async with client:
+            task_ids = await seed(client)
+            stats = {name: ScenarioStats() for name in SCENARIOS}
+            start = time.perf_counter()
+            deadline = start + args.duration
+            await asyncio.gather(*(
+                run_user(VirtualUser(client, stats, task_ids), deadline, args.think_time) for _ in range(args.users)
+            ))
+            errors = report(stats, time.perf_counter() - start)
+    finally:
+        if server is not None:
+            if args.database == "mongo":
+                await server.client.drop_database(os.environ["DB_NAME"])
+            await server.app.router.shutdown()
+    return 1 if errors else 0
+
+if __name__ == "__main__":
+    sys.exit(asyncio.run(main()))
@@ -0,0 +1,96 @@
+#!/usr/bin/env python3
+"""
+Problem Object Benchmark for Weekly Star Tracker
+Compares the old Pydantic problem path with the slotted ProblemRecord path
+(allocations and time per challenge, generation through storage and submit read)
+"""
+
+import asyncio
+import os
+import sys
+import time
+import tracemalloc
+from datetime import datetime
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "backend"))
+os.environ.setdefault("MONGO_URL", "mongodb://localhost:27017")
+os.environ["OPENAI_API_KEY"] = ""  # keep generators on the static content path
+
+import server  # noqa: E402
+
+ROUNDS = 200
+MODELS = {
+    "math": (server.MathChallenge, server.MathProblem),
+    "german": (server.GermanChallenge, server.GermanProblem),
+    "english": (server.EnglishChallenge, server.EnglishProblem)
+}
+
+async def generate_records(subject, grade, settings):
+    return await server.generate_planned_problems(subject, grade, settings.problem_count, settings)
+
+def pydantic_path(subject, grade, records):
+    """Old path: full models with uuid4 ids, .dict() for Mongo, re-validation on submit"""
+    challenge_model, problem_model = MODELS[subject]
+    problems = [
+        problem_model(**{k: v for k, v in record.to_dict(0, server.PROBLEM_FIELDS[subject]).items() if k != "id"})
+        for record in records
+    ]
+    challenge = challenge_model(grade=grade, problems=problems)
+    doc = challenge.model_dump()
+    return challenge_model(**doc)
+
+def record_path(subject, grade, records):
+    """New path: records serialized once, trusted read via model_construct"""
+    challenge_model, problem_model = MODELS[subject]
+    doc = server.build_challenge_document(subject, grade, records)
+    return server.construct_trusted_challenge(challenge_model, problem_model, doc)
+
+def measure(label, func, subject, grade, records):
+    """Return time and peak traced memory per challenge for one path"""
+    func(subject, grade, records)  # warm up
+
+    tracemalloc.start()
+    func(subject, grade, records)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    start = time.perf_counter()
+    for _ in range(ROUNDS):
+        func(subject, grade, records)
+    elapsed = (time.perf_counter() - start) / ROUNDS
+
+    return {"label": label, "seconds": elapsed, "peak_bytes": peak}
+
+async def main():
+    print("📊 PROBLEM OBJECT BENCHMARK")
+    print("=" * 60)
+    print(f"Benchmark time: {datetime.now().isoformat()}")
+    print(f"Rounds per measurement: {ROUNDS}")
+    print()
+
+    settings_by_subject = {
+        "math": server.MathSettings(),
+        "german": server.GermanSettings(),
+        "english": server.EnglishSettings()
+    }
+
+    for subject, settings in settings_by_subject.items():
+        for grade in [2, 3]:
+            records = await generate_records(subject, grade, settings)
+
+            start = time.perf_counter()
+            for _ in range(ROUNDS // 10):
+                await generate_records(subject, grade, settings)
+            generation = (time.perf_counter() - start) / (ROUNDS // 10)
+
+            before = measure("pydantic", pydantic_path, subject, grade, records)
+            after = measure("records", record_path, subject, grade, records)
+
+            print(f"{subject} grade {grade} ({len(records)} problems, generation {generation * 1000:.2f} ms)")
+            for result in (before, after):
+                print(f"   {result['label']:<9} {result['seconds'] * 1000:8.3f} ms/challenge   peak {result['peak_bytes'] / 1024:8.1f} KiB")
+            print(f"   speedup   {before['seconds'] / after['seconds']:.1f}x, peak memory {before['peak_bytes'] / max(1, after['peak_bytes']):.1f}x lower")
+            print()
+
+if __name__ == "__main__":
+    asyncio.run(main())
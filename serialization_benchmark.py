@@ -0,0 +1,149 @@
+#!/usr/bin/env python3
+"""
+Serialization Benchmark for Weekly Star Tracker
+Compares the old response path (convert_objectid_to_str / model round trip + jsonable_encoder + json)
+with FastJSONResponse for the export_all_data and get_weekly_progress payloads
+"""
+
+import os
+import sys
+import time
+import uuid
+from datetime import datetime, timedelta
+
+from bson import ObjectId
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "backend"))
+os.environ.setdefault("MONGO_URL", "mongodb://localhost:27017")
+
+from fastapi.encoders import jsonable_encoder  # noqa: E402
+from fastapi.responses import JSONResponse  # noqa: E402
+
+import server  # noqa: E402
+
+ROUNDS = 50
+WEEKS = 52
+TASKS = 12
+DAYS = ["monday", "tuesday", "wednesday", "thursday", "friday", "saturday", "sunday"]
+
+def convert_objectid_to_str(obj):
+    """The recursive conversion export_all_data used before FastJSONResponse"""
+    if isinstance(obj, ObjectId):
+        return str(obj)
+    elif isinstance(obj, dict):
+        return {key: convert_objectid_to_str(value) for key, value in obj.items()}
+    elif isinstance(obj, list):
+        return [convert_objectid_to_str(item) for item in obj]
+    else:
+        return obj
+
+def build_export_documents():
+    """A year of data for one household, shaped like the raw Mongo documents"""
+    week_start = server.get_current_week_start()
+    tasks = [
+        {"_id": ObjectId(), "id": str(uuid.uuid4()), "name": f"Task {i}", "created_at": datetime.utcnow()}
+        for i in range(TASKS)
+    ]
+    daily_stars = [
+        {"_id": ObjectId(), "id": str(uuid.uuid4()), "task_id": task["id"], "day": day, "stars": 2,
+         "week_start": week_start - timedelta(weeks=week)}
+        for week in range(WEEKS) for task in tasks for day in DAYS
+    ]
+    progress = [
+        {"_id": ObjectId(), **server.WeeklyProgress(week_start=week_start - timedelta(weeks=week), total_stars_earned=100).model_dump()}
+        for week in range(WEEKS)
+    ]
+    rewards = [{"_id": ObjectId(), **server.Reward(name=f"Reward {i}", required_stars=10 + i).model_dump()} for i in range(20)]
+    return {
+        "export_date": datetime.now().isoformat(),
+        "app_version": "weekly_star_tracker_v1.0",
+        "data": {
+            "tasks": tasks,
+            "daily_stars": daily_stars,
+            "weekly_progress": progress,
+            "rewards": rewards,
+            "settings": {
+                "math": {"_id": ObjectId(), **server.MathSettings().model_dump()},
+                "german": {"_id": ObjectId(), **server.GermanSettings().model_dump()},
+                "english": {"_id": ObjectId(), **server.EnglishSettings().model_dump()}
+            }
+        }
+    }
+
+def old_export(backup_data):
+    converted = dict(backup_data, data={
+        key: convert_objectid_to_str(value) for key, value in backup_data["data"].items()
+    })
+    return JSONResponse(content=jsonable_encoder(converted)).body
+
+def new_export(backup_data):
+    return server.FastJSONResponse(content=backup_data).body
+
+def weekly_progress_content(documents):
+    """The dict get_weekly_progress returns for the current week"""
+    progress = {k: v for k, v in documents["data"]["weekly_progress"][0].items() if k != "_id"}
+    progress["total_stars"] = progress["total_stars_earned"] - progress["total_stars_used"]
+    return progress
+
+def old_weekly_progress(documents):
+    return JSONResponse(content=jsonable_encoder(weekly_progress_content(documents))).body
+
+def new_weekly_progress(documents):
+    return server.FastJSONResponse(content=weekly_progress_content(documents)).body
+
+def old_dashboard_reads(documents):
+    """Tasks, stars and rewards validated through their models, then jsonable_encoder"""
+    data = documents["data"]
+    content = {
+        "tasks": [server.Task(**task) for task in data["tasks"]],
+        "stars": [server.DailyStar(**star) for star in data["daily_stars"][:TASKS * len(DAYS)]],
+        "progress": dict(data["weekly_progress"][0], total_stars=100),
+        "rewards": [server.Reward(**reward) for reward in data["rewards"]]
+    }
+    content["progress"].pop("_id")
+    return JSONResponse(content=jsonable_encoder(content)).body
+
+def new_dashboard_reads(documents):
+    """Projected documents serialized directly"""
+    data = documents["data"]
+    strip = lambda docs: [{k: v for k, v in doc.items() if k != "_id"} for doc in docs]
+    content = {
+        "tasks": strip(data["tasks"]),
+        "stars": strip(data["daily_stars"][:TASKS * len(DAYS)]),
+        "progress": dict(strip(data["weekly_progress"][:1])[0], total_stars=100),
+        "rewards": strip(data["rewards"])
+    }
+    return server.FastJSONResponse(content=content).body
+
+def measure(func, payload):
+    func(payload)  # warm up
+    start = time.perf_counter()
+    for _ in range(ROUNDS):
+        body = func(payload)
+    return (time.perf_counter() - start) / ROUNDS, len(body)
+
+def main():
+    print("📊 SERIALIZATION BENCHMARK")
+    print("=" * 60)
+    print(f"Benchmark time: {datetime.now().isoformat()}")
+    print(f"orjson available: {server.orjson is not None}")
+    print(f"Rounds per measurement: {ROUNDS}")
+    print()
+
+    documents = build_export_documents()
+    cases = [
+        ("export_all_data", old_export, new_export),
+        ("get_weekly_progress", old_weekly_progress, new_weekly_progress),
+        ("dashboard reads", old_dashboard_reads, new_dashboard_reads)
+    ]
+    for label, old, new in cases:
+        old_seconds, old_size = measure(old, documents)
+        new_seconds, new_size = measure(new, documents)
+        print(f"{label}")
+        print(f"   old   {old_seconds * 1000:8.3f} ms   {old_size / 1024:8.1f} KiB")
+        print(f"   new   {new_seconds * 1000:8.3f} ms   {new_size / 1024:8.1f} KiB")
+        print(f"   speedup {old_seconds / new_seconds:.1f}x")
+        print()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,199 @@
+"""Shared fixtures: the app on an in-memory database (mongomock-motor), driven in process through httpx"""
+
+import asyncio
+import os
+import sys
+from contextlib import contextmanager
+from types import SimpleNamespace
+from typing import List, Optional, Tuple
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "backend"))
+os.environ.setdefault("MONGO_URL", "mongodb://localhost:27017")
+os.environ["OPENAI_API_KEY"] = ""  # keep generators on the static content path
+
+import bson  # noqa: E402
+from bson.raw_bson import RawBSONDocument  # noqa: E402
+
+try:
+    import httpx
+    from mongomock_motor import AsyncMongoMockClient, AsyncMongoMockCollection
+except ImportError as e:
+    # Fail the run instead of skipping every test: a suite that silently runs nothing reports success
+    raise ImportError(f"The test suite needs {e.name}: pip install -r backend/requirements-dev.txt") from e
+
+import server  # noqa: E402
+
+@pytest.fixture
+def db(monkeypatch):
+    """A fresh stamped database per test, with the process-wide caches and sync bookkeeping reset"""
+    database = server.SyncStampedDatabase(AsyncMongoMockClient()["test"])
+    monkeypatch.setattr(server, "db", database)
+    monkeypatch.setattr(server, "_version_cache", {})
+    monkeypatch.setattr(server, "_inflight_sync_seqs", {})
+    monkeypatch.setattr(server, "_pending_sync_allocations", {})
+    monkeypatch.setattr(server, "_sync_seq_seen", 0)
+    monkeypatch.setattr(server, "_tombstone_prune_task", None)
+    monkeypatch.setattr(server, "_tombstones_pruned_at", 0.0)
+    monkeypatch.setattr(server, "_preload_payload", None)
+    return database
+
+class RawCursor:
+    """Find cursor yielding RawBSONDocuments, which mongomock can't return itself"""
+    def __init__(self, cursor):
+        self.cursor = cursor
+
+    def batch_size(self, size):
+        return self
+
+    async def __aiter__(self):
+        async for doc in self.cursor:
+            yield RawBSONDocument(bson.encode(doc))
+
+class RawCollection:
+    def __init__(self, collection):
+        self.collection = collection
+
+    def find(self, *args, **kwargs):
+        return RawCursor(self.collection.find(*args, **kwargs))
+
+@pytest.fixture
+def raw_bson(monkeypatch, db):
+    """Binary backup reads on the in-memory database"""
+    monkeypatch.setattr(server, "raw_backup_collection", lambda name: RawCollection(server.db[name]))
+
+# Mongomock sends nothing over the wire, so pymongo never calls the command listener; these wrappers call it
+# once per round trip the same operation makes against a server
+BULK_COMMANDS = {"InsertOne": "insert", "UpdateOne": "update", "UpdateMany": "update", "ReplaceOne": "update",
+                 "DeleteOne": "delete", "DeleteMany": "delete"}
+COLLECTION_COMMANDS = {
+    "find_one": "find", "insert_one": "insert", "insert_many": "insert", "update_one": "update", "update_many": "update",
+    "replace_one": "update", "delete_one": "delete", "delete_many": "delete", "find_one_and_update": "findAndModify",
+    "find_one_and_replace": "findAndModify", "find_one_and_delete": "findAndModify", "count_documents": "aggregate",
+    "distinct": "distinct", "create_index": "createIndexes"
+}
+
+class CommandEmitter:
+    def __init__(self, monitor):
+        self.monitor = monitor
+        self.request_id = 0
+
+    def emit(self, command_name, collection):
+        self.request_id += 1
+        event = SimpleNamespace(command_name=command_name, command={command_name: collection}, connection_id=("mock", 0),
+                                request_id=self.request_id, duration_micros=0)
+        self.monitor.started(event)
+        self.monitor.succeeded(event)
+
+class CommandCursor:
+    """find/aggregate cursor: one command when its results are first read"""
+    def __init__(self, emitter, command_name, collection, cursor):
+        self.emitter, self.command_name, self.collection, self.cursor = emitter, command_name, collection, cursor
+
+    def __getattr__(self, name):
+        method = getattr(self.cursor, name)
+
+        def chained(*args, **kwargs):
+            result = method(*args, **kwargs)
+            return self if result is self.cursor else result
+        return chained
+
+    async def to_list(self, *args, **kwargs):
+        self.emitter.emit(self.command_name, self.collection)
+        return await self.cursor.to_list(*args, **kwargs)
+
+    async def __aiter__(self):
+        self.emitter.emit(self.command_name, self.collection)
+        async for doc in self.cursor:
+            yield doc
+
+class CommandCollection:
+    def __init__(self, emitter, collection):
+        self.emitter, self.collection = emitter, collection
+
+    def find(self, *args, **kwargs):
+        return CommandCursor(self.emitter, "find", self.collection.name, self.collection.find(*args, **kwargs))
+
+    def aggregate(self, *args, **kwargs):
+        return CommandCursor(self.emitter, "aggregate", self.collection.name, self.collection.aggregate(*args, **kwargs))
+
+    async def bulk_write(self, requests, **kwargs):
+        # Unordered bulk writes go out as one command per operation type
+        for command_name in dict.fromkeys(BULK_COMMANDS[type(request).__name__] for request in requests):
+            self.emitter.emit(command_name, self.collection.name)
+        return await self.collection.bulk_write(requests, **kwargs)
+
+    def __getattr__(self, name):
+        attribute = getattr(self.collection, name)
+        if name not in COLLECTION_COMMANDS:
+            return attribute
+
+        async def command(*args, **kwargs):
+            self.emitter.emit(COLLECTION_COMMANDS[name], self.collection.name)
+            return await attribute(*args, **kwargs)
+        return command
+
+class CommandDatabase:
+    def __init__(self, emitter, database):
+        self.emitter, self.database = emitter, database
+
+    def __getattr__(self, name):
+        attribute = getattr(self.database, name)
+        return CommandCollection(self.emitter, attribute) if isinstance(attribute, AsyncMongoMockCollection) else attribute
+
+    def __getitem__(self, name):
+        return CommandCollection(self.emitter, self.database[name])
+
+@pytest.fixture
+def commands(monkeypatch, db):
+    """The in-memory database reporting its round trips to the command listener, for query budgets"""
+    database = server.SyncStampedDatabase(CommandDatabase(CommandEmitter(server.MongoCommandMonitor()), db._database))
+    monkeypatch.setattr(server, "db", database)
+    return database
+
+# Query budgets: requests handled inside query_budget() are recorded through the per-request stats the
+# metrics middleware sets, so an endpoint that starts sending more commands fails its test
+class QueryRecorder:
+    """Mongo commands of every request that started while the recorder was active"""
+    def __init__(self):
+        self.stats: List = []  # server.RequestStats of each request, filled in by MongoCommandMonitor
+
+    @property
+    def requests(self) -> List[Tuple[str, str, List[str]]]:
+        """(method, route template, command names) per request"""
+        return [(stats.scope["method"], stats.route, list(stats.commands)) for stats in self.stats]
+
+    def commands(self, route: Optional[str] = None) -> List[str]:
+        return [name for _, template, names in self.requests if route is None or template == route for name in names]
+
+@contextmanager
+def query_budget(max_commands: int, route: Optional[str] = None):
+    """Assert that each request (to `route`, if given) handled inside the block sends at most `max_commands` commands"""
+    recorder = QueryRecorder()
+    previous = server.RequestStats
+
+    class RecordedRequestStats(previous):
+        def __init__(self, scope):
+            super().__init__(scope)
+            recorder.stats.append(self)
+
+    server.RequestStats = RecordedRequestStats
+    try:
+        yield recorder
+    finally:
+        server.RequestStats = previous
+    for method, template, names in recorder.requests:
+        if route is not None and template != route:
+            continue
+        if len(names) > max_commands:
+            raise AssertionError(
+                f"{method} {template} sent {len(names)} MongoDB commands, budget is {max_commands}: {', '.join(names)}"
+            )
+
+def run(coroutine):
+    """Run one test body on a new event loop"""
+    return asyncio.run(coroutine)
+
+def api_client() -> httpx.AsyncClient:
+    return httpx.AsyncClient(transport=httpx.ASGITransport(app=server.app), base_url="http://test")
@@ -0,0 +1,147 @@
+"""Backups: JSON, NDJSON and binary exports, incremental deltas and importing them"""
+
+from tests.conftest import api_client, run, server
+
+async def read_frames(data):
+    async def chunks():
+        yield data
+    reader = server.ByteStreamReader(chunks())
+    assert await reader.read(len(server.BSON_BACKUP_MAGIC)) == server.BSON_BACKUP_MAGIC
+    frames = []
+    while (frame := await server.read_bson_frame(reader)) is not None:
+        frames.append(frame)
+    return frames
+
+def test_incremental_json_backup_carries_changes_and_deletions(db):
+    async def body():
+        await db.tasks.insert_many([{"id": f"t{i}", "name": f"task {i}"} for i in range(3)])
+        async with api_client() as client:
+            full = (await client.get("/api/backup/export")).json()
+            await db.tasks.delete_one({"id": "t0"})
+            await db.tasks.update_one({"id": "t1"}, {"$set": {"name": "renamed"}})
+            delta = (await client.get("/api/backup/export", params={"since": full["watermark"]})).json()
+        assert [task["id"] for task in delta["data"]["tasks"]] == ["t1"]
+        assert delta["deleted"]["tasks"] == ["t0"]
+    run(body())
+
+def test_binary_incremental_writes_deletions_in_chunks(db, raw_bson, monkeypatch):
+    monkeypatch.setattr(server, "BACKUP_DELETED_BATCH_SIZE", 2)
+
+    async def body():
+        await db.tasks.insert_many([{"id": f"t{i}", "name": f"task {i}"} for i in range(6)])
+        async with api_client() as client:
+            watermark = (await client.get("/api/backup/export")).json()["watermark"]
+            await db.tasks.delete_many({"id": {"$in": ["t0", "t1", "t2", "t3", "t4"]}})
+            await db.tasks.update_one({"id": "t5"}, {"$set": {"name": "renamed"}})
+            response = await client.get("/api/backup/export/binary", params={"since": watermark})
+            assert response.status_code == 200
+
+            frames = await read_frames(response.content)
+            deleted = [frame["deleted"] for frame in frames if "deleted" in frame and "end" not in frame]
+            assert sorted(sum(deleted, [])) == ["t0", "t1", "t2", "t3", "t4"]
+            assert max(len(ids) for ids in deleted) == 2
+            assert next(frame for frame in frames if frame.get("end") == "tasks")["deleted"] == 5
+
+            # Recreate the deleted tasks and undo the rename, then apply the incremental backup on top
+            await db.tasks.delete_many({})
+            await db.tasks.insert_many([{"id": f"t{i}", "name": f"task {i}"} for i in range(6)])
+            result = await client.post("/api/backup/import", content=response.content, headers={"Content-Type": server.BSON_BACKUP_MEDIA_TYPE})
+            assert result.status_code == 200
+
+        tasks = await db.tasks.find({}).to_list(length=None)
+        assert [(task["id"], task["name"]) for task in tasks] == [("t5", "renamed")]
+    run(body())
+
+STAMP_FIELDS = ("_id", "sync_seq", "updated_at")
+
+async def snapshot_collections(db):
+    """Every backed-up collection's documents, without the fields a restore assigns anew"""
+    return {
+        name: sorted(
+            ({key: value for key, value in doc.items() if key not in STAMP_FIELDS} for doc in await db[name].find({}).to_list(length=None)),
+            key=lambda doc: str(doc.get("id"))
+        )
+        for name in server.BACKUP_COLLECTIONS
+    }
+
+async def seed_backup_data(db, client):
+    for name in ("Zähne putzen", "Zimmer aufräumen", "Hausaufgaben"):
+        await client.post("/api/tasks", json={"name": name})
+    await client.post("/api/rewards", json={"name": "Eis", "required_stars": 3})
+    task_ids = [task["id"] for task in (await client.get("/api/tasks")).json()]
+    await client.post("/api/stars/batch", json={"cells": [{"task_id": task_ids[0], "day": "monday", "stars": 2}, {"task_id": task_ids[1], "day": "friday", "stars": 1}]})
+    await client.put("/api/math/settings", json={"problem_count": 12})
+    await db.math_statistics.insert_one({"id": "s1", "total_attempts": 4, "total_correct": 3, "best_score": 75.0})
+    return task_ids
+
+async def export_stream(client, since=None):
+    response = await client.get("/api/backup/export/stream", params={"since": since} if since else None, headers={"Accept-Encoding": "identity"})
+    assert response.headers["content-type"] == "application/gzip"
+    return response.content
+
+async def import_file(client, data):
+    response = await client.post("/api/backup/import", content=data, headers={"Content-Type": "application/gzip"})
+    assert response.status_code == 200
+    assert response.json()["results"]["errors"] == []
+    return response.json()
+
+def test_ndjson_backup_round_trips_through_import(db):
+    async def body():
+        async with api_client() as client:
+            await seed_backup_data(db, client)
+            before = await snapshot_collections(db)
+            backup = await export_stream(client)
+
+            for name in server.BACKUP_COLLECTIONS:
+                await db[name].delete_many({})
+            await client.post("/api/tasks", json={"name": "created after the backup"})
+            await import_file(client, backup)
+        assert await snapshot_collections(db) == before
+        assert before["tasks"] and before["week_stars"] and before["math_settings"]
+    run(body())
+
+def test_incremental_ndjson_backup_applies_in_bounded_batches(db, monkeypatch):
+    monkeypatch.setattr(server, "IMPORT_BATCH_SIZE", 2)
+    monkeypatch.setattr(server, "BACKUP_DELETED_BATCH_SIZE", 2)
+    bulk_write, delete_many = server.SyncStampedCollection.bulk_write, server.SyncStampedCollection.delete_many
+    flush = server.CollectionDelta._flush
+    live_writes, staged = [], []
+
+    async def counted_flush(self):
+        staged.append((self.name, len(self._batch)))
+        await flush(self)
+
+    async def counted_bulk_write(self, requests, **kwargs):
+        live_writes.append(("bulk_write", self._collection.name, len(requests)))
+        return await bulk_write(self, requests, **kwargs)
+
+    async def counted_delete_many(self, filter, **kwargs):
+        live_writes.append(("delete_many", self._collection.name, len(filter.get("id", {}).get("$in", []))))
+        return await delete_many(self, filter, **kwargs)
+
+    async def body():
+        async with api_client() as client:
+            task_ids = await seed_backup_data(db, client)
+            full = await export_stream(client)
+            watermark = (await client.get("/api/backup/export")).json()["watermark"]
+
+            for task_id in task_ids:
+                await client.delete(f"/api/tasks/{task_id}")
+            for number in range(5):
+                await client.post("/api/tasks", json={"name": f"neu {number}"})
+            after = await snapshot_collections(db)
+            incremental = await export_stream(client, since=watermark)
+
+            await import_file(client, full)
+            monkeypatch.setattr(server.CollectionDelta, "_flush", counted_flush)
+            monkeypatch.setattr(server.SyncStampedCollection, "bulk_write", counted_bulk_write)
+            monkeypatch.setattr(server.SyncStampedCollection, "delete_many", counted_delete_many)
+            result = await import_file(client, incremental)
+        assert result["results"]["deleted"] >= len(task_ids)
+        assert (await snapshot_collections(db))["tasks"] == after["tasks"]
+        # The delta is held in a staging collection, never more than a batch of it in memory
+        assert max(size for name, size in staged if name == "tasks") == 2
+        task_writes = [(kind, size) for kind, name, size in live_writes if name == "tasks"]
+        assert sum(size for kind, size in task_writes if kind == "bulk_write") == 5
+        assert all(size <= 2 for _, size in task_writes)
+    run(body())
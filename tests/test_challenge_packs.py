@@ -0,0 +1,59 @@
+"""Offline challenge packs: per-device minting, signature checks and once-only redemption"""
+
+from tests.conftest import api_client, run, server
+
+ANSWERS = ["5", "12", "7"]
+
+def known_problems(monkeypatch):
+    """Packs built from fixed problems, so the test knows the answers the hashes were made from"""
+    async def generate(subject, grade, count, settings):
+        return [server.ProblemRecord(f"Question {i}", answer) for i, answer in enumerate(ANSWERS)]
+    monkeypatch.setattr(server, "generate_planned_problems", generate)
+
+def completed(pack, correct=len(ANSWERS)):
+    return {"pack": pack, "answers": {str(i): answer if i < correct else "0" for i, answer in enumerate(ANSWERS)}}
+
+def test_packs_are_minted_per_request_and_not_in_the_shared_bundle(db):
+    async def body():
+        async with api_client() as client:
+            first = (await client.get("/api/challenge-packs/math/2", params={"count": 3})).json()["packs"]
+            second = (await client.get("/api/challenge-packs/math/2", params={"count": 3})).json()["packs"]
+            bundle = await server.build_preload_bundle()
+        assert len({pack["id"] for pack in first + second}) == 6
+        assert all("correct_answer" not in problem for pack in first for problem in pack["problems"])
+        assert "packs" not in bundle
+    run(body())
+
+def test_redeem_credits_once_and_rejects_tampering(db, monkeypatch):
+    known_problems(monkeypatch)
+
+    async def body():
+        async with api_client() as client:
+            pack, other = (await client.get("/api/challenge-packs/math/2", params={"count": 2})).json()["packs"]
+            tampered = {**other, "grade": 3}
+
+            response = (await client.post("/api/challenge-packs/redeem", json={"packs": [completed(pack), completed(tampered)]})).json()
+            assert [result["status"] for result in response["results"]] == ["credited", "rejected"]
+            assert response["results"][0]["percentage"] == 100
+            assert response["stars_earned"] == 3
+
+            again = (await client.post("/api/challenge-packs/redeem", json={"packs": [completed(pack)]})).json()
+            assert again["results"][0]["status"] == "duplicate"
+            assert again["stars_earned"] == 0
+
+        progress = await db.weekly_progress.find_one({"week_start": server.get_current_week_start()})
+        assert progress["available_stars"] == 3
+        statistics = await db.math_statistics.find_one()
+        assert statistics["total_attempts"] == 1
+    run(body())
+
+def test_wrong_answers_score_lower(db, monkeypatch):
+    known_problems(monkeypatch)
+
+    async def body():
+        async with api_client() as client:
+            pack = (await client.get("/api/challenge-packs/math/2")).json()["packs"][0]
+            response = (await client.post("/api/challenge-packs/redeem", json={"packs": [completed(pack, correct=1)]})).json()
+        assert response["results"][0]["correct_answers"] == 1
+        assert response["stars_earned"] == 0
+    run(body())
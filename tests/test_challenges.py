@@ -0,0 +1,64 @@
+"""Challenge documents built from problem records: the same fields and types as the API models produce"""
+
+import pytest
+
+from tests.conftest import api_client, run, server
+
+SUBJECTS = {
+    "math": (server.MathChallenge, "math_challenges"),
+    "german": (server.GermanChallenge, "german_challenges"),
+    "english": (server.EnglishChallenge, "english_challenges"),
+}
+
+def assert_same_shape(doc, reference, path="challenge"):
+    """Equal values with equal types all the way down (0 and 0.0 compare equal, but serialize differently)"""
+    assert type(doc) is type(reference), f"{path}: {type(doc).__name__} instead of {type(reference).__name__}"
+    if isinstance(reference, dict):
+        assert list(doc) == list(reference), f"{path}: fields {list(doc)} instead of {list(reference)}"
+        for key in reference:
+            assert_same_shape(doc[key], reference[key], f"{path}.{key}")
+    elif isinstance(reference, list):
+        assert len(doc) == len(reference), path
+        for index, (item, expected) in enumerate(zip(doc, reference)):
+            assert_same_shape(item, expected, f"{path}[{index}]")
+    else:
+        assert doc == reference, path
+
+async def stored_challenge(db, collection, challenge_id):
+    return await db[collection].find_one({"id": challenge_id}, {"_id": 0})
+
+@pytest.mark.parametrize("subject", SUBJECTS)
+def test_challenge_round_trips_through_create_and_submit(db, subject):
+    model, collection = SUBJECTS[subject]
+
+    async def body():
+        async with api_client() as client:
+            response = await client.post(f"/api/{subject}/challenge/2")
+            assert response.status_code == 200
+            created = response.json()
+            created = created.get("challenge", created)
+
+            # As stored: what validating the document with the API model gives back
+            stored = await stored_challenge(db, collection, created["id"])
+            assert stored["problems"]
+            assert_same_shape(stored, model.model_validate(stored).model_dump())
+            # As returned: the model's JSON form (created_at as generated, Mongo keeps milliseconds only)
+            returned = model.model_validate(stored).model_dump(mode="json")
+            assert created["created_at"][:23] == returned["created_at"][:23]
+            assert_same_shape(created, {**returned, "created_at": created["created_at"]})
+
+            answers = {str(index): problem["correct_answer"] for index, problem in enumerate(created["problems"])}
+            answers["0"] = "sicher falsch"
+            response = await client.post(f"/api/{subject}/challenge/{created['id']}/submit", json=answers)
+            assert response.status_code == 200
+            submitted = response.json()
+
+        graded = await stored_challenge(db, collection, created["id"])
+        assert_same_shape(graded, model.model_validate(graded).model_dump())
+        assert_same_shape(submitted["challenge"], model.model_validate(graded).model_dump(mode="json"))
+        assert graded["completed"] is True
+        assert graded["problems"][0]["is_correct"] is False
+        assert all(problem["is_correct"] is True for problem in graded["problems"][1:])
+        assert [problem["id"] for problem in graded["problems"]] == [problem["id"] for problem in created["problems"]]
+        assert graded["score"] == pytest.approx(100 * (len(created["problems"]) - 1) / len(created["problems"]))
+    run(body())
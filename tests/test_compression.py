@@ -0,0 +1,58 @@
+"""Response compression: threshold, negotiation and the headers of compressed responses"""
+
+import gzip
+from datetime import datetime
+
+from tests.conftest import api_client, run, server
+
+async def seed_tasks(db, count):
+    await db.tasks.insert_many([
+        {"id": f"t{i:03d}", "name": f"Aufgabe Nummer {i}", "created_at": datetime(2024, 1, 1)} for i in range(count)
+    ])
+
+async def get_raw(client, path, headers):
+    """Response with its body as sent, before httpx decodes the Content-Encoding"""
+    async with client.stream("GET", path, headers=headers) as response:
+        body = b"".join([chunk async for chunk in response.aiter_raw()])
+    return response, body
+
+def test_large_response_is_gzipped_for_clients_accepting_it(db):
+    async def body():
+        await seed_tasks(db, 50)
+        async with api_client() as client:
+            response, raw = await get_raw(client, "/api/tasks", {"Accept-Encoding": "gzip"})
+            identity = await client.get("/api/tasks", headers={"Accept-Encoding": "identity"})
+        assert response.headers["content-encoding"] == "gzip"
+        assert "Accept-Encoding" in response.headers["vary"]
+        assert response.headers["content-length"] == str(len(raw))
+        assert len(identity.content) >= server.COMPRESSION_MINIMUM_SIZE
+        assert len(raw) < len(identity.content)
+        assert gzip.decompress(raw) == identity.content
+    run(body())
+
+def test_passthrough_without_gzip_or_below_the_threshold(db):
+    async def body():
+        await seed_tasks(db, 50)
+        async with api_client() as client:
+            identity, raw = await get_raw(client, "/api/tasks", {"Accept-Encoding": "identity"})
+            refused, _ = await get_raw(client, "/api/tasks", {"Accept-Encoding": "gzip;q=0"})
+            small, small_raw = await get_raw(client, "/api/tasks?limit=1", {"Accept-Encoding": "gzip"})
+        for response in (identity, refused, small):
+            assert "content-encoding" not in response.headers
+        assert identity.headers["content-length"] == str(len(raw))
+        assert small.headers["content-length"] == str(len(small_raw))
+        assert len(small_raw) < server.COMPRESSION_MINIMUM_SIZE
+        assert not identity.headers["etag"].startswith("W/")
+    run(body())
+
+def test_compressed_etag_is_weak_and_still_revalidates(db):
+    async def body():
+        await seed_tasks(db, 50)
+        async with api_client() as client:
+            identity = await client.get("/api/tasks", headers={"Accept-Encoding": "identity"})
+            compressed = await client.get("/api/tasks", headers={"Accept-Encoding": "gzip"})
+            assert compressed.headers["etag"] == "W/" + identity.headers["etag"]
+            revalidated = await client.get("/api/tasks", headers={"Accept-Encoding": "gzip", "If-None-Match": compressed.headers["etag"]})
+        assert revalidated.status_code == 304
+        assert revalidated.content == b""
+    run(body())
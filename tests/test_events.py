@@ -0,0 +1,62 @@
+"""Server-sent events: pushed totals and resuming after Last-Event-ID"""
+
+from starlette.requests import Request
+
+from tests.conftest import run, server
+
+async def open_stream(last_event_id=None):
+    headers = [(b"last-event-id", last_event_id.encode())] if last_event_id else []
+    response = await server.stream_events(Request({"type": "http", "method": "GET", "path": "/api/events", "headers": headers}))
+    return response.body_iterator
+
+async def frames(stream, count):
+    return [await stream.__anext__() for _ in range(count)]
+
+def parse(frame):
+    fields = dict(line.split(": ", 1) for line in frame.strip().split("\n"))
+    return fields.get("id"), fields["event"], server.json.loads(fields["data"])
+
+def test_star_write_pushes_cell_and_totals(db):
+    async def body():
+        stream = await open_stream()
+        await stream.__anext__()  # hello
+        await server.set_star_cell("t1", server.get_current_week_start(), 0, 2)
+        server.publish_star_cells(server.get_current_week_start(), {("t1", 0): 2})
+        await server.bump_collection_versions("week_stars")
+        events = [parse(frame) for frame in await frames(stream, 3)]
+        assert [event_type for _, event_type, _ in events] == ["star", "changed", "progress"]
+        assert events[0][2]["stars"] == 2
+        assert events[2][2]["total_stars_earned"] == 2
+        await stream.aclose()
+    run(body())
+
+def test_reconnect_replays_events_after_last_event_id(db, monkeypatch):
+    monkeypatch.setattr(server, "event_bus", server.EventBus())
+
+    async def body():
+        server.event_bus.publish("reward_claimed", {"reward_id": "r1"})
+        last_event_id = server.event_bus.event_id(1)
+        # Published while the client was away: no subscribers, so no totals were pushed
+        server.publish_star_cells(server.get_current_week_start(), {("t1", 3): 1})
+        await server.bump_collection_versions("week_stars")
+
+        stream = await open_stream(last_event_id)
+        events = [parse(frame) for frame in await frames(stream, 4)]
+        assert [event_type for _, event_type, _ in events] == ["hello", "star", "changed", "progress"]
+        assert [event_id for event_id, _, _ in events[1:3]] == [server.event_bus.event_id(2), server.event_bus.event_id(3)]
+        await stream.aclose()
+    run(body())
+
+def test_unknown_or_expired_last_event_id_asks_for_resync(db, monkeypatch):
+    monkeypatch.setattr(server, "event_bus", server.EventBus())
+    monkeypatch.setattr(server.event_bus, "_recent", server.deque(maxlen=2))
+
+    async def body():
+        for number in range(4):
+            server.event_bus.publish("reward_claimed", {"reward_id": f"r{number}"})
+        for last_event_id in ("otherrun-1", server.event_bus.event_id(1)):
+            stream = await open_stream(last_event_id)
+            assert [parse(frame)[1] for frame in await frames(stream, 2)] == ["hello", "resync"]
+            await stream.aclose()
+        assert server.event_bus.replay(server.event_bus.event_id(2)) == [(3, "reward_claimed", {"reward_id": "r2"}), (4, "reward_claimed", {"reward_id": "r3"})]
+    run(body())
@@ -0,0 +1,35 @@
+"""List endpoints served from projected documents: model defaults, fields and cursors"""
+
+from datetime import datetime
+
+from tests.conftest import api_client, run
+
+def test_documents_stored_before_a_field_existed_get_its_default(db):
+    async def body():
+        created_at = datetime(2024, 1, 1)
+        await db.tasks.insert_one({"id": "t1", "name": "legacy", "created_at": created_at})
+        await db.rewards.insert_one({"id": "r1", "name": "legacy", "required_stars": 5, "created_at": created_at})
+        async with api_client() as client:
+            tasks = (await client.get("/api/tasks")).json()
+            rewards = (await client.get("/api/rewards")).json()
+            names = (await client.get("/api/rewards", params={"fields": "name,is_claimed"})).json()
+        assert tasks == [{"id": "t1", "name": "legacy", "created_at": "2024-01-01T00:00:00"}]
+        assert rewards[0]["is_claimed"] is False
+        assert rewards[0]["claimed_at"] is None
+        assert names == [{"name": "legacy", "is_claimed": False}]
+    run(body())
+
+def test_cursor_pages_cover_every_task_once(db):
+    async def body():
+        await db.tasks.insert_many([{"id": f"t{i:02d}", "name": f"task {i}", "created_at": datetime(2024, 1, 1 + i)} for i in range(5)])
+        seen = []
+        async with api_client() as client:
+            params = {"limit": 2}
+            while True:
+                response = await client.get("/api/tasks", params=params)
+                seen += [task["id"] for task in response.json()]
+                if "x-next-cursor" not in response.headers:
+                    break
+                params["cursor"] = response.headers["x-next-cursor"]
+        assert seen == [f"t{i:02d}" for i in range(5)]
+    run(body())
@@ -0,0 +1,71 @@
+"""Metrics: the Prometheus text exposition output and access to /metrics"""
+
+import re
+
+import pytest
+
+from tests.conftest import api_client, run, server
+
+SAMPLE = re.compile(r'^([a-zA-Z_:][a-zA-Z0-9_:]*)(?:\{(.*)\})? (\S+)$')
+LABEL = re.compile(r'([a-zA-Z_][a-zA-Z0-9_]*)="((?:[^"\\]|\\.)*)"(?:,|$)')
+
+def unescape(value):
+    return re.sub(r'\\(.)', lambda match: "\n" if match.group(1) == "n" else match.group(1), value)
+
+def parse_exposition(text):
+    """{family: {"type", "help", "samples": [(name, labels, value)]}}, failing on any line out of the format"""
+    families = {}
+    for line in text.splitlines():
+        if line.startswith("# HELP ") or line.startswith("# TYPE "):
+            _, keyword, name, rest = line.split(" ", 3)
+            families.setdefault(name, {"samples": []})[keyword.lower()] = rest
+            continue
+        match = SAMPLE.match(line)
+        assert match, f"not a sample line: {line!r}"
+        name, labels, value = match.groups()
+        parsed = dict((key, unescape(raw)) for key, raw in LABEL.findall(labels or ""))
+        assert LABEL.sub("", labels or "") == "", f"malformed labels: {labels!r}"
+        family = next(family for family in families if name == family or name.rsplit("_", 1)[0] == family)
+        families[family]["samples"].append((name, parsed, float(value)))
+    return families
+
+@pytest.fixture
+def registry(monkeypatch):
+    """An empty metric registry, so metrics made by a test don't reach the app's"""
+    monkeypatch.setattr(server, "METRICS", [])
+
+def test_label_values_are_escaped(registry):
+    counter = server.Counter("test_requests_total", "Requests", ("path",))
+    awkward = 'say "hi"\\\nbye'
+    counter.inc(awkward)
+    counter.inc(awkward, amount=2)
+    family = parse_exposition(server.render_metrics())["test_requests_total"]
+    assert family["type"] == "counter"
+    assert family["samples"] == [("test_requests_total", {"path": awkward}, 3.0)]
+
+def test_histogram_buckets_are_cumulative_and_end_in_inf(registry):
+    histogram = server.Histogram("test_seconds", "Latency", ("route",), buckets=(0.1, 1.0))
+    for value in (0.05, 0.1, 0.5, 7.0):
+        histogram.observe(value, "/x")
+    samples = parse_exposition(server.render_metrics())["test_seconds"]["samples"]
+    buckets = {labels["le"]: value for name, labels, value in samples if name == "test_seconds_bucket"}
+    assert buckets == {"0.1": 2, "1.0": 3, "+Inf": 4}  # a value on a bound counts in that bucket
+    assert ("test_seconds_count", {"route": "/x"}, 4) in samples
+    assert ("test_seconds_sum", {"route": "/x"}, 7.65) in samples
+
+def test_metrics_need_the_configured_token(db, monkeypatch):
+    async def body():
+        async with api_client() as client:
+            monkeypatch.setattr(server, "METRICS_TOKEN", "")
+            assert (await client.get("/metrics")).status_code == 404
+
+            monkeypatch.setattr(server, "METRICS_TOKEN", "scrape-me")
+            assert (await client.get("/metrics")).status_code == 401
+            assert (await client.get("/metrics", headers={"Authorization": "Bearer wrong"})).status_code == 401
+            await client.get("/api/tasks")
+            response = await client.get("/metrics", headers={"Authorization": "Bearer scrape-me"})
+        assert response.status_code == 200
+        families = parse_exposition(response.text)
+        assert families["http_request_duration_seconds"]["type"] == "histogram"
+        assert any(labels.get("route") == "/api/tasks" for _, labels, _ in families["http_requests_total"]["samples"])
+    run(body())
@@ -0,0 +1,78 @@
+"""Problem generator registry: per-type generators, capacities and the planned mix"""
+
+import random
+
+from tests.conftest import run, server
+
+def pooled_generator(problem_type, size):
+    """Registry entry drawing distinct items from a pool of `size`, like the content-backed types"""
+    content = [str(i) for i in range(size)]
+
+    async def generate(count, grade, settings):
+        return [server.ProblemRecord(f"{problem_type} {item}", item) for item in random.sample(content, min(count, size))]
+    return server.ProblemGenerator("math", problem_type, generate, pool=lambda grade, settings: content)
+
+def broken_generator(problem_type):
+    async def generate(count, grade, settings):
+        raise RuntimeError("content module missing")
+    return server.ProblemGenerator("math", problem_type, generate)
+
+def use_registry(monkeypatch, *generators):
+    monkeypatch.setitem(server.PROBLEM_GENERATORS, "math", {generator.problem_type: generator for generator in generators})
+    monkeypatch.setattr(server, "_PROBLEM_PLAN_CACHE", server.OrderedDict())
+    return server.MathSettings(problem_types={generator.problem_type: True for generator in generators})
+
+def test_every_math_type_has_its_own_registered_generator():
+    async def body():
+        settings = server.MathSettings()
+        for problem_type, generator in server.PROBLEM_GENERATORS["math"].items():
+            assert generator.generate.__name__ != "generate"  # a named generator, not an adapter
+            problems = await server.generate_math_problems(problem_type, 2, 4, settings)
+            assert len(problems) == 4
+    run(body())
+
+def test_capacity_counts_content_left_after_difficulty_filtering():
+    generator = server.PROBLEM_GENERATORS["german"]["spelling"]
+    easy = server.GermanSettings(difficulty_settings={"spelling_difficulty": "easy"})
+    medium = server.GermanSettings(difficulty_settings={"spelling_difficulty": "medium"})
+    words = generator.pool(2, medium)
+    assert generator.capacity(2, medium) == len(words)
+    assert generator.capacity(2, easy) == len([word for word in words if len(word["correct"]) <= 8])
+
+def test_plan_depends_on_difficulty(monkeypatch):
+    monkeypatch.setattr(server, "_PROBLEM_PLAN_CACHE", server.OrderedDict())
+    problem_types = {"spelling": True}
+    easy = server.GermanSettings(problem_types=problem_types, difficulty_settings={"spelling_difficulty": "easy"})
+    hard = server.GermanSettings(problem_types=problem_types, difficulty_settings={"spelling_difficulty": "hard"})
+    count = 10_000
+    assert server.plan_problem_allocation("german", 2, count, easy)[0][1] == server.PROBLEM_GENERATORS["german"]["spelling"].capacity(2, easy)
+    assert server.plan_problem_allocation("german", 2, count, hard)[0][1] == server.PROBLEM_GENERATORS["german"]["spelling"].capacity(2, hard)
+
+def test_top_up_skips_exhausted_pools(monkeypatch):
+    settings = use_registry(monkeypatch, pooled_generator("small", 3), broken_generator("broken"))
+
+    async def body():
+        problems = await server.generate_planned_problems("math", 2, 6, settings)
+        assert sorted(problem.correct_answer for problem in problems) == ["0", "1", "2"]
+    run(body())
+
+def test_top_up_draws_only_new_content(monkeypatch):
+    settings = use_registry(monkeypatch, pooled_generator("large", 8), broken_generator("broken"))
+
+    async def body():
+        for _ in range(20):
+            problems = await server.generate_planned_problems("math", 2, 6, settings)
+            assert len(problems) == 6
+            assert len({problem.question for problem in problems}) == 6
+    run(body())
+
+def test_plan_cache_keeps_only_the_most_recently_used_plans(monkeypatch):
+    monkeypatch.setattr(server, "_PROBLEM_PLAN_CACHE", server.OrderedDict())
+    monkeypatch.setattr(server, "PROBLEM_PLAN_CACHE_SIZE", 3)
+    settings = server.MathSettings()
+    for count in (1, 2, 3, 1, 4):  # using the plan for 1 again makes 2 the least recently used
+        server.plan_problem_allocation("math", 2, count, settings)
+    assert [key[2] for key in server._PROBLEM_PLAN_CACHE] == [3, 1, 4]
+    for count in range(5, 50):
+        server.plan_problem_allocation("math", 2, count, settings)
+    assert len(server._PROBLEM_PLAN_CACHE) == 3
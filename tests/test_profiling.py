@@ -0,0 +1,103 @@
+"""On-demand profiling: the secret header, profiles on disk and the collapsed stacks"""
+
+import asyncio
+import cProfile
+import os
+import pstats
+
+import httpx
+import pytest
+
+from tests.conftest import run, server
+
+SECRET = "letmeprofile"
+
+@pytest.fixture
+def profile_dir(monkeypatch, tmp_path):
+    monkeypatch.setattr(server, "PROFILE_DIR", tmp_path)
+    return tmp_path
+
+def profiled_client(app) -> httpx.AsyncClient:
+    return httpx.AsyncClient(transport=httpx.ASGITransport(app=server.ProfilingMiddleware(app, secret=SECRET)), base_url="http://test")
+
+async def ok_app(scope, receive, send):
+    await send({"type": "http.response.start", "status": 200, "headers": [(b"content-type", b"text/plain")]})
+    await send({"type": "http.response.body", "body": b"ok"})
+
+def test_requests_without_the_right_secret_are_not_profiled(profile_dir):
+    async def body():
+        async with profiled_client(ok_app) as client:
+            responses = [
+                await client.get("/"),
+                await client.get("/", headers={"X-Profile": "wrong"}),
+                await client.get("/", params={"_profile": SECRET}),  # the secret is only read from the header
+            ]
+        for response in responses:
+            assert response.status_code == 200
+            assert "x-profile-id" not in response.headers
+        assert list(profile_dir.iterdir()) == []
+    run(body())
+
+def test_profiled_request_writes_pstats_and_collapsed_stacks(profile_dir):
+    async def body():
+        async with profiled_client(ok_app) as client:
+            response = await client.get("/", headers={"X-Profile": SECRET})
+        profile_id = response.headers["x-profile-id"]
+        assert response.text == "ok"
+        assert pstats.Stats(str(profile_dir / f"{profile_id}.pstats")).total_calls > 0
+        assert (profile_dir / f"{profile_id}.collapsed").read_text(encoding="utf-8").strip()
+    run(body())
+
+def test_concurrent_request_is_served_unprofiled_as_busy(profile_dir):
+    started, release = asyncio.Event(), asyncio.Event()
+
+    async def slow_app(scope, receive, send):
+        if scope["path"] == "/slow":
+            started.set()
+            await release.wait()
+        await ok_app(scope, receive, send)
+
+    async def body():
+        async with profiled_client(slow_app) as client:
+            slow = asyncio.create_task(client.get("/slow", headers={"X-Profile": SECRET}))
+            await started.wait()
+            busy = await client.get("/", headers={"X-Profile": SECRET})
+            release.set()
+            profiled = await slow
+        assert busy.headers["x-profile-status"] == "busy"
+        assert "x-profile-id" not in busy.headers
+        assert "x-profile-id" in profiled.headers
+        assert len(list(profile_dir.glob("*.pstats"))) == 1
+    run(body())
+
+def test_old_profiles_are_pruned_to_the_retention(profile_dir, monkeypatch):
+    monkeypatch.setattr(server, "PROFILE_RETAIN", 2)
+
+    async def body():
+        profile_ids = []
+        async with profiled_client(ok_app) as client:
+            for _ in range(4):
+                profile_ids.append((await client.get("/", headers={"X-Profile": SECRET})).headers["x-profile-id"])
+                for file in profile_dir.iterdir():  # older files first, whatever the clock resolution
+                    os.utime(file, (file.stat().st_mtime - 10, file.stat().st_mtime - 10))
+        assert sorted(file.name for file in profile_dir.iterdir()) == sorted(
+            f"{profile_id}.{suffix}" for profile_id in profile_ids[-2:] for suffix in ("pstats", "collapsed")
+        )
+    run(body())
+
+def inner():
+    return sum(i * i for i in range(20000))
+
+def outer():
+    return inner() + inner()
+
+def test_collapsed_stacks_nest_callees_under_their_callers():
+    profiler = cProfile.Profile()
+    profiler.enable()
+    outer()
+    profiler.disable()
+    lines = server.collapsed_stacks(pstats.Stats(profiler))
+    stacks = [line.rsplit(" ", 1)[0].split(";") for line in lines]
+    assert all(line.rsplit(" ", 1)[1].isdigit() for line in lines)
+    outer_label = next(frame for stack in stacks for frame in stack if frame.startswith("outer ("))
+    assert any(stack[-2:] == [outer_label, f"inner (test_profiling.py:{inner.__code__.co_firstlineno})"] for stack in stacks)
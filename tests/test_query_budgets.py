@@ -0,0 +1,67 @@
+"""Query budgets: MongoDB round trips of the hot endpoints, so a change that adds queries fails here"""
+
+import pytest
+
+from tests.conftest import api_client, query_budget, run
+
+DASHBOARD_BUDGET = 6  # collection versions, tasks, week rows, progress document, week row sums, rewards
+PROGRESS_BUDGET = 2  # progress document and the week rows' sums
+SUBMIT_BUDGET = 10  # challenge, settings, progress and statistics reads; seq allocations and their writes
+# Every stamped write call costs a seq allocation on top of the write itself
+CREATE_TASK_BUDGET = 3  # seq, insert, version bump
+# The task: seq, delete returning its id, tombstone; its week rows: seq, ids read, delete, tombstones; version bump
+DELETE_TASK_BUDGET = 8
+
+async def seed(client):
+    await client.post("/api/tasks", json={"name": "Zähne putzen"})
+    await client.post("/api/rewards", json={"name": "Eis", "required_stars": 3})
+    # The first reads create and normalize this week's progress document
+    await client.get("/api/progress")
+    await client.get("/api/progress")
+
+def test_dashboard_and_progress_stay_within_budget(commands):
+    async def body():
+        async with api_client() as client:
+            await seed(client)
+            with query_budget(DASHBOARD_BUDGET, "/api/dashboard"), query_budget(PROGRESS_BUDGET, "/api/progress") as recorder:
+                dashboard = await client.get("/api/dashboard")
+                await client.get("/api/progress")
+                # Revalidating an unchanged dashboard is answered from the version cache
+                revalidated = await client.get("/api/dashboard", headers={"If-None-Match": dashboard.headers["etag"]})
+            assert revalidated.status_code == 304
+            assert recorder.requests[-1][2] == []
+    run(body())
+
+def test_submit_math_answers_stays_within_budget(commands):
+    async def body():
+        async with api_client() as client:
+            await seed(client)
+            challenge = (await client.post("/api/math/challenge/2")).json()
+            challenge = challenge.get("challenge", challenge)
+            answers = {str(i): problem["correct_answer"] for i, problem in enumerate(challenge["problems"])}
+            with query_budget(SUBMIT_BUDGET, "/api/math/challenge/{challenge_id}/submit") as recorder:
+                response = await client.post(f"/api/math/challenge/{challenge['id']}/submit", json=answers)
+            assert response.status_code == 200
+            assert recorder.commands()
+    run(body())
+
+def test_exceeding_a_budget_fails_with_the_commands_sent(commands):
+    async def body():
+        async with api_client() as client:
+            await seed(client)
+            with pytest.raises(AssertionError, match=r"GET /api/dashboard sent \d+ MongoDB commands, budget is 1: find"):
+                with query_budget(1):
+                    await client.get("/api/dashboard")
+    run(body())
+
+def test_task_writes_stay_within_budget(commands):
+    async def body():
+        async with api_client() as client:
+            with query_budget(CREATE_TASK_BUDGET, "/api/tasks"):
+                task = (await client.post("/api/tasks", json={"name": "Zähne putzen"})).json()
+            await client.post(f"/api/stars/{task['id']}/monday", params={"stars": 2})
+            with query_budget(DELETE_TASK_BUDGET, "/api/tasks/{task_id}") as recorder:
+                response = await client.delete(f"/api/tasks/{task['id']}")
+            assert response.status_code == 200
+            assert recorder.commands().count("findAndModify") == 3  # two seq allocations and the delete itself
+    run(body())
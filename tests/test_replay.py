@@ -0,0 +1,69 @@
+"""Offline mutation replay: once-only application, claim release and claim leases"""
+
+import asyncio
+from datetime import datetime, timedelta
+
+import pytest
+
+from tests.conftest import api_client, run, server
+
+def add_to_safe(key, stars=1):
+    return {"key": key, "type": "add_to_safe", "payload": {"stars": stars}}
+
+async def give_stars(db, stars):
+    await db.weekly_progress.insert_one(server.WeeklyProgress(week_start=server.get_current_week_start(), total_stars_earned=stars).dict())
+
+def test_retried_key_is_applied_once(db):
+    async def body():
+        await give_stars(db, 5)
+        async with api_client() as client:
+            first = (await client.post("/api/sync/mutations", json={"mutations": [add_to_safe("k1")]})).json()
+            again = (await client.post("/api/sync/mutations", json={"mutations": [add_to_safe("k1")]})).json()
+        assert first["results"][0]["status"] == "applied"
+        assert again["results"][0]["status"] == "duplicate"
+        progress = await db.weekly_progress.find_one()
+        assert progress["stars_in_safe"] == 1
+    run(body())
+
+def test_failed_mutation_releases_its_claim(db, monkeypatch):
+    async def broken(payload):
+        raise RuntimeError("database went away")
+    monkeypatch.setitem(server.MUTATION_HANDLERS, "add_to_safe", broken)
+
+    async def body():
+        async with api_client() as client:
+            response = (await client.post("/api/sync/mutations", json={"mutations": [add_to_safe("k1")]})).json()
+        assert response["results"][0]["status"] == "failed"
+        assert await db.mutation_keys.count_documents({}) == 0
+    run(body())
+
+def test_cancelled_replay_releases_unfinished_claims(db, monkeypatch):
+    async def cancelled(payload):
+        raise asyncio.CancelledError()
+    monkeypatch.setitem(server.MUTATION_HANDLERS, "claim_reward", cancelled)
+
+    async def body():
+        await give_stars(db, 5)
+        batch = server.SyncMutationBatch(mutations=[add_to_safe("k1"), {"key": "k2", "type": "claim_reward", "payload": {"reward_id": "r1"}}])
+        with pytest.raises(asyncio.CancelledError):
+            await server.replay_mutations(batch)
+        # The mutation that was applied keeps its outcome; the unfinished one can be retried
+        assert [record["_id"] for record in await db.mutation_keys.find({}).to_list(length=None)] == ["k1"]
+        assert (await db.mutation_keys.find_one({"_id": "k1"}))["status"] == "applied"
+    run(body())
+
+def test_expired_claim_is_taken_over_and_live_claim_is_not(db):
+    async def body():
+        await give_stars(db, 5)
+        now = datetime.utcnow()
+        expired = now - timedelta(seconds=server.MUTATION_CLAIM_LEASE_SECONDS + 5)
+        await db.mutation_keys.insert_many([
+            {"_id": "dead", "type": "add_to_safe", "status": "pending", "created_at": expired, "claimed_at": expired},
+            {"_id": "live", "type": "add_to_safe", "status": "pending", "created_at": now, "claimed_at": now}
+        ])
+        async with api_client() as client:
+            response = (await client.post("/api/sync/mutations", json={"mutations": [add_to_safe("dead"), add_to_safe("live")]})).json()
+        assert [result["status"] for result in response["results"]] == ["applied", "pending"]
+        assert (await db.mutation_keys.find_one({"_id": "dead"}))["status"] == "applied"
+        assert (await db.mutation_keys.find_one({"_id": "live"}))["status"] == "pending"
+    run(body())
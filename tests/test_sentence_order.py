@@ -0,0 +1,57 @@
+"""Sentence order problems: tokenizing, scrambling without giveaways and grading the reordered sentence"""
+
+from tests.conftest import run, server
+
+def test_tokenize_drops_punctuation_and_whitespace():
+    assert server.tokenize_sentence("  Der Hund\tbellt,  laut! ") == ("Der", "Hund", "bellt", "laut")
+    assert server.tokenize_sentence("Wir spielen Hide-and-Seek.") == ("Wir", "spielen", "Hide-and-Seek")
+
+def test_scramble_is_a_stable_permutation_that_differs_from_the_sentence():
+    tokens = ("Wir", "gehen", "heute", "zur", "Schule")
+    scrambled = server.scramble_sentence_tokens(tokens)
+    assert scrambled != tokens
+    assert sorted(scrambled) == sorted(tokens)
+    assert server.scramble_sentence_tokens(tokens) == scrambled
+    assert server.scramble_sentence_tokens(("ja", "ja", "ja")) is None
+
+def test_scrambled_words_do_not_give_away_the_start_or_the_end():
+    index = server.index_sentence_order([
+        "Der Hund bellt laut.",
+        "Oma backt einen Kuchen!",
+        "Heute besucht uns die Oma.",
+    ])
+    scrambled = {sentence: words for sentence, _, words in index}
+    assert sorted(scrambled["Der Hund bellt laut."]) == sorted(["der", "Hund", "bellt", "laut"])
+    # Capitalized mid-sentence elsewhere in the corpus: a noun, which keeps its capital letter
+    assert "Oma" in scrambled["Oma backt einen Kuchen!"]
+    for words in scrambled.values():
+        assert not any(word.endswith((".", "!", "?")) for word in words)
+
+def sentence_order_problem(sentence):
+    (correct, _, scrambled), = server.index_sentence_order([sentence])
+    return server.GermanProblem(
+        question=" - ".join(scrambled), question_type="sentence_order", correct_answer=correct,
+        problem_data={"scrambled_words": list(scrambled)}
+    )
+
+def test_reordered_words_grade_as_correct_and_other_orders_as_wrong():
+    problems = [sentence_order_problem("Der Hund bellt laut."), sentence_order_problem("Der Hund bellt laut.")]
+    words = problems[0].problem_data["scrambled_words"]
+    # The child puts the shown words in order and types them as shown: lowercase start, no final period
+    reordered = " ".join(sorted(words, key=["der", "Hund", "bellt", "laut"].index))
+    answers = {0: reordered, 1: "laut bellt der Hund"}
+    assert server.grade_german_answers(problems, answers) == 1
+    assert [problem.is_correct for problem in problems] == [True, False]
+
+def test_generated_problems_grade_their_own_solution():
+    async def body():
+        settings = server.GermanSettings()
+        problems = [
+            server.GermanProblem(**problem.to_dict(index, server.PROBLEM_FIELDS["german"]))
+            for index, problem in enumerate(await server.generate_sentence_order_problems(5, 2, settings))
+        ]
+        answers = {index: problem.correct_answer.lower().rstrip(".!?") for index, problem in enumerate(problems)}
+        assert server.grade_german_answers(problems, answers) == len(problems)
+        shown = {index: " ".join(problem.problem_data["scrambled_words"]) for index, problem in enumerate(problems)}
+        assert server.grade_german_answers(problems, shown) == 0
+    run(body())
@@ -0,0 +1,32 @@
+"""Scheduled snapshots: full and incremental chains on disk and restoring them"""
+
+from tests.conftest import api_client, run, server
+
+def test_snapshots_are_opt_in():
+    assert server.SNAPSHOTS_ENABLED is False
+
+def test_incremental_snapshot_chain_restores(db, raw_bson, monkeypatch, tmp_path):
+    monkeypatch.setattr(server, "SNAPSHOT_DIR", tmp_path)
+
+    async def body():
+        await db.tasks.insert_one({"id": "t1", "name": "first"})
+        await db.tasks.insert_one({"id": "t2", "name": "removed later"})
+        async with api_client() as client:
+            full = (await client.post("/api/snapshots", params={"kind": "full"})).json()
+            await db.tasks.update_one({"id": "t1"}, {"$set": {"name": "renamed"}})
+            await db.tasks.delete_one({"id": "t2"})
+            incremental = (await client.post("/api/snapshots")).json()
+            assert full["kind"] == "full"
+            assert incremental["kind"] == "incremental"
+            assert incremental["base"] == full["name"]
+            assert not list(tmp_path.glob("*.partial"))
+
+            await db.tasks.delete_many({})
+            await db.tasks.insert_one({"id": "t3", "name": "after the snapshot"})
+            response = await client.post(f"/api/snapshots/{incremental['name']}/restore")
+            assert response.status_code == 200
+
+        tasks = {task["id"]: task["name"] for task in await db.tasks.find({}).to_list(length=None)}
+        assert tasks["t1"] == "renamed"
+        assert "t2" not in tasks
+    run(body())
@@ -0,0 +1,111 @@
+"""Week-row star cells: single and batched slot writes keep the cached row total in step"""
+
+import asyncio
+
+from tests.conftest import api_client, run, server
+
+async def week_row(db, task_id):
+    return await db.week_stars.find_one({"task_id": task_id})
+
+def test_star_cell_change_is_one_stamped_write(db):
+    async def body():
+        week_start = server.get_current_week_start()
+        await server.set_star_cell("t1", week_start, 0, 2)
+        seq = await server.current_sync_watermark()
+
+        await server.set_star_cell("t1", week_start, 0, 1)
+        row = await week_row(db, "t1")
+        assert row["stars"][0] == 1
+        assert row["total"] == 1
+        assert row["sync_seq"] == seq + 1
+        assert await server.current_sync_watermark() == seq + 1
+
+        await server.set_star_cell("t1", week_start, 0, 1)  # unchanged: no write at all
+        assert await server.current_sync_watermark() == seq + 1
+    run(body())
+
+def test_concurrent_star_cells_keep_total_consistent(db):
+    async def body():
+        week_start = server.get_current_week_start()
+        await asyncio.gather(*(
+            server.set_star_cell("t1", week_start, i % 7, 1 + i % 2) for i in range(28)
+        ))
+        row = await week_row(db, "t1")
+        assert row["total"] == sum(row["stars"])
+        assert await db.week_stars.count_documents({}) == 1
+    run(body())
+
+async def post_batch(cells):
+    async with api_client() as client:
+        return await client.post("/api/stars/batch", json={"cells": [
+            {"task_id": task_id, "day": day, "stars": stars} for task_id, day, stars in cells
+        ]})
+
+async def week_stars_version():
+    return (await server.get_collection_versions(["week_stars"]))["week_stars"]
+
+def test_batch_writes_new_and_existing_rows_with_one_version_bump(db):
+    async def body():
+        week_start = server.get_current_week_start()
+        await server.set_star_cell("t1", week_start, 0, 2)
+        version = await week_stars_version()
+
+        response = await post_batch([("t1", "monday", 1), ("t1", "tuesday", 2), ("t2", "friday", 2), ("t2", "friday", 1)])
+        assert response.status_code == 200
+        assert response.json()["updated"] == 3
+        assert response.json()["progress"]["total_stars_earned"] == 4
+        assert (await week_row(db, "t1"))["stars"][:2] == [1, 2]
+        assert (await week_row(db, "t1"))["total"] == 3
+        assert (await week_row(db, "t2"))["stars"][4] == 1  # the last of repeated cells wins
+        assert (await week_row(db, "t2"))["total"] == 1
+        assert await week_stars_version() == version + 1
+    run(body())
+
+def test_batch_with_an_over_limit_cell_writes_nothing(db):
+    async def body():
+        await server.set_star_cell("t1", server.get_current_week_start(), 0, 2)
+        version = await week_stars_version()
+
+        response = await post_batch([("t1", "monday", 0), ("t2", "tuesday", 3)])
+        assert response.status_code == 400
+        assert (await week_row(db, "t1"))["stars"][0] == 2
+        assert await week_row(db, "t2") is None
+        assert await week_stars_version() == version
+    run(body())
+
+def test_batch_falls_back_to_cell_writes_when_a_row_changes_under_it(db, monkeypatch):
+    bulk_write = server.SyncStampedCollection.bulk_write
+    interfered = []
+
+    async def bulk_write_after_a_concurrent_tap(self, requests, **kwargs):
+        if self._collection.name == "week_stars" and not interfered:
+            interfered.append(True)
+            await server.set_star_cell("t1", server.get_current_week_start(), 6, 2)  # lands between the read and the guarded write
+        return await bulk_write(self, requests, **kwargs)
+
+    async def body():
+        week_start = server.get_current_week_start()
+        await server.set_star_cell("t1", week_start, 0, 1)
+        monkeypatch.setattr(server.SyncStampedCollection, "bulk_write", bulk_write_after_a_concurrent_tap)
+        version = await week_stars_version()
+
+        response = await post_batch([("t1", "monday", 2), ("t1", "wednesday", 1), ("t2", "monday", 2)])
+        assert response.status_code == 200
+        assert interfered
+        row = await week_row(db, "t1")
+        assert row["stars"] == [2, 0, 1, 0, 0, 0, 2]
+        assert row["total"] == 5
+        assert (await week_row(db, "t2"))["stars"][0] == 2
+        assert await week_stars_version() == version + 1
+    run(body())
+
+def test_week_sum_counts_every_row(db):
+    async def body():
+        week_start = server.get_current_week_start()
+        await db.week_stars.insert_many([
+            {"task_id": f"t{i}", "week_start": week_start, "stars": [1, 0, 0, 0, 0, 0, 0], "total": 1} for i in range(1500)
+        ])
+        await db.week_stars.insert_one({"task_id": "t0", "week_start": week_start - server.timedelta(days=7), "stars": [2] * 7, "total": 14})
+        assert await server.sum_week_stars(week_start) == 1500
+        assert await server.sum_week_stars(week_start + server.timedelta(days=7)) == 0
+    run(body())
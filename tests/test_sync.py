@@ -0,0 +1,150 @@
+"""Sync sequence stamping, watermarks, tombstones and /sync deltas"""
+
+import asyncio
+
+from tests.conftest import api_client, run, server
+
+def test_watermark_holds_back_while_seq_is_allocated(db, monkeypatch):
+    """A reader that sees the incremented counter before the writer gets its seq must not pass that seq"""
+    allocated = asyncio.Event()
+    release = asyncio.Event()
+    real_next_sync_seq = server.next_sync_seq
+
+    async def slow_next_sync_seq():
+        seq = await real_next_sync_seq()
+        allocated.set()
+        await release.wait()
+        return seq
+
+    async def body():
+        await db.tasks.insert_one({"id": "t1", "name": "first"})
+        before = await server.current_sync_watermark()
+        monkeypatch.setattr(server, "next_sync_seq", slow_next_sync_seq)
+
+        write = asyncio.create_task(db.tasks.insert_one({"id": "t2", "name": "second"}))
+        await allocated.wait()
+        counter = await db.counters.find_one({"_id": "sync_seq"})
+        assert counter["seq"] == before + 1
+        assert await server.current_sync_watermark() == before
+
+        release.set()
+        await write
+        assert await server.current_sync_watermark() == before + 1
+    run(body())
+
+def test_watermark_holds_back_while_write_is_in_flight(db, monkeypatch):
+    async def body():
+        await db.tasks.insert_one({"id": "t1", "name": "first"})
+        seq = await server.current_sync_watermark()
+        monkeypatch.setitem(server._inflight_sync_seqs, seq + 1, server.datetime.utcnow())
+        await db.counters.update_one({"_id": "sync_seq"}, {"$inc": {"seq": 1}})
+        assert await server.current_sync_watermark() == seq
+    run(body())
+
+def test_sync_returns_changes_and_deletions_after_since(db):
+    async def body():
+        await db.tasks.insert_one({"id": "t1", "name": "keep"})
+        await db.tasks.insert_one({"id": "t2", "name": "remove"})
+        async with api_client() as client:
+            first = (await client.get("/api/sync")).json()
+            assert first["full"] is True
+            assert {task["id"] for task in first["changes"]["tasks"]} == {"t1", "t2"}
+
+            await db.tasks.update_one({"id": "t1"}, {"$set": {"name": "renamed"}})
+            await db.tasks.delete_one({"id": "t2"})
+            delta = (await client.get("/api/sync", params={"since": first["seq"]})).json()
+        assert delta["full"] is False
+        assert [task["name"] for task in delta["changes"]["tasks"]] == ["renamed"]
+        assert delta["deleted"] == {"tasks": ["t2"]}
+        assert delta["seq"] == first["seq"] + 2
+    run(body())
+
+def test_sync_since_ahead_of_held_back_watermark_is_not_reset(db, monkeypatch):
+    """A client whose since is above a watermark held back by a write in flight gets an empty delta, not a full resync"""
+    async def body():
+        await db.tasks.insert_one({"id": "t1", "name": "first"})
+        await db.tasks.insert_one({"id": "t2", "name": "second"})
+        seq = await server.current_sync_watermark()
+        monkeypatch.setitem(server._inflight_sync_seqs, seq - 1, server.datetime.utcnow())
+        async with api_client() as client:
+            delta = (await client.get("/api/sync", params={"since": seq})).json()
+        assert delta["full"] is False
+        assert delta["seq"] == seq
+        assert delta["changes"]["tasks"] == []
+    run(body())
+
+def test_stamped_bulk_requests_keep_their_options():
+    stamp = {"sync_seq": 7, "updated_at": server.datetime.utcnow()}
+    update = server.stamp_bulk_request(
+        server.UpdateOne({"id": "a"}, {"$set": {"x.$[item]": 1}}, upsert=True, array_filters=[{"item": 0}], hint="id_1"), stamp
+    )
+    assert update._doc["$set"]["sync_seq"] == 7
+    assert update._upsert is True
+    assert update._array_filters == [{"item": 0}]
+    assert update._hint == "id_1"
+    replace = server.stamp_bulk_request(server.ReplaceOne({"id": "a"}, {"id": "a"}, collation={"locale": "de"}), stamp)
+    assert replace._doc["sync_seq"] == 7
+    assert replace._collation == {"locale": "de"}
+
+def test_pruned_tombstones_force_full_sync_and_full_backup(db, monkeypatch):
+    async def body():
+        await db.tasks.insert_one({"id": "t1", "name": "old"})
+        async with api_client() as client:
+            since = (await client.get("/api/sync")).json()["seq"]
+            backup_since = (await client.get("/api/backup/export")).json()["watermark"]
+            await db.tasks.delete_one({"id": "t1"})
+            await db.tasks.insert_one({"id": "t2", "name": "new"})
+
+            monkeypatch.setattr(server, "SYNC_TOMBSTONE_RETENTION_SECONDS", -60)  # every tombstone is past retention
+            await server.prune_sync_tombstones()
+            assert await db.sync_tombstones.count_documents({}) == 0
+
+            delta = (await client.get("/api/sync", params={"since": since})).json()
+            assert delta["full"] is True
+            assert [task["id"] for task in delta["changes"]["tasks"]] == ["t2"]
+            response = await client.get("/api/backup/export", params={"since": backup_since})
+            assert response.status_code == 409
+    run(body())
+
+def test_reading_progress_does_not_stamp_a_write(db):
+    async def body():
+        async with api_client() as client:
+            await client.get("/api/progress")
+            await client.get("/api/progress")  # the first read after creating the document stores total_stars
+            seq = await server.current_sync_watermark()
+            await client.get("/api/progress")
+            await client.get("/api/progress")
+        assert await server.current_sync_watermark() == seq
+    run(body())
+
+def test_full_sync_is_paged_across_collections(db):
+    async def body():
+        await db.tasks.insert_many([{"id": f"t{i}", "name": f"task {i}"} for i in range(3)])
+        await db.rewards.insert_many([{"id": f"r{i}", "name": f"reward {i}", "required_stars": 1} for i in range(2)])
+        seen = {}
+        pages = 0
+        async with api_client() as client:
+            params = {"limit": 2}
+            while True:
+                response = await client.get("/api/sync", params=params)
+                page = response.json()
+                pages += 1
+                if pages == 1:
+                    seq = page["seq"]
+                    await db.tasks.insert_one({"id": "t9", "name": "written while paging"})
+                assert page["full"] is True and page["seq"] == seq
+                for name, docs in page["changes"].items():
+                    seen.setdefault(name, []).extend(doc["id"] for doc in docs)
+                if "x-next-cursor" not in response.headers:
+                    break
+                params = {"limit": 2, "cursor": response.headers["x-next-cursor"]}
+            delta = (await client.get("/api/sync", params={"since": seq})).json()
+            invalid = await client.get("/api/sync", params={"cursor": "not a cursor"})
+        # t0 t1 | t2 t9 | r0 r1 | the remaining (empty) collections
+        assert pages == 4
+        assert seen["tasks"] == ["t0", "t1", "t2", "t9"]
+        assert seen["rewards"] == ["r0", "r1"]
+        # Written after the first page: newer than its seq, so the next incremental sync has it too
+        assert [task["id"] for task in delta["changes"]["tasks"]] == ["t9"]
+        assert invalid.status_code == 400
+    run(body())
@@ -0,0 +1,55 @@
+"""Collection versions: the in-process cache and ETag revalidation"""
+
+import asyncio
+
+from tests.conftest import api_client, run, server
+
+class SlowVersions:
+    """collection_versions whose reads wait for a signal, to interleave a bump with a read"""
+    def __init__(self, collection):
+        self.collection = collection
+        self.read = asyncio.Event()
+        self.release = asyncio.Event()
+
+    def find(self, *args, **kwargs):
+        cursor = self.collection.find(*args, **kwargs)
+        slow = self
+
+        class Cursor:
+            async def to_list(self, length):
+                docs = await cursor.to_list(length)
+                slow.read.set()
+                await slow.release.wait()
+                return docs
+        return Cursor()
+
+    def __getattr__(self, name):
+        return getattr(self.collection, name)
+
+def test_read_racing_a_bump_does_not_cache_the_old_version(db, monkeypatch):
+    async def body():
+        await server.bump_collection_versions("tasks")
+        slow = SlowVersions(db.collection_versions)
+        monkeypatch.setattr(db, "collection_versions", slow)
+
+        read = asyncio.create_task(server.get_collection_versions(["tasks"]))
+        await slow.read.wait()
+        await server.bump_collection_versions("tasks")
+        slow.release.set()
+        assert await read == {"tasks": 1}
+
+        monkeypatch.setattr(db, "collection_versions", slow.collection)
+        assert await server.get_collection_versions(["tasks"]) == {"tasks": 2}
+    run(body())
+
+def test_write_changes_the_etag(db):
+    async def body():
+        async with api_client() as client:
+            first = await client.get("/api/tasks")
+            etag = first.headers["etag"]
+            assert (await client.get("/api/tasks", headers={"If-None-Match": etag})).status_code == 304
+            await client.post("/api/tasks", json={"name": "new"})
+            second = await client.get("/api/tasks", headers={"If-None-Match": etag})
+        assert second.status_code == 200
+        assert [task["name"] for task in second.json()] == ["new"]
+    run(body())